@@ -1,14 +1,13 @@
-from project import create_app
-
-from project.extension import db
+from flask_migrate import upgrade
 
-from project.model import User
+from project import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
     with app.app_context():
-        # This looks at the imported 'User' model and creates the table in MySQL
-        db.create_all()
-        print("Connected to MySQL and tables created!")
-    app.run(debug=True)
\ No newline at end of file
+        # Brings the MySQL schema up to date (same as 'flask db upgrade').
+        # Schema changes: edit model.py, then 'flask db migrate -m "..."'.
+        upgrade()
+        print("Connected to MySQL and schema is up to date!")
+    app.run(debug=True)
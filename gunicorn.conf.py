@@ -0,0 +1,19 @@
+# gunicorn.conf.py -- gunicorn 'app:app' -c gunicorn.conf.py
+import os
+
+from dotenv import load_dotenv
+
+# Prometheus metrics: every process (these workers, 'flask email-worker',
+# 'flask upload-worker', 'flask scheduler') writes to the same
+# PROMETHEUS_MULTIPROC_DIR - same .env and default as project/metrics.py,
+# which the master doesn't import. The files are not wiped on start: that
+# would drop the other processes' counters. Wipe them at deploy instead,
+# with everything stopped: 'flask metrics-reset'.
+load_dotenv()
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/osov-prometheus')
+
+
+def child_exit(server, worker):
+    # A dead worker's in-flight gauge must not keep counting
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
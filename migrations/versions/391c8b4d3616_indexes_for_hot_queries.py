@@ -0,0 +1,47 @@
+"""indexes for hot queries
+
+Secondary indexes for the queries the site runs on every page view or
+dashboard load. 'python scripts/explain_hot_queries.py' checks that each
+of those queries actually uses one.
+
+Revision ID: 391c8b4d3616
+Revises: 878c16ed3e39
+Create Date: 2026-10-18 06:51:28.134818
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '391c8b4d3616'
+down_revision = '878c16ed3e39'
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, columns)
+INDEXES = [
+    ('stories', 'ix_stories_status_created_at', ['status', 'created_at']),
+    ('stories', 'ix_stories_category', ['category']),
+    ('donations', 'ix_donations_status_created_at', ['status', 'created_at']),
+    ('donations', 'ix_donations_user_frequency_status', ['user_id', 'frequency', 'status']),
+    ('event_rsvps', 'ix_event_rsvps_event_user', ['event_id', 'user_id']),
+    ('users', 'ix_users_last_login', ['last_login']),
+]
+
+
+def _has_index(table, name):
+    return name in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # A database built by db.create_all() from the current models already has them
+    for table, name, columns in INDEXES:
+        if not _has_index(table, name):
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,45 @@
+"""indexes for admin keyset pages
+
+The dashboard user list, "Manage stories" and the approvals tables page on
+(created_at, id) newest first (project/keyset.py). Each page is an index
+range read only if created_at is indexed, after the filter column if any.
+
+Revision ID: 5c1e9a7d2b40
+Revises: 391c8b4d3616
+Create Date: 2026-10-18 09:12:40.517302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9a7d2b40'
+down_revision = '391c8b4d3616'
+branch_labels = None
+depends_on = None
+
+
+# (table, index name, columns)
+INDEXES = [
+    ('users', 'ix_users_created_at', ['created_at']),
+    ('stories', 'ix_stories_created_at', ['created_at']),
+    ('partner_applications', 'ix_partner_applications_status_created_at', ['status', 'created_at']),
+    ('volunteer_applications', 'ix_volunteer_applications_status_created_at', ['status', 'created_at']),
+]
+
+
+def _has_index(table, name):
+    return name in {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    # A database built by db.create_all() from the current models already has them
+    for table, name, columns in INDEXES:
+        if not _has_index(table, name):
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,38 @@
+"""daily stats rollup
+
+daily_stats holds per-day user/donation totals for the admin dashboard and
+fundraising pages. The scheduler's 'rollup_daily_stats' job fills it,
+starting with all of history on its first run.
+
+Revision ID: a47d3e0c9f18
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-18 10:02:11.408925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a47d3e0c9f18'
+down_revision = '5c1e9a7d2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A database built by db.create_all() from the current models already has it
+    if sa.inspect(op.get_bind()).has_table('daily_stats'):
+        return
+    op.create_table('daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('metric', sa.String(length=30), nullable=False),
+        sa.Column('currency', sa.String(length=3), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'metric', 'currency')
+    )
+
+
+def downgrade():
+    op.drop_table('daily_stats')
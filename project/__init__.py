@@ -4,7 +4,7 @@ from flask import Flask,request,render_template,flash
 from dotenv import load_dotenv
 from flask_login import current_user
 # 1. Import extensions (Removed 'cloudinary' from this list)
-from .extension import db, csrf, oauth, mail, login_manager
+from .extension import db, csrf, oauth, mail, login_manager, payment_gateway, page_cache, view_counter, migrate, query_counter, sql_timer
 from . import config
 from .model import UserRole
 
@@ -15,12 +15,23 @@ def create_app():
     
     app.config.from_object(config)
     
+    # Request metrics for /admin/metrics. First, so its before_request
+    # runs ahead of CSRF & co. and times (and counts) their rejections too
+    from . import metrics
+    metrics.init_app(app)
+
     # Initialize Extensions
     csrf.init_app(app)
     db.init_app(app)
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
     mail.init_app(app)
     login_manager.init_app(app)
     oauth.init_app(app)
+    payment_gateway.init_app(app)
+    page_cache.init_app(app)
+    view_counter.init_app(app)
+    query_counter.init_app(app)
+    sql_timer.init_app(app)
 
     # Mail Config
     
@@ -69,6 +80,27 @@ def create_app():
     from .adminroute import admin_route
     app.register_blueprint(admin_route)    
 
+    # Register CLI Commands (flask <command>)
+    from .campaigns import campaigns_cli
+    app.cli.add_command(campaigns_cli)
+
+    from .mailer import email_worker_command, email_bench_command
+    app.cli.add_command(email_worker_command)
+    app.cli.add_command(email_bench_command)
+
+    from .newsletter import newsletter_cli
+    app.cli.add_command(newsletter_cli)
+
+    from .uploads import upload_worker_command
+    app.cli.add_command(upload_worker_command)
+
+    from .scheduler import scheduler_command
+    app.cli.add_command(scheduler_command)
+
+    # 'flask assets build' + the picture() template helper
+    from . import assets
+    assets.init_app(app)
+
     # Register Error Handlers
     @app.errorhandler(404)
     def page_not_found(e):
@@ -99,10 +131,14 @@ def check_maintenance():
     # 2. Allow Admin & Auth Routes (So you don't lock yourself out!)
     if request.path.startswith('/admin') or request.path.startswith('/auth'):
         return None
+
+    # Stripe must still be able to confirm payments during maintenance
+    if request.path.startswith('/stripe/'):
+        return None
         
-    # 3. Check Database for Maintenance Mode
-    from .model import SiteConfig
-    is_down = SiteConfig.is_maintenance_mode()
+    # 3. Check Maintenance Mode (cached per worker, see siteconfig.py)
+    from . import siteconfig
+    is_down = siteconfig.is_maintenance_mode()
     
     # 4. If ON, block access
     if is_down:
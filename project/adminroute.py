@@ -1,29 +1,30 @@
 
 from flask import render_template, redirect, url_for, flash, request,Response,stream_with_context,make_response
 from flask_login import login_user, current_user, logout_user
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from werkzeug.security import check_password_hash
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from flask_mail import Message
 import csv
+import hmac
 import io
 from . import mail
 
-from flask import render_template,Blueprint,request,flash,redirect,url_for,session,current_app
+from flask import render_template,Blueprint,request,flash,redirect,url_for,session,current_app,jsonify
 
-from .extension import db,login_manager
+from .extension import db,login_manager,page_cache,query_counter
 
 from . import oauth
 
-from sqlalchemy import func, desc
+from sqlalchemy.orm import joinedload
 
 from flask_login import login_user, login_required,current_user
 
-import cloudinary.uploader 
+from . import siteconfig, newsletter, uploads, scheduler, metrics, keyset, stats
+from .mailer import queue_email
+from .statuscounts import status_counts
+from .csvexport import export_filters, stream_csv, YIELD_PER
 
-from .model import Event,NewsletterSubscriber,UserRole,User,PartnerApplication,Donation,Story,Campaign,SiteConfig,MentorshipApplication,VolunteerApplication,ApplicationStatus
+from .model import listing_options,Event,NewsletterSubscriber,UserRole,User,PartnerApplication,Donation,Story,Campaign,MentorshipApplication,VolunteerApplication,ApplicationStatus
 
 
 admin_route = Blueprint('admin', __name__)
@@ -124,6 +125,7 @@ def adminsignin():
 
 
 @admin_route.route('/admin/dashboard')
+@query_counter.budget(8)
 @login_required
 def dashboard():
     # --- 1. SECURITY CHECK (Priority #1) ---
@@ -133,33 +135,32 @@ def dashboard():
         return redirect(url_for('admin.adminsignin'))
 
     # --- 2. GATHER STATISTICS ---
-    total_users_count = User.query.count()
+    # Totals come from the daily_stats rollup + today's rows (see stats.py), not a full-table COUNT/SUM
+    totals = stats.totals()
+    currency = current_app.config.get('STATS_DEFAULT_CURRENCY', 'CAD')
+    total_users_count = totals['users']
     
     # Calculate start of today for daily users
     today_start = datetime.combine(date.today(), datetime.min.time())
     daily_users_count = User.query.filter(User.last_login >= today_start).count()
     
-    # Count pending partners (Case insensitive check)
-    pending_partners_count = PartnerApplication.query.filter(PartnerApplication.status.ilike('pending')).count()
+    # Count pending partners (cached GROUP BY status, see statuscounts.py)
+    pending_partners_count = status_counts('partners')['Pending']
     
-    # Total funds raised
-    total_funds = db.session.query(func.sum(Donation.amount)).filter(Donation.status == 'Success').scalar() or 0.0
+    # Total funds raised (headline currency; any others are listed next to it)
+    total_funds = totals['raised'].get(currency, 0.0)
+    other_funds = {c: amount for c, amount in totals['raised'].items() if c != currency}
 
     # --- 3. PAGINATION & VIEW ALL LOGIC ---
-    view_mode = request.args.get('view') 
-    page = request.args.get('page', 1, type=int)
-    per_page = 4 
-    
-    users_query = User.query.order_by(desc(User.created_at))
+    # Keyset pages (newest first). 'View all' is the same list with infinite
+    # scroll: the page loads USERS_SCROLL_BATCH rows, the rest come from
+    # dashboard_users as the admin scrolls - never the whole table at once.
+    view_mode = request.args.get('view')
+    per_page = USERS_SCROLL_BATCH if view_mode == 'all' else 4
 
-    if view_mode == 'all':
-        # Fetch everyone (No pagination)
-        users = users_query.all()
-        pagination = None 
-    else:
-        # Standard Pagination
-        pagination = users_query.paginate(page=page, per_page=per_page)
-        users = pagination.items
+    pagination = keyset.paginate(User.query, User, per_page=per_page,
+                                 after=request.args.get('after'), before=request.args.get('before'))
+    users = pagination.items
 
     # --- 4. RENDER TEMPLATE ---
     return render_template('admin/admindashboard.html',
@@ -167,53 +168,53 @@ def dashboard():
                            daily_users=daily_users_count,
                            pending_partners=pending_partners_count,
                            total_funds=total_funds,
+                           other_funds=other_funds,
+                           currency=currency,
                            pagination=pagination,
                            users=users,
                            view_mode=view_mode,
                            active_page='dashboard', # Keeps the sidebar highlighted
                            now=datetime.utcnow())
 
+
+USERS_SCROLL_BATCH = 50
+
+@admin_route.route('/admin/dashboard/users')
+@query_counter.budget(3)
+@login_required
+def dashboard_users():
+    # Next batch of rows for the dashboard's 'View all' infinite scroll
+    if current_user.role not in [UserRole.ADMIN, UserRole.MODERATOR]:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    page = keyset.paginate(User.query, User, per_page=USERS_SCROLL_BATCH, after=request.args.get('after'))
+    return jsonify({
+        'html': render_template('admin/_user_rows.html', users=page.items, now=datetime.utcnow()),
+        'next_url': url_for('admin.dashboard_users', after=page.next_cursor) if page.has_next else None,
+    })
+
  
 
 @admin_route.route('/manage-stories', methods=['GET', 'POST'])
+@query_counter.budget(8)
 @login_required
 def manage_stories():
 
-    # PART 0: THE "LAZY CRON" (Auto-Publish Check)
-    # =========================================================
-    # 1. Get current time (UTC)
-    now = datetime.utcnow()
-    
-    # 2. Find stories that are 'Scheduled' BUT their time has passed
-    overdue_stories = Story.query.filter(
-        Story.status == 'Scheduled', 
-        Story.scheduled_for <= now
-    ).all()
-
-    # 3. Flip them to 'Published' automatically
-    if overdue_stories:
-        count = 0
-        for story in overdue_stories:
-            story.status = 'Published'
-            count += 1
-        
-        db.session.commit()
-        flash(f'{count} scheduled stor(ies) just went live!', 'success')
-
     if request.method == 'POST':
         try:
             story_id = request.form.get('story_id')
             # --- 1. HANDLE IMAGE UPLOAD ---
-            image_url = request.form.get('existing_image_url') # Keep old image by default
+            # Keep old image by default ('direct' mode: the browser already
+            # uploaded to Cloudinary and put the new URL in this field)
+            image_url = request.form.get('existing_image_url')
             
-            # Check if a NEW file was uploaded
+            # Check if a NEW file was uploaded -> spooled to disk, the
+            # upload worker sends it to Cloudinary in the background
+            image_file = None
             if 'image_file' in request.files:
                 file = request.files['image_file']
                 if file.filename != '':
-                    # Upload to Cloudinary
-                    upload_result = cloudinary.uploader.upload(file)
-                    # Get the secure URL (https://...)
-                    image_url = upload_result['secure_url']
+                    image_file = file
 
             # --- 2. HANDLE STATUS & SCHEDULING ---
             status = request.form.get('status')
@@ -254,8 +255,18 @@ def manage_stories():
                     author_id=current_user.id
                 )
                 db.session.add(new_story)
+                story = new_story
                 flash('Story created successfully!', 'success')
 
+            db.session.flush() # Need story.id for the jobs below
+
+            # Publishing at scheduled_for is done by 'flask scheduler'
+            scheduler.schedule_story(story)
+
+            if image_file:
+                uploads.spool_image(image_file, 'story', story)
+                flash('The new image is uploading and will appear shortly.', 'info')
+
             db.session.commit()
             return redirect(url_for('admin.manage_stories'))
 
@@ -269,13 +280,12 @@ def manage_stories():
     # PART 2: FETCH DATA FOR DISPLAY (The Table & Filters)
     # =========================================================
     
-    # 1. Get Filters from URL (e.g., ?status=Published&page=2)
+    # 1. Get Filters from URL (e.g., ?status=Published&after=<cursor>)
     status_filter = request.args.get('status', 'All')
     author_filter = request.args.get('author_id', type=int)
-    page = request.args.get('page', 1, type=int)
     
-    # 2. Start the Query
-    query = Story.query
+    # 2. Start the Query (author is shown on every row)
+    query = Story.query.options(*listing_options(joinedload(Story.author)))
 
     # 3. Apply Filters
     if status_filter != 'All':
@@ -284,20 +294,22 @@ def manage_stories():
     if author_filter:
         query = query.filter(Story.author_id == author_filter)
 
-    # 4. Get Counts for the Tabs (All, Published, Drafts...)
+    # 4. Get Counts for the Tabs (All, Published, Drafts...) - one cached GROUP BY status
+    by_status = status_counts('stories')
     counts = {
-        'All': Story.query.count(),
-        'Published': Story.query.filter_by(status='Published').count(),
-        'Draft': Story.query.filter_by(status='Draft').count(), # Changed key to 'Draft' to match DB value for simplicity, or keep 'Drafts' key and fix query.
-        'Scheduled': Story.query.filter_by(status='Scheduled').count()
+        'All': by_status.total,
+        'Published': by_status['Published'],
+        'Draft': by_status['Draft'], # Key matches the DB value
+        'Scheduled': by_status['Scheduled']
     }
 
-    # 5. Get Authors for the Dropdown
-    authors = User.query.all()
+    # 5. Get Authors for the Dropdown (only people who wrote something, not every user)
+    authors = User.query.filter(User.id.in_(db.session.query(Story.author_id))).all()
 
     # 6. Pagination (Show 9 stories per page)
-    # Order by 'updated_at' descending (newest edits first)
-    pagination = query.order_by(desc(Story.updated_at)).paginate(page=page, per_page=9)
+    # Keyset pages, newest stories first: (created_at, id) is indexed, updated_at isn't
+    pagination = keyset.paginate(query, Story, per_page=9,
+                                 after=request.args.get('after'), before=request.args.get('before'))
     stories = pagination.items
 
     return render_template('admin/adminmanagestories.html', 
@@ -306,12 +318,14 @@ def manage_stories():
                            counts=counts,
                            current_status=status_filter,
                            current_author=author_filter,
-                           authors=authors,active_page='stories')
+                           authors=authors,active_page='stories',
+                           image_upload_mode=current_app.config.get('IMAGE_UPLOAD_MODE', 'spool'))
 
 @admin_route.route('/story/delete/<int:story_id>', methods=['POST'])
 @login_required
 def delete_story(story_id):
     story = Story.query.get_or_404(story_id)
+    scheduler.cancel(f'publish_story:{story.id}')
     db.session.delete(story)
     db.session.commit()
     flash('Story deleted.', 'success')
@@ -323,27 +337,20 @@ def delete_story(story_id):
 def publish_story(story_id):
     story = Story.query.get_or_404(story_id)
     story.status = 'Published'
+    scheduler.schedule_story(story)  # Drops its pending publish job
     db.session.commit()
     flash('Story is now live!', 'success')
     return redirect(url_for('admin.manage_stories'))
 
 # Example logic for sending (Do not put this in a public route!)
 def send_mass_newsletter(subject, body_html):
-    # 1. Get all ACTIVE subscribers
-    subscribers = NewsletterSubscriber.query.filter_by(is_active=True).all()
-    
-    # 2. Extract emails
-    # note: Flask-Mail usually sends to one at a time or BCC. 
-    # For mass email, using BCC is safer to hide user emails from each other.
-    recipient_list = [sub.email for sub in subscribers]
-
-    msg = Message(subject,
-                  sender="info@ourstoryourvoice.org",
-                  bcc=recipient_list) # Use BCC!
-    msg.html = body_html
-    mail.send(msg)
+    # Records the blast; 'flask newsletter send <id>' delivers it in
+    # rate-limited batches, one personalised message per subscriber.
+    # Use '{email}' in body_html to insert the recipient's address.
+    return newsletter.create_send(subject, body_html)
 
 @admin_route.route('/manage-events', methods=['GET', 'POST'])
+@query_counter.budget(4)
 @login_required
 def manage_events():
     if request.method == 'POST':
@@ -351,12 +358,13 @@ def manage_events():
             event_id = request.form.get('event_id')
             
             # 1. Image Logic (Safe handling)
+            # New files are spooled and uploaded by the upload worker
             image_url = request.form.get('existing_image_url')
+            image_file = None
             if 'image_file' in request.files:
                 file = request.files['image_file']
                 if file.filename != '':
-                    upload = cloudinary.uploader.upload(file)
-                    image_url = upload['secure_url']
+                    image_file = file
             
             # 2. Date Logic (Fix: Don't wipe date if hidden field is empty on edit)
             utc_str = request.form.get('utc_date_time')
@@ -397,8 +405,14 @@ def manage_events():
                     image_url=image_url
                 )
                 db.session.add(new_event)
+                event = new_event
                 flash('Event created successfully!', 'success')
 
+            if image_file:
+                db.session.flush() # Need event.id for the upload job
+                uploads.spool_image(image_file, 'event', event)
+                flash('The new image is uploading and will appear shortly.', 'info')
+
             db.session.commit()
             return redirect(url_for('admin.manage_events'))
 
@@ -410,8 +424,36 @@ def manage_events():
             return redirect(url_for('admin.manage_events'))
 
     # GET REQUEST
-    events = Event.query.order_by(Event.date_time.desc()).all()
-    return render_template('admin/adminevent.html', events=events,active_page='events')
+    events = Event.query.options(*listing_options()).order_by(Event.date_time.desc()).all() # event.rsvp_count, no RSVP rows
+    return render_template('admin/adminevent.html', events=events,active_page='events',
+                           image_upload_mode=current_app.config.get('IMAGE_UPLOAD_MODE', 'spool'))
+
+# --- PROMETHEUS SCRAPE ENDPOINT (see metrics.py) ---
+@admin_route.route('/admin/metrics')
+def prometheus_metrics():
+    # Prometheus sends 'Authorization: Bearer <METRICS_TOKEN>' (bearer_token in the scrape config);
+    # anyone else must be a logged-in ADMIN. METRICS_ALLOW_LOCALHOST only makes sense when nothing
+    # proxies to the app on this host - behind nginx every request comes from 127.0.0.1.
+    token = current_app.config.get('METRICS_TOKEN')
+    sent = request.headers.get('Authorization', '')
+    scraper = bool(token) and hmac.compare_digest(sent.encode(), f'Bearer {token}'.encode())
+    local = current_app.config.get('METRICS_ALLOW_LOCALHOST', False) and request.remote_addr in ('127.0.0.1', '::1')
+    if not (scraper or local):
+        if not current_user.is_authenticated or current_user.role != UserRole.ADMIN:
+            return Response('Forbidden\n', status=403, mimetype='text/plain')
+
+    body, content_type = metrics.render()
+    return Response(body, mimetype=content_type.split(';')[0], content_type=content_type)
+
+# --- SIGNED DIRECT UPLOAD (IMAGE_UPLOAD_MODE = 'direct') ---
+@admin_route.route('/admin/uploads/signature', methods=['POST'])
+@login_required
+def upload_signature():
+    # The browser uses this to upload straight to Cloudinary - staff only,
+    # a signature lets anyone holding it write into the org's account
+    if current_user.role not in [UserRole.ADMIN, UserRole.MODERATOR]:
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(uploads.signed_upload_params())
 
 # --- DELETE ROUTE ---
 @admin_route.route('/event/delete/<int:event_id>', methods=['POST'])
@@ -424,18 +466,16 @@ def delete_event(event_id):
     return redirect(url_for('admin.manage_events'))
 
 @admin_route.route('/admin/fundraising')
+@query_counter.budget(6)
 @login_required
 def fundraising():
-    # --- 1. KEY METRICS (Existing Logic) ---
-    total_raised = db.session.query(func.sum(Donation.amount))\
-        .filter(Donation.status == 'Success').scalar() or 0.0
-
-    monthly_recurring = db.session.query(func.sum(Donation.amount))\
-        .filter(Donation.status == 'Success', Donation.frequency == 'monthly').scalar() or 0.0
-
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    avg_donation = db.session.query(func.avg(Donation.amount))\
-        .filter(Donation.status == 'Success', Donation.created_at >= thirty_days_ago).scalar() or 0.0
+    # --- 1. KEY METRICS (daily_stats rollup + today's donations, see stats.py) ---
+    totals = stats.totals()
+    currency = current_app.config.get('STATS_DEFAULT_CURRENCY', 'CAD')
+    total_raised = totals['raised'].get(currency, 0.0)
+    other_raised = {c: amount for c, amount in totals['raised'].items() if c != currency}
+    monthly_recurring = totals['monthly'].get(currency, 0.0)
+    avg_donation = totals['avg_30d'].get(currency, 0.0)
 
     # --- 2. ACTIVE CAMPAIGNS (NEW DYNAMIC LOGIC) ---
     # Fetch all campaigns where is_active is True
@@ -443,11 +483,14 @@ def fundraising():
 
     # --- 3. RECENT TRANSACTIONS (Existing Logic) ---
     recent_donations = Donation.query.filter_by(status='Success')\
+        .options(*listing_options(joinedload(Donation.donor)))\
         .order_by(Donation.created_at.desc())\
         .limit(3).all()
 
     return render_template('admin/adminfundraising.html', 
                            total_raised=total_raised,
+                           other_raised=other_raised,
+                           currency=currency,
                            monthly_recurring=monthly_recurring,active_page='fundraising',
                            avg_donation=avg_donation,
                            recent_donations=recent_donations,
@@ -455,6 +498,7 @@ def fundraising():
 
 # --- CSV EXPORT ROUTE ---
 @admin_route.route('/admin/fundraising/export_csv')
+@query_counter.budget(3)
 @login_required
 def export_donations_csv():
     # Fetch ALL successful donations
@@ -501,37 +545,39 @@ def export_donations_csv():
     response.headers.set('Content-Disposition', 'attachment', filename='osov_donations_report.csv')
     return response
 @admin_route.route('/admin/approvals')
+@query_counter.budget(14)
 @login_required
 def approvals():
-    # --- 1. STATISTICS ---
+    # --- 1. STATISTICS (one cached GROUP BY status per table, see statuscounts.py) ---
+    partners, volunteers = status_counts('partners'), status_counts('volunteers')
     stats = {
-        'partners_applied': PartnerApplication.query.count(),
-        'partners_approved': PartnerApplication.query.filter_by(status='Approved').count(),
-        'partners_rejected': PartnerApplication.query.filter_by(status='Rejected').count(),
-        'volunteers_applied': VolunteerApplication.query.count(),
-        'volunteers_approved': VolunteerApplication.query.filter_by(status=ApplicationStatus.APPROVED).count(),
-        'mentorship_count': MentorshipApplication.query.count(),
+        'partners_applied': partners.total,
+        'partners_approved': partners['Approved'],
+        'partners_rejected': partners['Rejected'],
+        'volunteers_applied': volunteers.total,
+        'volunteers_approved': volunteers[ApplicationStatus.APPROVED],
+        'mentorship_count': status_counts('mentorships').total,
     }
 
     # --- 2. PENDING TABLES ---
-    page = request.args.get('page', 1, type=int)
-    partners_pagination = PartnerApplication.query.filter_by(status='Pending')\
-        .order_by(PartnerApplication.created_at.desc())\
-        .paginate(page=page, per_page=5)
+    # Keyset pages (newest first): ?after=/?before= for partners, ?v_after=/?v_before= for volunteers
+    with_user = lambda model: model.query.options(*listing_options(joinedload(model.user))) # Name/email on every row
+    partners_pagination = keyset.paginate(
+        with_user(PartnerApplication).filter_by(status='Pending'), PartnerApplication, per_page=5,
+        after=request.args.get('after'), before=request.args.get('before'))
 
-    v_page = request.args.get('v_page', 1, type=int)
-    volunteers_pagination = VolunteerApplication.query.filter_by(status=ApplicationStatus.PENDING)\
-        .order_by(VolunteerApplication.created_at.desc())\
-        .paginate(page=v_page, per_page=5)
+    volunteers_pagination = keyset.paginate(
+        with_user(VolunteerApplication).filter_by(status=ApplicationStatus.PENDING), VolunteerApplication, per_page=5,
+        after=request.args.get('v_after'), before=request.args.get('v_before'))
 
     # --- 3. ACTIVE PARTNERS (For Deletion/Management) ---
     # We fetch all currently approved partners so you can end their contracts
-    active_partners = PartnerApplication.query.filter_by(status='Approved')\
+    active_partners = with_user(PartnerApplication).filter_by(status='Approved')\
         .order_by(PartnerApplication.created_at.desc()).all()
 
     # --- 4. RECENT LISTS ---
-    recent_mentors = MentorshipApplication.query.order_by(MentorshipApplication.created_at.desc()).limit(5).all()
-    recent_approved = PartnerApplication.query.filter_by(status='Approved').order_by(PartnerApplication.created_at.desc()).limit(5).all()
+    recent_mentors = with_user(MentorshipApplication).order_by(MentorshipApplication.created_at.desc()).limit(5).all()
+    recent_approved = with_user(PartnerApplication).filter_by(status='Approved').order_by(PartnerApplication.created_at.desc()).limit(5).all()
 
     return render_template('admin/admin_approvals.html',
                            active_page='approvals',
@@ -545,12 +591,7 @@ def approvals():
 
 def send_approval_email(user_email, user_name, role_type):
     try:
-        msg = Message(
-            subject=f"Application Approved: {role_type}",
-            sender=current_app.config['MAIL_USERNAME'],
-            recipients=[user_email]
-        )
-        msg.html = f"""
+        approval_html = f"""
         <div style="font-family: Arial, sans-serif; padding: 20px; border: 1px solid #eee;">
             <h2 style="color: #166534;">Congratulations, {user_name}!</h2>
             <p>We are thrilled to inform you that your application for <strong>{role_type}</strong> with <em>Our Story Our Voice</em> has been <strong>APPROVED</strong>.</p>
@@ -559,7 +600,13 @@ def send_approval_email(user_email, user_name, role_type):
             <p>Welcome to the community!</p>
         </div>
         """
-        mail.send(msg)
+        # Queued: the email worker sends it in the background
+        queue_email(
+            subject=f"Application Approved: {role_type}",
+            sender=current_app.config['MAIL_USERNAME'],
+            recipients=[user_email],
+            html=approval_html
+        )
     except Exception as e:
         print(f"Email Error: {e}")
 
@@ -580,7 +627,7 @@ def process_volunteer(id, action):
         flash(f'Rejected volunteer: {application.user.first_name}', 'warning')
     
     db.session.commit()
-    return redirect(url_for('admin_route.approvals'))
+    return redirect(url_for('admin.approvals'))
 
 # --- PROCESS PARTNER ---
 @admin_route.route('/admin/partner/<int:id>/<action>')
@@ -599,7 +646,7 @@ def process_partner(id, action):
         flash(f'Rejected partnership with {application.org_name}', 'warning')
     
     db.session.commit()
-    return redirect(url_for('admin_route.approvals'))
+    return redirect(url_for('admin.approvals'))
 
 # --- NEW: END PARTNER CONTRACT (Soft Delete) ---
 @admin_route.route('/admin/partner/<int:id>/end_contract')
@@ -612,95 +659,89 @@ def end_partner_contract(id):
     db.session.commit()
     
     flash(f'Contract ended for {application.org_name}. Moved to archives.', 'info')
-    return redirect(url_for('admin_route.approvals'))
+    return redirect(url_for('admin.approvals'))
 
-def generate_csv_response(headers, rows, filename):
-    # 1. Create an in-memory string buffer
-    si = io.StringIO()
-    cw = csv.writer(si)
-    
-    # 2. Write the header row
-    cw.writerow(headers)
-    
-    # 3. Write the data rows
-    cw.writerows(rows)
-    
-    # 4. Create the response object
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = f"attachment; filename={filename}.csv"
-    output.headers["Content-type"] = "text/csv"
-    return output
+# --- APPLICATION EXPORTS ---
+# Streamed from a server-side cursor with the applicant's user joined in, and
+# filterable by ?status= / ?from= / ?to=, optionally ?gzip=1 (see csvexport.py)
+def _applied(created_at):
+    return created_at.strftime('%Y-%m-%d') if created_at else ''
 
 
 @admin_route.route('/admin/export/partners')
+@query_counter.budget(3)
 @login_required
 def export_partners():
-    partners = PartnerApplication.query.all()
+    query = export_filters(db.session.query(
+        PartnerApplication.id, PartnerApplication.org_name, User.first_name, User.last_name, User.email,
+        PartnerApplication.partnership_type, PartnerApplication.website, PartnerApplication.status,
+        PartnerApplication.created_at,
+    ).join(User, PartnerApplication.user_id == User.id), PartnerApplication)
     
     headers = ['ID', 'Organization', 'Representative', 'Email', 'Type', 'Website', 'Status', 'Date Applied']
-    rows = []
-    
-    for p in partners:
-        rows.append([
-            p.id,
-            p.org_name,
-            f"{p.user.first_name} {p.user.last_name}",
-            p.user.email,
-            p.partnership_type,
-            p.website or 'N/A',
-            p.status,
-            p.created_at.strftime('%Y-%m-%d')
-        ])
+    rows = ((
+        p.id,
+        p.org_name,
+        f"{p.first_name} {p.last_name}",
+        p.email,
+        p.partnership_type,
+        p.website or 'N/A',
+        p.status,
+        _applied(p.created_at)
+    ) for p in query.yield_per(YIELD_PER))
         
-    return generate_csv_response(headers, rows, "osov_partners_export")
+    return stream_csv(headers, rows, "osov_partners_export")
 
 @admin_route.route('/admin/export/volunteers')
+@query_counter.budget(3)
 @login_required
 def export_volunteers():
-    volunteers = VolunteerApplication.query.all()
+    query = export_filters(db.session.query(
+        VolunteerApplication.id, User.first_name, User.last_name, User.email, VolunteerApplication.phone,
+        VolunteerApplication.country, VolunteerApplication.is_under_18, VolunteerApplication.motivation,
+        VolunteerApplication.status, VolunteerApplication.created_at,
+    ).join(User, VolunteerApplication.user_id == User.id), VolunteerApplication)
     
     headers = ['ID', 'Name', 'Email', 'Phone', 'Country', 'Age Group', 'Motivation', 'Status', 'Date Applied']
-    rows = []
-    
-    for v in volunteers:
-        is_minor = "Under 18" if v.is_under_18 else "Adult"
-        rows.append([
-            v.id,
-            f"{v.user.first_name} {v.user.last_name}",
-            v.user.email,
-            v.phone or 'N/A',
-            v.country,
-            is_minor,
-            v.motivation,
-            v.status.value, # Enum value
-            v.created_at.strftime('%Y-%m-%d')
-        ])
+    rows = ((
+        v.id,
+        f"{v.first_name} {v.last_name}",
+        v.email,
+        v.phone or 'N/A',
+        v.country,
+        "Under 18" if v.is_under_18 else "Adult",
+        v.motivation,
+        v.status.value if v.status else '', # Enum value
+        _applied(v.created_at)
+    ) for v in query.yield_per(YIELD_PER))
         
-    return generate_csv_response(headers, rows, "osov_volunteers_export")
+    return stream_csv(headers, rows, "osov_volunteers_export")
 
 @admin_route.route('/admin/export/mentorships')
+@query_counter.budget(3)
 @login_required
 def export_mentorships():
-    mentors = MentorshipApplication.query.all()
+    query = export_filters(db.session.query(
+        MentorshipApplication.id, User.first_name, User.last_name, User.email, MentorshipApplication.program_track,
+        MentorshipApplication.child_first_name, MentorshipApplication.child_last_name,
+        MentorshipApplication.school_name, MentorshipApplication.vocational_interest,
+        MentorshipApplication.status, MentorshipApplication.created_at,
+    ).join(User, MentorshipApplication.user_id == User.id), MentorshipApplication)
     
     headers = ['ID', 'Applicant Name', 'Email', 'Program Track', 'Mentee Name', 'School', 'Interest', 'Status', 'Date Applied']
-    rows = []
-    
-    for m in mentors:
-        mentee_name = f"{m.child_first_name} {m.child_last_name}" if m.child_first_name else "N/A"
-        rows.append([
-            m.id,
-            f"{m.user.first_name} {m.user.last_name}",
-            m.user.email,
-            m.program_track,
-            mentee_name,
-            m.school_name or 'N/A',
-            m.vocational_interest or 'N/A',
-            m.status,
-            m.created_at.strftime('%Y-%m-%d')
-        ])
+    rows = ((
+        m.id,
+        f"{m.first_name} {m.last_name}",
+        m.email,
+        m.program_track,
+        f"{m.child_first_name} {m.child_last_name}" if m.child_first_name else "N/A",
+        m.school_name or 'N/A',
+        m.vocational_interest or 'N/A',
+        m.status,
+        _applied(m.created_at)
+    ) for m in query.yield_per(YIELD_PER))
         
-    return generate_csv_response(headers, rows, "osov_mentorships_export")
+    return stream_csv(headers, rows, "osov_mentorships_export")
 
 @admin_route.route('/admin/campaigns', methods=['GET', 'POST'])
 @login_required
@@ -794,33 +835,25 @@ def settings():
 
         # C. TOGGLE MAINTENANCE (Admin Only)
         elif action == 'toggle_maintenance' and current_user.role == UserRole.ADMIN:
-            mode = 'true' if 'maintenance_mode' in request.form else 'false'
-            
-            config = SiteConfig.query.filter_by(key='maintenance_mode').first()
-            if not config:
-                config = SiteConfig(key='maintenance_mode', value=mode)
-                db.session.add(config)
-            else:
-                config.value = mode
+            mode = 'maintenance_mode' in request.form
             
-            db.session.commit()
-            status = "ON" if mode == 'true' else "OFF"
+            # Writes the row and bumps the config version for all workers
+            siteconfig.set_value('maintenance_mode', mode)
+            status = "ON" if mode else "OFF"
             flash(f'Maintenance Mode is now {status}.', 'warning')
 
         # D. UPDATE SUPPORT EMAIL (New Code)
         elif action == 'update_support_email' and current_user.role == UserRole.ADMIN:
             new_email = request.form.get('support_email')
             
-            config = SiteConfig.query.filter_by(key='support_email').first()
-            if not config:
-                config = SiteConfig(key='support_email', value=new_email)
-                db.session.add(config)
-            else:
-                config.value = new_email
-            
-            db.session.commit()
+            siteconfig.set_value('support_email', new_email)
             flash('Public contact email updated.', 'success')
 
+        # D2. CLEAR PAGE CACHE
+        elif action == 'clear_page_cache' and current_user.role == UserRole.ADMIN:
+            page_cache.clear()
+            flash('Page cache cleared.', 'success')
+
         # E. INVITE MEMBER (New Functional Code)
         elif action == 'invite_member' and current_user.role == UserRole.ADMIN:
             email_to_invite = request.form.get('invite_email')
@@ -852,13 +885,14 @@ def settings():
     # Team: Get Admins and Moderators
     team_members = User.query.filter(User.role.in_([UserRole.ADMIN, UserRole.MODERATOR])).all()
     
-    # Maintenance Status
-    m_config = SiteConfig.query.filter_by(key='maintenance_mode').first()
-    is_maintenance = m_config.value == 'true' if m_config else False
+    # Site Config (one typed snapshot instead of a query per key)
+    site_settings = siteconfig.get_all()
+    is_maintenance = site_settings['maintenance_mode']
+    public_email = site_settings['support_email']
 
-    # Support Email Status (New Code)
-    s_config = SiteConfig.query.filter_by(key='support_email').first()
-    public_email = s_config.value if s_config else "info@ourstoryourvoice.org"
+    # Config cache counters (this worker only)
+    config_cache_stats = siteconfig.cache_stats()
+    page_cache_stats = page_cache.cache_stats()
 
     # Device Info
     ua = request.user_agent
@@ -872,15 +906,11 @@ def settings():
                            team_members=team_members,active_page='settings',
                            is_maintenance=is_maintenance,
                            public_email=public_email, # Pass this new variable
+                           config_cache_stats=config_cache_stats,
+                           page_cache_stats=page_cache_stats,
                            device_info=device_info)
 
 def send_moderator_email(to_email, first_name):
-    # EMAIL CONFIGURATION (Replace with your actual details)
-    SMTP_SERVER = "smtp.gmail.com" # or "smtp.sendgrid.net"
-    SMTP_PORT = 587
-    SENDER_EMAIL = "admin@ourstoryourvoice.ca" 
-    SENDER_PASSWORD = "your_app_password_here" # Use an App Password if using Gmail
-
     subject = "You've been promoted to Moderator at OSOV"
     body = f"""
     Hello {first_name},
@@ -894,18 +924,16 @@ def send_moderator_email(to_email, first_name):
     - OSOV Admin
     """
 
-    msg = MIMEMultipart()
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = to_email
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
+    # Goes through the pooled SMTP transport (MAIL_* config)
+    msg = Message(
+        subject=subject,
+        sender=current_app.config.get('MAIL_DEFAULT_SENDER'),
+        recipients=[to_email]
+    )
+    msg.body = body
 
     try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.send_message(msg)
-        server.quit()
+        mail.send(msg)
     except Exception as e:
         print(f"Email failed: {e}") # Log error to console
 
@@ -0,0 +1,640 @@
+# project/assets.py
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import subprocess
+import time
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+from markupsafe import Markup, escape
+from werkzeug.security import safe_join
+
+try:
+    import brotli  # Optional: without it only .gz siblings are built
+except ImportError:
+    brotli = None
+
+
+# --- STATIC IMAGE PIPELINE ---
+# 'flask assets build' turns the heavy files in /static into:
+#   - resized WebP + AVIF variants at ASSET_WIDTHS  (static/build/<name>-<w>.<fmt>)
+#   - minified SVGs                                 (static/build/<name>.min.svg)
+#   - static/build/manifest.json describing all of it
+# Templates call {{ picture('ourteam.JPG', alt='...') }} which reads the
+# manifest and emits <picture>/srcset markup (or a plain <img> if the build
+# hasn't been run).
+#
+# Every url_for('static', ...) is rewritten to a content-hashed name
+# (logo.3f2a1b9c0d.svg) served with a one-year immutable Cache-Control, and
+# text assets get pre-built .br/.gz siblings served when the client accepts them.
+#
+# Tailwind is compiled ahead of time ('flask assets css') from tailwind.config.js
+# into one purged stylesheet; templates link it with {{ tailwind_css() }}.
+# Font Awesome is subset the same way ('flask assets icons'): only the icons
+# the templates use, linked with {{ font_awesome_css() }}.
+
+assets_cli = AppGroup('assets', help='Static asset build commands.')
+
+BUILD_DIR = 'build'
+MANIFEST = 'manifest.json'
+RASTER_EXTS = ('.png', '.jpg', '.jpeg')
+# Worth precompressing (images are already compressed)
+COMPRESSIBLE_EXTS = ('.svg', '.css', '.js', '.json', '.webmanifest', '.ico', '.txt', '.map')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # Preference order
+TAILWIND_OUTPUT = 'tailwind.css'
+TAILWIND_CDN = 'https://cdn.tailwindcss.com'
+FONTAWESOME_OUTPUT = 'fontawesome.css'
+FONTAWESOME_CDN = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css'
+# Style classes -> webfont that draws them
+FONTAWESOME_STYLES = {
+    'fa-solid-900': ('fa', 'fas', 'fa-solid'),
+    'fa-regular-400': ('far', 'fa-regular'),
+    'fa-brands-400': ('fab', 'fa-brands'),
+}
+# Browsers/PWA manifests need these exact files, so leave them alone
+SKIP_PREFIXES = ('favicon', 'android-chrome', 'apple-touch-icon')
+
+FORMATS = {
+    # format: (Pillow name, save options, mime type)
+    'avif': ('AVIF', {'quality': 55}, 'image/avif'),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}, 'image/webp'),
+}
+
+
+def _static_dir():
+    return current_app.static_folder
+
+
+def _build_dir():
+    return os.path.join(_static_dir(), BUILD_DIR)
+
+
+# --- 1. MANIFEST (read side, used by templates) ---
+_manifest_cache = {'mtime': None, 'data': {}}
+
+
+def load_manifest():
+    path = os.path.join(_build_dir(), MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+
+    if _manifest_cache['mtime'] != mtime:
+        with open(path) as f:
+            _manifest_cache['data'] = json.load(f)
+        _manifest_cache['mtime'] = mtime
+    return _manifest_cache['data']
+
+
+def picture(filename, alt='', sizes='100vw', css='', lazy=True):
+    """<picture> markup for a static image, using built variants if present."""
+    entry = load_manifest().get(filename)
+    loading = ' loading="lazy" decoding="async"' if lazy else ''
+    css_attr = f' class="{escape(css)}"' if css else ''
+
+    # SVG: just point at the minified copy
+    if entry and entry.get('type') == 'svg':
+        src = url_for('static', filename=entry['file'])
+        return Markup(f'<img src="{src}" alt="{escape(alt)}"{css_attr}{loading}>')
+
+    src = url_for('static', filename=filename)
+    if not entry:
+        return Markup(f'<img src="{src}" alt="{escape(alt)}"{css_attr}{loading}>')
+
+    sources = []
+    for fmt in FORMATS:  # AVIF first: the browser takes the first it supports
+        variants = entry['variants'].get(fmt)
+        if not variants:
+            continue
+        srcset = ', '.join(f"{url_for('static', filename=v['file'])} {v['w']}w" for v in variants)
+        sources.append(f'<source type="{FORMATS[fmt][2]}" srcset="{srcset}" sizes="{escape(sizes)}">')
+
+    img = (f'<img src="{src}" alt="{escape(alt)}" width="{entry["width"]}" height="{entry["height"]}"'
+           f'{css_attr}{loading}>')
+    return Markup('<picture>' + ''.join(sources) + img + '</picture>')
+
+
+def tailwind_css():
+    """Stylesheet tag for the compiled Tailwind CSS."""
+    if os.path.isfile(os.path.join(_build_dir(), TAILWIND_OUTPUT)):
+        href = url_for('static', filename=f'{BUILD_DIR}/{TAILWIND_OUTPUT}')
+        return Markup(f'<link rel="stylesheet" href="{href}">')
+    # Fresh checkout without a build: keep pages styled via the in-browser compiler
+    return Markup(f'<script src="{TAILWIND_CDN}"></script>')
+
+
+def font_awesome_css():
+    """Stylesheet tag for the subset Font Awesome build."""
+    if os.path.isfile(os.path.join(_build_dir(), FONTAWESOME_OUTPUT)):
+        href = url_for('static', filename=f'{BUILD_DIR}/{FONTAWESOME_OUTPUT}')
+        return Markup(f'<link rel="stylesheet" href="{href}">')
+    return Markup(f'<link rel="stylesheet" href="{FONTAWESOME_CDN}">')
+
+
+# --- 2. BUILD ---
+def _tailwind_cli():
+    """Command that runs the Tailwind CLI (npm install, or the standalone binary)."""
+    configured = current_app.config.get('TAILWIND_CLI')
+    if configured:
+        return configured.split()
+
+    project_root = os.path.dirname(current_app.root_path)
+    local = os.path.join(project_root, 'node_modules', '.bin', 'tailwindcss')
+    if os.path.isfile(local):
+        return [local]
+    if shutil.which('tailwindcss'):
+        return ['tailwindcss']
+    raise click.ClickException(
+        'Tailwind CLI not found. Run `npm install` in the project root, '
+        'or put the standalone tailwindcss binary on PATH (or set TAILWIND_CLI).'
+    )
+
+
+def build_css():
+    """Compiles + purges Tailwind against the templates. Runs fully offline."""
+    root = current_app.root_path
+    output = os.path.join(_build_dir(), TAILWIND_OUTPUT)
+    os.makedirs(_build_dir(), exist_ok=True)
+
+    subprocess.run(_tailwind_cli() + [
+        '-c', os.path.join(root, 'tailwind.config.js'),
+        '-i', os.path.join(root, 'tailwind.css'),
+        '-o', output,
+        '--minify',
+    ], check=True)
+    return os.path.getsize(output)
+
+
+def _css_blocks(css):
+    """Splits a stylesheet into top-level (prelude, body) pairs."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    blocks, depth, start, prelude = [], 0, 0, ''
+    for i, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude, start = css[start:i].strip(), i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:i].strip()))
+                start = i + 1
+    return blocks
+
+
+def _used_icon_classes():
+    """Every fa-* / fas / far / fab token in the templates and static JS."""
+    root = current_app.root_path
+    paths = [os.path.join(dirpath, name)
+             for dirpath, _dirs, names in os.walk(os.path.join(root, 'templates'))
+             for name in names if name.endswith('.html')]
+    paths += [os.path.join(_static_dir(), name) for name in os.listdir(_static_dir()) if name.endswith('.js')]
+
+    used = set()
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            used.update(re.findall(r'(?<![\w-])(fa[srb]?|fa-[a-z0-9-]+)(?![\w-])', f.read()))
+    return used
+
+
+ICON_SELECTOR = re.compile(r'^\.fa-([a-z0-9-]+)::?before$')
+ICON_CONTENT = re.compile(r'(?:content|--fa)\s*:\s*"\\([0-9a-f]+)"', re.I)
+
+
+def build_icons():
+    """
+    Subsets Font Awesome to the icons the templates use.
+    Source: the @fortawesome/fontawesome-free npm package (no network needed).
+    """
+    from fontTools import subset  # Build-time only dependency
+
+    source = current_app.config.get('FONTAWESOME_DIR') or os.path.join(
+        os.path.dirname(current_app.root_path), 'node_modules', '@fortawesome', 'fontawesome-free')
+    all_css = os.path.join(source, 'css', 'all.css')
+    if not os.path.isfile(all_css):
+        raise click.ClickException(f'Font Awesome not found at {source}. Run `npm install` (or set FONTAWESOME_DIR).')
+
+    used = _used_icon_classes()
+    fonts = {font for font, classes in FONTAWESOME_STYLES.items() if used.intersection(classes)}
+
+    with open(all_css, encoding='utf-8') as f:
+        blocks = _css_blocks(f.read())
+
+    # 1. Keep only the icon rules we use, and remember their codepoints
+    kept, codepoints = [], set()
+    for prelude, body in blocks:
+        selectors = [sel.strip() for sel in prelude.split(',')]
+        icons = [ICON_SELECTOR.match(sel) for sel in selectors]
+
+        if prelude == '@font-face':
+            match = re.search(r'url\(["\']?\.\./webfonts/([\w-]+)\.woff2', body)
+            if not match or match.group(1) not in fonts:
+                continue  # Unused style (or the v4 compatibility font)
+            kept.append((prelude, body, match.group(1)))
+
+        elif all(icons) and ICON_CONTENT.search(body):
+            selectors = [sel for sel, icon in zip(selectors, icons) if f'fa-{icon.group(1)}' in used]
+            if selectors:
+                codepoints.add(int(ICON_CONTENT.search(body).group(1), 16))
+                kept.append((', '.join(selectors), body, None))
+
+        else:
+            kept.append((prelude, body, None))
+
+    # 2. Subset each webfont to those codepoints (woff2 only: every supported browser has it)
+    out = []
+    for prelude, body, font in kept:
+        if font:
+            target = os.path.join(_build_dir(), f'{font}.woff2')
+            options = subset.Options()
+            options.flavor = 'woff2'
+            options.layout_features = ['*']
+            subsetter = subset.Subsetter(options)
+            ttfont = subset.load_font(os.path.join(source, 'webfonts', f'{font}.woff2'), options)
+            subsetter.populate(unicodes=codepoints)
+            subsetter.subset(ttfont)
+            subset.save_font(ttfont, target, options)
+
+            # Relative to the stylesheet, with the content hash so it's cached forever too
+            _fingerprints.pop(f'{BUILD_DIR}/{font}.woff2', None)
+            hashed = os.path.basename(hashed_filename(f'{BUILD_DIR}/{font}.woff2'))
+            body = re.sub(r'src\s*:[^;]+', f'src: url("{hashed}") format("woff2")', body)
+        out.append(f'{prelude}{{{body}}}')
+
+    css = re.sub(r'\s+', ' ', '\n'.join(out))
+    css = re.sub(r'\s*([{};:,])\s*', r'\1', css)
+    with open(os.path.join(_build_dir(), FONTAWESOME_OUTPUT), 'w', encoding='utf-8') as f:
+        f.write(css)
+
+    return len(codepoints), sorted(fonts)
+
+
+def minify_svg(text, precision=1):
+    """Cheap SVG minifier: drop comments, round numbers, collapse whitespace."""
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.S)
+    text = re.sub(r'\s(enable-background|xml:space)="[^"]*"', '', text)
+
+    def round_number(m):
+        value = round(float(m.group(0)), precision)
+        return ('%.*f' % (precision, value)).rstrip('0').rstrip('.') or '0'
+
+    text = re.sub(r'-?\d+\.\d+', round_number, text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'>\s+<', '><', text)
+    return text.strip()
+
+
+def _is_stale(target, source):
+    return not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(source)
+
+
+def build_assets(widths, force=False):
+    from PIL import Image  # Build-time only dependency
+
+    static_dir = _static_dir()
+    build_dir = _build_dir()
+    os.makedirs(build_dir, exist_ok=True)
+
+    manifest = {}
+    for filename in sorted(os.listdir(static_dir)):
+        source = os.path.join(static_dir, filename)
+        stem, ext = os.path.splitext(filename)
+        ext = ext.lower()
+
+        if not os.path.isfile(source) or filename.startswith(SKIP_PREFIXES):
+            continue
+
+        # A. SVG -> minified copy
+        if ext == '.svg':
+            out_name = f'{BUILD_DIR}/{stem}.min.svg'
+            out_path = os.path.join(static_dir, out_name)
+            if force or _is_stale(out_path, source):
+                with open(source, encoding='utf-8') as f:
+                    minified = minify_svg(f.read())
+                with open(out_path, 'w', encoding='utf-8') as f:
+                    f.write(minified)
+            manifest[filename] = {
+                'type': 'svg',
+                'bytes': os.path.getsize(source),
+                'file': out_name,
+                'file_bytes': os.path.getsize(out_path),
+            }
+            continue
+
+        if ext not in RASTER_EXTS:
+            continue
+
+        # B. Raster -> WebP/AVIF at each width (never upscale)
+        with Image.open(source) as img:
+            img.load()
+            width, height = img.size
+            has_alpha = img.mode in ('RGBA', 'LA') or 'transparency' in img.info
+            img = img.convert('RGBA' if has_alpha else 'RGB')
+
+            target_widths = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+
+            entry = {'type': 'raster', 'bytes': os.path.getsize(source),
+                     'width': width, 'height': height, 'variants': {}}
+
+            for fmt, (pil_format, options, _mime) in FORMATS.items():
+                entry['variants'][fmt] = []
+                for w in target_widths:
+                    out_name = f'{BUILD_DIR}/{stem}-{w}.{fmt}'
+                    out_path = os.path.join(static_dir, out_name)
+                    if force or _is_stale(out_path, source):
+                        h = round(height * w / width)
+                        resized = img if w == width else img.resize((w, h), Image.LANCZOS)
+                        resized.save(out_path, pil_format, **options)
+                    entry['variants'][fmt].append({'w': w, 'file': out_name, 'bytes': os.path.getsize(out_path)})
+
+        manifest[filename] = entry
+        click.echo(f'  {filename}: {len(target_widths)} width(s) x {len(FORMATS)} format(s)')
+
+    with open(os.path.join(build_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def compress_assets(force=False):
+    """Writes .gz (and .br) siblings next to every compressible static file."""
+    written = 0
+    for root, _dirs, files in os.walk(_static_dir()):
+        for filename in files:
+            if not filename.lower().endswith(COMPRESSIBLE_EXTS):
+                continue
+            source = os.path.join(root, filename)
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            for encoding, suffix in ENCODINGS:
+                if encoding == 'br' and brotli is None:
+                    continue
+                target = source + suffix
+                if not force and not _is_stale(target, source):
+                    continue
+                if encoding == 'br':
+                    packed = brotli.compress(data, quality=11)
+                else:
+                    packed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(packed) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(packed)
+                written += 1
+    return written
+
+
+# --- 3. REPORT: bytes saved per page ---
+STATIC_REF = re.compile(r"""(?:url_for\('static',\s*filename=|picture\(|/static/)['"]?([\w.\-]+\.(?:png|jpe?g|svg))""", re.I)
+INCLUDE_REF = re.compile(r"""{%\s*(?:include|extends)\s+['"]([^'"]+)['"]""")
+
+
+def _page_images(template_dir, name, seen=None):
+    seen = seen if seen is not None else set()
+    if name in seen:
+        return set()
+    seen.add(name)
+
+    try:
+        with open(os.path.join(template_dir, name), encoding='utf-8') as f:
+            text = f.read()
+    except OSError:
+        return set()
+
+    images = set(STATIC_REF.findall(text))
+    for child in INCLUDE_REF.findall(text):
+        images |= _page_images(template_dir, child, seen)
+    return images
+
+
+def _best_bytes(entry, display_width):
+    # What a modern browser downloads: smallest format at the width it needs
+    if entry['type'] == 'svg':
+        return entry['file_bytes']
+    best = entry['bytes']
+    for variants in entry['variants'].values():
+        fitting = [v for v in variants if v['w'] >= display_width] or variants[-1:]
+        best = min(best, fitting[0]['bytes'])
+    return best
+
+
+def page_report(manifest, display_width):
+    template_dir = os.path.join(current_app.root_path, current_app.template_folder)
+    rows = []
+    for folder in ('user',):
+        for filename in sorted(os.listdir(os.path.join(template_dir, folder))):
+            if not filename.endswith('.html'):
+                continue
+            images = [i for i in _page_images(template_dir, f'{folder}/{filename}') if i in manifest]
+            if not images:
+                continue
+            before = sum(manifest[i]['bytes'] for i in images)
+            after = sum(_best_bytes(manifest[i], display_width) for i in images)
+            rows.append((f'{folder}/{filename}', before, after))
+    return rows
+
+
+@assets_cli.command('build')
+@click.option('--force', is_flag=True, help='Rebuild every variant.')
+@click.option('--report-width', type=int, default=1280, help='Display width assumed for the savings report.')
+def build_command(force, report_width):
+    """Build CSS and image variants, minify SVGs and write the manifest."""
+    try:
+        click.echo(f'Compiled Tailwind CSS ({build_css() / 1024:.1f}K).')
+    except click.ClickException as e:
+        click.echo(f'Skipping CSS: {e.message}')
+    try:
+        count, fonts = build_icons()
+        click.echo(f'Subset Font Awesome to {count} icon(s) in {", ".join(fonts)}.')
+    except click.ClickException as e:
+        click.echo(f'Skipping icons: {e.message}')
+
+    widths = current_app.config.get('ASSET_WIDTHS', [320, 640, 1024, 1600])
+    click.echo(f'Building image variants at widths {widths}...')
+    manifest = build_assets(widths, force=force)
+    click.echo(f'Wrote {compress_assets(force=force)} precompressed file(s).'
+               + ('' if brotli else ' (install Brotli for .br files)'))
+
+    click.echo(f'\n{"Page":40} {"Before":>10} {"After":>10} {"Saved":>8}')
+    for page, before, after in page_report(manifest, report_width):
+        saved = (1 - after / before) * 100 if before else 0
+        click.echo(f'{page:40} {before / 1024:9.0f}K {after / 1024:9.0f}K {saved:7.1f}%')
+
+
+@assets_cli.command('css')
+def css_command():
+    """Compile the purged Tailwind stylesheet from the templates."""
+    click.echo(f'Compiled Tailwind CSS ({build_css() / 1024:.1f}K).')
+    compress_assets()
+
+
+@assets_cli.command('icons')
+def icons_command():
+    """Build the subset Font Awesome stylesheet and webfonts."""
+    count, fonts = build_icons()
+    build_dir = _build_dir()
+    total = sum(os.path.getsize(os.path.join(build_dir, name))
+                for name in [FONTAWESOME_OUTPUT] + [f'{font}.woff2' for font in fonts])
+    click.echo(f'Subset Font Awesome to {count} icon(s) in {", ".join(fonts)} ({total / 1024:.1f}K total).')
+    compress_assets()
+
+
+# --- 4. FINGERPRINTED URLS + SERVING ---
+HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{10})(?P<ext>\.[^./]+)$')
+_fingerprints = {}  # filename -> (mtime, digest)
+
+
+def fingerprint(filename):
+    """Short content hash of a static file (None if it doesn't exist)."""
+    cached = _fingerprints.get(filename)
+    if cached and not current_app.debug:
+        return cached[1]
+
+    path = safe_join(_static_dir(), filename)
+    try:
+        mtime = os.path.getmtime(path) if path else None
+    except OSError:
+        mtime = None
+    if mtime is None:
+        return None
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:10]
+    _fingerprints[filename] = (mtime, digest)
+    return digest
+
+
+def hashed_filename(filename):
+    digest = fingerprint(filename)
+    if not digest:
+        return filename
+    stem, ext = os.path.splitext(filename)
+    return f'{stem}.{digest}{ext}'
+
+
+def _static_url_defaults(endpoint, values):
+    # Runs inside url_for(): static URLs get the content hash baked in
+    if endpoint == 'static' and 'filename' in values and current_app.config.get('STATIC_FINGERPRINT', True):
+        values['filename'] = hashed_filename(values['filename'])
+
+
+def _send_precompressed(static_dir, filename):
+    source = safe_join(static_dir, filename)
+    if not source or not os.path.isfile(source):
+        return None
+
+    for encoding, suffix in ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        packed = source + suffix
+        if os.path.isfile(packed) and not _is_stale(packed, source):
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_from_directory(static_dir, filename + suffix, mimetype=mimetype, download_name=filename)
+            response.headers['Content-Encoding'] = encoding
+            return response
+    return None
+
+
+def serve_static(filename):
+    """Replacement for Flask's static view (hashed names + precompressed files)."""
+    static_dir = _static_dir()
+    immutable = False
+
+    match = HASHED_NAME.match(filename)
+    literal = safe_join(static_dir, filename)
+    if match and not (literal and os.path.isfile(literal)):
+        filename = match['stem'] + match['ext']
+        # An outdated hash still gets the current file, just not cached forever
+        immutable = match['digest'] == fingerprint(filename)
+
+    compressible = filename.lower().endswith(COMPRESSIBLE_EXTS)
+    response = (compressible and _send_precompressed(static_dir, filename)) or send_from_directory(static_dir, filename)
+    if compressible:
+        response.vary.add('Accept-Encoding')
+
+    if immutable:
+        max_age = current_app.config.get('STATIC_IMMUTABLE_MAX_AGE', 31536000)
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+        response.expires = int(time.time() + max_age)
+    return response
+
+
+# --- 5. BENCHMARK: repeat visit ---
+STATIC_URL = re.compile(r'(?:src|href)="(/static/[^"]+)"')
+
+
+def _visit(client, path, cache, headers):
+    """Loads a page plus its /static assets like a browser with an HTTP cache."""
+    page = client.get(path, headers=headers)
+    requests_made, transferred = 1, len(page.data)
+    now = time.time()
+
+    for url in dict.fromkeys(STATIC_URL.findall(page.get_data(as_text=True))):
+        entry = cache.get(url)
+        if entry and entry['fresh_until'] > now:
+            continue  # Served from the browser cache, no request at all
+
+        conditional = dict(headers)
+        if entry and entry['etag']:
+            conditional['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            conditional['If-Modified-Since'] = entry['last_modified']
+
+        response = client.get(url, headers=conditional)
+        requests_made += 1
+        transferred += len(response.data)
+        if response.status_code in (200, 304):
+            entry = entry if response.status_code == 304 else {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+            entry['fresh_until'] = now + (response.cache_control.max_age or 0)
+            cache[url] = entry
+        response.close()
+
+    return requests_made, transferred
+
+
+@assets_cli.command('bench')
+@click.option('--path', default='/', help='Page to load.')
+def bench_command(path):
+    """Compare bytes and requests for a repeat visit with and without fingerprinting."""
+    app = current_app._get_current_object()
+    original = app.config.get('STATIC_FINGERPRINT', True)
+    modes = [
+        ('Plain /static', False, {'Accept-Encoding': 'identity'}),
+        ('Fingerprinted + precompressed', True, {'Accept-Encoding': 'br, gzip'}),
+    ]
+
+    click.echo(f'{"Mode":32} {"First visit":>22} {"Repeat visit":>22}')
+    try:
+        for label, fingerprinted, headers in modes:
+            app.config['STATIC_FINGERPRINT'] = fingerprinted
+            client, cache = app.test_client(), {}
+            first = _visit(client, path, cache, headers)
+            repeat = _visit(client, path, cache, headers)
+            click.echo(f'{label:32} {first[0]:4} req {first[1] / 1024:10.1f}K '
+                       f'{repeat[0]:4} req {repeat[1] / 1024:10.1f}K')
+    finally:
+        app.config['STATIC_FINGERPRINT'] = original
+
+
+def init_app(app):
+    app.jinja_env.globals['picture'] = picture
+    app.jinja_env.globals['tailwind_css'] = tailwind_css
+    app.jinja_env.globals['font_awesome_css'] = font_awesome_css
+    app.url_defaults(_static_url_defaults)
+    app.view_functions['static'] = serve_static
+    app.cli.add_command(assets_cli)
@@ -0,0 +1,74 @@
+# project/campaigns.py
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func
+
+from .extension import db
+from .model import Campaign, Donation
+
+
+campaigns_cli = AppGroup('campaigns', help='Campaign maintenance commands.')
+
+
+def reconcile_totals(fix=True):
+    """
+    Recomputes raised_amount / donor_count for every campaign straight from
+    the donations table and returns a list of campaigns that had drifted.
+    """
+    # 1. One grouped query for all campaigns
+    rows = db.session.query(
+        Donation.campaign_id,
+        func.coalesce(func.sum(Donation.amount), 0.0),
+        func.count(Donation.id)
+    ).filter(
+        Donation.status == 'Success',
+        Donation.campaign_id.isnot(None)
+    ).group_by(Donation.campaign_id).all()
+
+    actual = {campaign_id: (float(total), count) for campaign_id, total, count in rows}
+
+    # 2. Compare against the stored columns
+    drifted = []
+    for campaign in Campaign.query.all():
+        total, count = actual.get(campaign.id, (0.0, 0))
+        stored_total = campaign.raised_amount or 0.0
+        stored_count = campaign.donor_count or 0
+
+        if abs(stored_total - total) >= 0.005 or stored_count != count:
+            drifted.append({
+                'id': campaign.id,
+                'title': campaign.title,
+                'stored_total': stored_total,
+                'actual_total': total,
+                'stored_count': stored_count,
+                'actual_count': count,
+            })
+            if fix:
+                campaign.raised_amount = total
+                campaign.donor_count = count
+
+    if fix:
+        db.session.commit()
+    return drifted
+
+
+@campaigns_cli.command('reconcile')
+@click.option('--dry-run', is_flag=True, help='Report drift without fixing it.')
+def reconcile_command(dry_run):
+    """Recompute campaign totals from donations and report drift."""
+    drifted = reconcile_totals(fix=not dry_run)
+
+    if not drifted:
+        click.echo('All campaign totals are in sync.')
+        return
+
+    for d in drifted:
+        click.echo(
+            f"Campaign #{d['id']} ({d['title']}): "
+            f"raised {d['stored_total']:.2f} -> {d['actual_total']:.2f} "
+            f"(drift {d['actual_total'] - d['stored_total']:+.2f}), "
+            f"donors {d['stored_count']} -> {d['actual_count']}"
+        )
+
+    action = 'Reported' if dry_run else 'Fixed'
+    click.echo(f'{action} drift on {len(drifted)} campaign(s).')
@@ -15,17 +15,108 @@ SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# How long (seconds) each worker trusts its cached SiteConfig values.
+# This is also the max delay before other workers see a toggled setting.
+SITE_CONFIG_TTL = int(os.environ.get('SITE_CONFIG_TTL', 5))
 
-MAIL_SERVER = "smtp.hostinger.com"
-MAIL_PORT = 465  # Switch to 465 (SSL)
-MAIL_USE_SSL = True  # Enable SSL
+
+MAIL_SERVER = os.environ.get('MAIL_SERVER', "smtp.hostinger.com")
+MAIL_PORT = int(os.environ.get('MAIL_PORT', 465))  # Switch to 465 (SSL)
+MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'true').lower() == 'true'  # Enable SSL (off for a local test server)
 
 MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
 MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
 MAIL_DEFAULT_SENDER = os.environ.get('MAIL_USERNAME')
+
+# SMTP connection pool (per worker process, see smtp_pool.py)
+MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 3))
+MAIL_POOL_NOOP_AFTER = 30         # NOOP-check connections idle longer than this
+MAIL_TIMEOUT = 10
+
+# Email outbox worker ('flask email-worker')
+EMAIL_WORKER_CONCURRENCY = int(os.environ.get('EMAIL_WORKER_CONCURRENCY', 4))
+EMAIL_MAX_ATTEMPTS = 6            # After this many failures -> 'Dead'
+EMAIL_RETRY_BASE_SECONDS = 30     # 30s, 60s, 120s, ...
+EMAIL_RETRY_MAX_SECONDS = 3600
+EMAIL_CLAIM_TIMEOUT = 300         # Re-claim rows stuck in 'Sending' after this
+
+# Newsletter delivery ('flask newsletter send <id>')
+NEWSLETTER_SENDER = "info@ourstoryourvoice.org"
+NEWSLETTER_RATE = float(os.environ.get('NEWSLETTER_RATE', 5))  # Messages per second
+NEWSLETTER_BATCH_SIZE = 200
+NEWSLETTER_STALE_SECONDS = 120    # A 'Running' send with no heartbeat for this long can be resumed
    
-stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
+STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
+stripe.api_key = STRIPE_SECRET_KEY
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET') # whsec_...
+
+# Image uploads (see uploads.py)
+# 'spool'  -> saved to disk, pushed to Cloudinary by 'flask upload-worker'
+# 'direct' -> browser uploads straight to Cloudinary with a signed request
+IMAGE_UPLOAD_MODE = os.environ.get('IMAGE_UPLOAD_MODE', 'spool')
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR')  # Default: <instance>/upload_spool
+UPLOAD_MAX_ATTEMPTS = 5
+CLOUDINARY_FOLDER = 'osov'
+
+# Payment gateway (see payment_gateway.py)
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE')  # Point at a fake Stripe server for local testing
+STRIPE_CONNECT_TIMEOUT = 3
+STRIPE_READ_TIMEOUT = 10
+STRIPE_TIMEOUTS = {                 # Per-call read timeouts (seconds)
+    'create_checkout_session': 10,
+    'cancel_subscription': 8,
+}
+STRIPE_MAX_RETRIES = 2              # Network retries (same idempotency key)
+STRIPE_POOL_SIZE = 10               # Keep-alive connections per worker
+STRIPE_BREAKER_THRESHOLD = 5        # Consecutive failures before failing fast
+STRIPE_BREAKER_RESET = 30           # Seconds before trying Stripe again
+
+
+
+
+
+# Static image pipeline ('flask assets build', see assets.py)
+ASSET_WIDTHS = [320, 640, 1024, 1600]   # srcset widths for WebP/AVIF variants
+STATIC_FINGERPRINT = True               # url_for('static') -> content-hashed file names
+STATIC_IMMUTABLE_MAX_AGE = 31536000     # Cache-Control max-age for hashed URLs (1 year)
+TAILWIND_CLI = os.environ.get('TAILWIND_CLI')  # Default: node_modules/.bin/tailwindcss or tailwindcss on PATH
+FONTAWESOME_DIR = os.environ.get('FONTAWESOME_DIR')  # Default: node_modules/@fortawesome/fontawesome-free
+
+# Public page cache (see pagecache.py)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+PAGE_CACHE_BACKEND = os.environ.get('PAGE_CACHE_BACKEND', 'sqlite')  # 'sqlite' (shared by every process on the host) or 'lru' (one process only)
+PAGE_CACHE_PATH = os.environ.get('PAGE_CACHE_PATH')                # Default: <instance>/page_cache.sqlite3
+PAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024                            # Cap for either backend (oldest evicted)
+PAGE_CACHE_TTL = 300                                               # Seconds
+
+# Story view counter (see viewcounter.py)
+VIEW_FLUSH_INTERVAL = 10        # Seconds between background flushes
+VIEW_FLUSH_MAX_PENDING = 500    # Flush early once this many views are buffered (max lost on a crash)
+
+# Job scheduler ('flask scheduler', see scheduler.py)
+SCHEDULER_MAX_SLEEP = 5         # Seconds; new jobs are picked up at least this often
+SCHEDULER_MAX_ATTEMPTS = 5
+SCHEDULER_CLAIM_TIMEOUT = 300   # Re-run a job left 'Running' by a crashed scheduler after this long
+
+# Query counter (see querycount.py)
+QUERY_N_PLUS_ONE_THRESHOLD = 5  # Same statement this many times in one request -> "possible N+1" (debug mode)
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'false').lower() == 'true'  # Raise instead of logging
+QUERY_RAISELOAD = os.environ.get('QUERY_RAISELOAD', 'false').lower() == 'true'  # Lazy loads on list pages raise (see model.listing_options)
 
+# SQL timing / slow query log (see sqltiming.py)
+SQL_TIMING_ENABLED = os.environ.get('SQL_TIMING_ENABLED', 'true').lower() == 'true'  # Server-Timing header + slow log
+SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))       # Log statements slower than this
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')               # File (rotated); default: app logger only
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'false').lower() == 'true'  # Also log the EXPLAIN plan
+SLOW_QUERY_EXPLAIN_INTERVAL = 300                               # Seconds before the same statement is explained again
 
+# Prometheus metrics at /admin/metrics (see metrics.py; every process shares PROMETHEUS_MULTIPROC_DIR, read from the environment)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Scrape with 'Authorization: Bearer <token>' without login
+METRICS_ALLOW_LOCALHOST = os.environ.get('METRICS_ALLOW_LOCALHOST', 'false').lower() == 'true'  # Only without a local reverse proxy
 
+# Daily stats rollup for the admin dashboards (see stats.py; filled by 'flask scheduler')
+STATS_ROLLUP_RECOMPUTE_DAYS = 7  # Re-roll this many past days each run (late webhook flips to 'Success')
+STATS_DEFAULT_CURRENCY = 'CAD'   # Shown as the headline total; other currencies are listed beside it
 
+# Admin status counters (see statuscounts.py; stored in the page cache backend)
+STATUS_COUNTS_TTL = 60           # Seconds; commits on the same process invalidate them sooner
@@ -0,0 +1,100 @@
+# project/csvexport.py
+import csv
+import io
+import zlib
+from datetime import datetime, timedelta
+
+from flask import Response, abort, request, stream_with_context
+
+from .extension import query_counter
+
+
+# --- STREAMED CSV EXPORTS ---
+# The admin exports used to load every row (and its user) and build the whole
+# file in a StringIO before sending a byte. Now the rows come off a
+# server-side cursor (yield_per) and go out as they are read, FLUSH_BYTES at
+# a time, so memory stays flat however big the table gets:
+#
+#   query = export_filters(db.session.query(Model.id, ..., User.email).join(User, ...), Model)
+#   rows = ((r.id, ..., r.email) for r in query.yield_per(YIELD_PER))
+#   return stream_csv(headers, rows, 'osov_..._export')
+#
+# The query runs when the response starts streaming (stream_with_context
+# keeps the request and the database session alive until the last chunk).
+# The route's @query_counter.budget is checked once the stream has ended.
+#
+# Query string options, same for every export:
+#   ?status=Approved                   only that status
+#   ?from=2026-01-01&to=2026-03-31     created_at between those days (inclusive, UTC)
+#   ?gzip=1                            download <name>.csv.gz instead
+
+YIELD_PER = 1000          # Rows fetched from the cursor at a time
+FLUSH_BYTES = 64 * 1024   # CSV text buffered before a chunk is sent
+
+
+# --- 1. FILTERS ---
+def _day_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        abort(400, f'{name} must be a date like 2026-01-31')
+
+
+def export_filters(query, model):
+    """Applies ?status=, ?from= and ?to= to a query over `model`."""
+    status = (request.args.get('status') or '').strip()
+    if status:
+        enum_class = getattr(model.status.type, 'enum_class', None)
+        if enum_class is not None:  # e.g. VolunteerApplication: ?status=Approved -> ApplicationStatus.APPROVED
+            try:
+                status = enum_class(status.lower())
+            except ValueError:
+                abort(400, f'Unknown status: {status}')
+        query = query.filter(model.status == status)
+
+    start, end = _day_arg('from'), _day_arg('to')
+    if start:
+        query = query.filter(model.created_at >= start)
+    if end:
+        query = query.filter(model.created_at < end + timedelta(days=1))
+    return query
+
+
+# --- 2. STREAMED RESPONSE ---
+def stream_csv(headers, rows, filename):
+    """Response that writes `headers` and then `rows` (any iterable) as they come."""
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip container
+
+        def drain():
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            return gzip.compress(data) if gzip else data
+
+        try:
+            writer.writerow(headers)
+            for row in rows:
+                writer.writerow(row)
+                if buffer.tell() >= FLUSH_BYTES:
+                    chunk = drain()
+                    if chunk:
+                        yield chunk
+            yield drain() + (gzip.flush() if gzip else b'')
+        finally:
+            query_counter.end_deferred()  # Also on a client disconnect (close())
+
+    query_counter.defer_check()
+
+    response = Response(stream_with_context(generate()),
+                        mimetype='application/gzip' if compress else 'text/csv')
+    response.headers.set('Content-Disposition', 'attachment',
+                         filename=f"{filename}.csv{'.gz' if compress else ''}")
+    return response
@@ -1,6 +1,12 @@
 # project/extensions.py
 from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail
+from flask_migrate import Migrate
+from .smtp_pool import PooledMail
+from .payment_gateway import PaymentGateway
+from .pagecache import PageCache
+from .viewcounter import ViewCounter
+from .querycount import QueryCounter
+from .sqltiming import SQLTimer
 from flask_wtf import CSRFProtect
 from authlib.integrations.flask_client import OAuth
 # __init__.py
@@ -14,6 +20,12 @@ from flask_login import LoginManager
 # Initialize them here, but don't bind to app yet
 login_manager = LoginManager()
 db = SQLAlchemy()
+migrate = Migrate()  # 'flask db upgrade' (migrations/ folder)
 csrf = CSRFProtect()
 oauth = OAuth()
-mail = Mail()
\ No newline at end of file
+mail = PooledMail()  # Flask-Mail with pooled SMTP connections
+payment_gateway = PaymentGateway()  # Stripe calls (timeouts, retries, circuit breaker)
+page_cache = PageCache()  # Cached public pages (see pagecache.py)
+view_counter = ViewCounter()  # Buffered story views (see viewcounter.py)
+query_counter = QueryCounter()  # Queries per request, N+1 warnings, budgets (see querycount.py)
+sql_timer = SQLTimer()  # Server-Timing header, slow query log (see sqltiming.py)
\ No newline at end of file
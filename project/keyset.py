@@ -0,0 +1,119 @@
+# project/keyset.py
+import base64
+import binascii
+from datetime import datetime
+
+from flask import abort
+from sqlalchemy import and_, or_
+
+
+# --- KEYSET (CURSOR) PAGINATION FOR ADMIN LISTS ---
+# OFFSET pagination reads and throws away every row before the page, and
+# needs a COUNT(*) for "page X of Y", so deep pages of a big table get slow.
+# A keyset page is "the next N rows after the (created_at, id) of the last
+# row shown" instead:
+#
+#   page = keyset.paginate(User.query, User, per_page=20,
+#                          after=request.args.get('after'), before=request.args.get('before'))
+#   page.items
+#   page.next_cursor  -> 'Older' link: ?after=<cursor>   (None on the last page)
+#   page.prev_cursor  -> 'Newer' link: ?before=<cursor>  (None on the first page)
+#
+# Newest first. With an index on created_at (or on (filter column, created_at))
+# every page is one query that reads N+1 rows, however deep it is. The id
+# breaks ties between rows created in the same instant. Rows with no
+# created_at come last (NULL sorts lowest in SQLite and MySQL).
+#
+# Cursors are opaque to the browser; a mangled one is a 400.
+
+
+class KeysetPage:
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+# --- 1. CURSORS ---
+def encode_cursor(stamp, row_id):
+    raw = f"{stamp.isoformat() if stamp else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        stamp, row_id = raw.split('|')
+        return (datetime.fromisoformat(stamp) if stamp else None), int(row_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        abort(400)
+
+
+# --- 2. WHERE CLAUSES ---
+# Written as "created_at <= t AND (created_at < t OR id < x)" rather than an
+# OR of the three cases so the database reads a range of the created_at index.
+# NULL created_at rows sit at the end, so they get their own follow-up query
+# (id order) once the dated rows run out.
+
+def _older(column, id_column, stamp, row_id):
+    """[(where, order by)] of the rows after (stamp, row_id), newest first."""
+    if stamp is None:
+        return [(and_(column.is_(None), id_column < row_id), (id_column.desc(),))]
+    return [(and_(column <= stamp, or_(column < stamp, id_column < row_id)), (column.desc(), id_column.desc())),
+            (column.is_(None), (id_column.desc(),))]
+
+
+def _newer(column, id_column, stamp, row_id):
+    """[(where, order by)] of the rows before (stamp, row_id), oldest first."""
+    if stamp is None:
+        return [(and_(column.is_(None), id_column > row_id), (id_column.asc(),)),
+                (column.isnot(None), (column.asc(), id_column.asc()))]
+    return [(and_(column >= stamp, or_(column > stamp, id_column > row_id)), (column.asc(), id_column.asc()))]
+
+
+def _fetch(query, parts, limit):
+    rows = []
+    for where, order_by in parts:
+        if len(rows) >= limit:
+            break
+        rows += query.filter(where).order_by(*order_by).limit(limit - len(rows)).all()
+    return rows
+
+
+# --- 3. PAGINATE ---
+def paginate(query, model, per_page, after=None, before=None, column='created_at'):
+    """
+    One page of `query` (filtered, not yet ordered) newest first.
+    `after` / `before` are cursors from a previous page's next_cursor / prev_cursor.
+    """
+    sort, id_column = getattr(model, column), model.id
+    key = lambda row: encode_cursor(getattr(row, column), row.id)
+
+    if before:
+        rows = _fetch(query, _newer(sort, id_column, *decode_cursor(before)), per_page + 1)
+        if len(rows) > per_page:
+            rows = rows[:per_page][::-1]
+            return KeysetPage(rows, per_page, next_cursor=key(rows[-1]), prev_cursor=key(rows[0]))
+        after = None  # Back at the newest rows: show a full first page instead of a short one
+
+    if after:
+        rows = _fetch(query, _older(sort, id_column, *decode_cursor(after)), per_page + 1)
+    else:
+        rows = query.order_by(sort.desc(), id_column.desc()).limit(per_page + 1).all()  # NULLs sort last
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPage(rows, per_page,
+                      next_cursor=key(rows[-1]) if has_next else None,
+                      prev_cursor=key(rows[0]) if after and rows else None)
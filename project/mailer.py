@@ -0,0 +1,178 @@
+# project/mailer.py
+import json
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_mail import Message, Connection
+from sqlalchemy import or_, and_
+
+from .extension import db, mail
+from .model import EmailOutbox
+
+
+# --- 1. ENQUEUE (called from routes) ---
+def queue_email(subject, recipients, html=None, body=None, sender=None, reply_to=None, bcc=None):
+    """
+    Saves an email to the outbox and returns immediately.
+    The 'flask email-worker' process picks it up and sends it.
+    """
+    outbox = EmailOutbox(
+        subject=subject,
+        sender=sender or current_app.config.get('MAIL_DEFAULT_SENDER'),
+        recipients=json.dumps(list(recipients or [])),
+        bcc=json.dumps(list(bcc)) if bcc else None,
+        reply_to=reply_to,
+        html=html,
+        body=body
+    )
+    db.session.add(outbox)
+    db.session.commit()
+    return outbox
+
+
+# --- 2. DELIVERY (called from the worker) ---
+def _backoff(attempts):
+    # 30s, 60s, 120s, ... capped at EMAIL_RETRY_MAX_SECONDS
+    base = current_app.config.get('EMAIL_RETRY_BASE_SECONDS', 30)
+    cap = current_app.config.get('EMAIL_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(cap, base * (2 ** (attempts - 1))))
+
+
+def _build_message(outbox):
+    msg = Message(
+        subject=outbox.subject,
+        sender=outbox.sender,
+        recipients=json.loads(outbox.recipients),
+        bcc=json.loads(outbox.bcc) if outbox.bcc else None,
+        reply_to=outbox.reply_to
+    )
+    msg.html = outbox.html
+    msg.body = outbox.body
+    return msg
+
+
+def deliver(outbox_id):
+    """Sends one claimed outbox row and records the result."""
+    outbox = db.session.get(EmailOutbox, outbox_id)
+    if not outbox or outbox.status != 'Sending':
+        return
+
+    try:
+        mail.send(_build_message(outbox))
+        outbox.status = 'Sent'
+        outbox.sent_at = datetime.utcnow()
+        outbox.last_error = None
+
+    except Exception as e:
+        outbox.attempts += 1
+        outbox.last_error = str(e)[:1000]
+
+        # Too many failures -> dead letter (kept for inspection, never retried)
+        if outbox.attempts >= current_app.config.get('EMAIL_MAX_ATTEMPTS', 6):
+            outbox.status = 'Dead'
+            print(f"❌ Email #{outbox.id} moved to dead letter: {e}")
+        else:
+            outbox.status = 'Pending'
+            outbox.next_attempt_at = datetime.utcnow() + _backoff(outbox.attempts)
+            print(f"Email #{outbox.id} failed (attempt {outbox.attempts}), retrying later: {e}")
+
+    outbox.locked_at = None
+    db.session.commit()
+
+
+def claim_batch(limit):
+    """
+    Marks up to `limit` due rows as 'Sending' and returns their IDs.
+    SKIP LOCKED lets several workers (or nodes) drain the same table.
+    Rows stuck in 'Sending' (worker crashed mid-send) are picked up again
+    after EMAIL_CLAIM_TIMEOUT seconds.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config.get('EMAIL_CLAIM_TIMEOUT', 300))
+
+    rows = EmailOutbox.query.filter(or_(
+        and_(EmailOutbox.status == 'Pending', EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == 'Sending', EmailOutbox.locked_at < stale)
+    )).order_by(EmailOutbox.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    for row in rows:
+        row.status = 'Sending'
+        row.locked_at = now
+    db.session.commit()
+
+    return [row.id for row in rows]
+
+
+# --- 3. WORKER PROCESS ---
+@click.command('email-worker')
+@click.option('--concurrency', type=int, default=None, help='Parallel SMTP sends (default: EMAIL_WORKER_CONCURRENCY).')
+@click.option('--batch-size', type=int, default=50, help='Rows claimed per poll.')
+@click.option('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the outbox is empty.')
+@click.option('--once', is_flag=True, help='Drain what is due right now, then exit.')
+@with_appcontext
+def email_worker_command(concurrency, batch_size, poll_interval, once):
+    """Send queued emails from the outbox table."""
+    app = current_app._get_current_object()
+    concurrency = concurrency or app.config.get('EMAIL_WORKER_CONCURRENCY', 4)
+
+    def send_one(outbox_id):
+        # Each thread gets its own app context (and DB session)
+        with app.app_context():
+            deliver(outbox_id)
+
+    click.echo(f'Email worker started (concurrency={concurrency}).')
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            ids = claim_batch(batch_size)
+
+            if ids:
+                list(pool.map(send_one, ids))
+                click.echo(f'Processed {len(ids)} email(s).')
+                continue
+
+            if once:
+                break
+            time.sleep(poll_interval)
+
+
+# --- 4. BENCHMARK: pooled vs. one connection per message ---
+@click.command('email-bench')
+@click.option('--count', type=int, default=50, help='Messages to send in each mode.')
+@click.option('--to', 'recipient', default='bench@example.com')
+@with_appcontext
+def email_bench_command(count, recipient):
+    """Compare per-message latency with and without the SMTP pool.
+
+    Point MAIL_SERVER/MAIL_PORT at a local SMTP server first, e.g.
+    `python -m aiosmtpd -n -l localhost:8025`.
+    """
+    state = current_app.extensions['mail']
+
+    def make_message(i):
+        msg = Message(subject=f'Bench {i}', sender=current_app.config.get('MAIL_DEFAULT_SENDER') or 'bench@localhost',
+                      recipients=[recipient])
+        msg.body = 'SMTP pool benchmark'
+        return msg
+
+    # A. Plain Flask-Mail: connect + (TLS) + login + quit for every message
+    start = time.perf_counter()
+    for i in range(count):
+        with Connection(state) as conn:
+            conn.send(make_message(i))
+    fresh_ms = (time.perf_counter() - start) * 1000 / count
+
+    # B. Pooled transport (what the app uses)
+    start = time.perf_counter()
+    for i in range(count):
+        mail.send(make_message(i))
+    pooled_ms = (time.perf_counter() - start) * 1000 / count
+
+    saved = (1 - pooled_ms / fresh_ms) * 100 if fresh_ms else 0.0
+    click.echo(f'New connection per message: {fresh_ms:.2f} ms/msg')
+    click.echo(f'Pooled connections:         {pooled_ms:.2f} ms/msg')
+    click.echo(f'Reduction:                  {saved:.1f}%')
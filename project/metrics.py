@@ -0,0 +1,144 @@
+# project/metrics.py
+import glob
+import os
+import time
+from contextlib import contextmanager
+
+import click
+from dotenv import load_dotenv
+from flask import g, request
+
+# prometheus_client picks file-backed (shared) or in-memory values when it is
+# first imported, so the directory must be in the environment before that -
+# and this module is the first to import it (smtp_pool, uploads, ...).
+load_dotenv()
+MULTIPROC_DIR = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/osov-prometheus')
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+else:
+    # prometheus_client goes multiprocess if the variable is set at all (even
+    # empty: files in the working directory). Hidden for the import only, so
+    # child processes still inherit the empty value.
+    del os.environ['PROMETHEUS_MULTIPROC_DIR']
+
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,  # noqa: E402
+                               CONTENT_TYPE_LATEST, generate_latest, multiprocess)
+
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = MULTIPROC_DIR
+
+
+# --- PROMETHEUS METRICS ---
+# Served at /admin/metrics (see adminroute.py) in the Prometheus text format:
+#
+#   osov_http_request_duration_seconds{endpoint,method}   histogram
+#   osov_http_requests_total{endpoint,method,status}      counter
+#   osov_http_requests_in_flight                          gauge
+#   osov_outbound_call_duration_seconds{service,operation} histogram (smtp/stripe/cloudinary)
+#   osov_outbound_call_errors_total{service,operation,error} counter
+#
+# Several processes: the gunicorn workers see their own requests, and the
+# SMTP / Cloudinary calls mostly happen in 'flask email-worker' and 'flask
+# upload-worker'. So every process writes its metrics to files in
+# PROMETHEUS_MULTIPROC_DIR (default /tmp/osov-prometheus, or set it in the
+# environment / .env - the same value for every process on the host) and
+# /admin/metrics sums them. PROMETHEUS_MULTIPROC_DIR= (empty) keeps the
+# metrics in memory instead (scripts, tests).
+#
+# Counter files outlive their process, so totals survive worker restarts.
+# Wipe the directory only at deploy, with every process stopped:
+#
+#   flask metrics-reset
+#
+# (gunicorn.conf.py drops a dead web worker's in-flight gauge.)
+#
+# Access: a logged-in ADMIN, or the scraper with METRICS_TOKEN:
+#
+#   - job_name: osov
+#     metrics_path: /admin/metrics
+#     authorization: {credentials: <METRICS_TOKEN>}
+
+OUTBOUND_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_LATENCY = Histogram(
+    'osov_http_request_duration_seconds', 'Time to produce a response, by endpoint.',
+    ['endpoint', 'method'])
+REQUESTS = Counter(
+    'osov_http_requests_total', 'Responses by endpoint and status code.',
+    ['endpoint', 'method', 'status'])
+IN_FLIGHT = Gauge(
+    'osov_http_requests_in_flight', 'Requests being handled right now (all workers).',
+    multiprocess_mode='livesum')
+OUTBOUND_LATENCY = Histogram(
+    'osov_outbound_call_duration_seconds', 'SMTP / Stripe / Cloudinary call time, including failed calls.',
+    ['service', 'operation'], buckets=OUTBOUND_BUCKETS)
+OUTBOUND_ERRORS = Counter(
+    'osov_outbound_call_errors_total', 'Failed SMTP / Stripe / Cloudinary calls, by exception type.',
+    ['service', 'operation', 'error'])
+
+
+@contextmanager
+def track_call(service, operation):
+    """with track_call('stripe', 'cancel_subscription'): ... (times it, counts exceptions)"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        OUTBOUND_ERRORS.labels(service, operation, type(e).__name__).inc()
+        raise
+    finally:
+        OUTBOUND_LATENCY.labels(service, operation).observe(time.perf_counter() - start)
+
+
+# --- 1. REQUEST METRICS ---
+def _endpoint():
+    # Unmatched URLs (404 scans...) share one label instead of one per path
+    return request.endpoint or 'unmatched'
+
+
+def _start_request():
+    g._metrics_start = time.perf_counter()
+    IN_FLIGHT.inc()
+
+
+def _record_response(response):
+    start = g.get('_metrics_start')
+    if start is not None:
+        REQUEST_LATENCY.labels(_endpoint(), request.method).observe(time.perf_counter() - start)
+        REQUESTS.labels(_endpoint(), request.method, str(response.status_code)).inc()
+    return response
+
+
+def _end_request(exc):
+    if g.pop('_metrics_start', None) is not None:
+        IN_FLIGHT.dec()
+
+
+def init_app(app):
+    app.before_request(_start_request)
+    app.after_request(_record_response)
+    app.teardown_request(_end_request)
+    app.cli.add_command(reset_command)
+
+
+# --- 2. EXPOSITION ---
+def render():
+    """(body, content type) of every metric, summed over all workers."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+@click.command('metrics-reset')
+def reset_command():
+    """Delete the shared metric files (deploy step; stop gunicorn and the workers first)."""
+    if not MULTIPROC_DIR:
+        click.echo('PROMETHEUS_MULTIPROC_DIR is empty: metrics are in memory, nothing to reset.')
+        return
+    files = glob.glob(os.path.join(MULTIPROC_DIR, '*.db'))
+    for path in files:
+        os.remove(path)
+    click.echo(f'Removed {len(files)} metric file(s) from {MULTIPROC_DIR}.')
+
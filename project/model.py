@@ -1,12 +1,30 @@
+from flask import current_app
 from flask_login import UserMixin
-from .extension import db
+from .extension import db, view_counter
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import raiseload
 from datetime import datetime
 from enum import Enum
 from werkzeug.security import generate_password_hash,check_password_hash
 
 
 
+# --- LOADING STRATEGY ---
+# Relationships stay lazy by default: detail pages touch one row, so one
+# extra query is fine. List pages must load what their template needs up
+# front, through listing_options():
+#
+#   Story.query.options(*listing_options(joinedload(Story.author)))
+#
+# With QUERY_RAISELOAD on (tests, scripts/check_query_budgets.py) every
+# other relationship on those rows raises instead of quietly running one
+# query per row.
+def listing_options(*eager):
+    if current_app.config.get('QUERY_RAISELOAD'):
+        return (*eager, raiseload('*'))
+    return eager
+
+
 # --- 1. ENUMS FOR ROLES & STATUS ---
 class UserRole(Enum):
     USER = "user"
@@ -30,8 +48,8 @@ class User(db.Model,UserMixin):
     
     # Defines if they are User, Moderator, or Admin
     role = db.Column(db.Enum(UserRole), default=UserRole.USER, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    last_login = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True) # Dashboard user list (keyset pages)
+    last_login = db.Column(db.DateTime, default=datetime.utcnow, index=True) # Dashboard "active today" count
 
     # Relationships
     donations = db.relationship('Donation', backref='donor', lazy=True)
@@ -64,6 +82,12 @@ class SiteConfig(db.Model):
 # --- 3. STORIES (Admin/Mod Only) ---
 class Story(db.Model):
     __tablename__ = 'stories'
+    __table_args__ = (
+        # /stories, story_detail "more stories", dashboard counts: WHERE status=? ORDER BY created_at DESC
+        db.Index('ix_stories_status_created_at', 'status', 'created_at'),
+        # Admin "Manage stories", All tab: keyset pages ORDER BY created_at DESC, id DESC
+        db.Index('ix_stories_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -73,10 +97,12 @@ class Story(db.Model):
     summary = db.Column(db.String(300), nullable=False)
     content = db.Column(db.Text, nullable=False)
     image_url = db.Column(db.String(500))
+    # None, 'Pending' (background upload running), 'Ready' or 'Failed'
+    image_status = db.Column(db.String(20), nullable=True)
     scheduled_for = db.Column(db.DateTime, nullable=True)
     # Metadata
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    category = db.Column(db.String(50), default='General')
+    category = db.Column(db.String(50), default='General', index=True)
     
     
     # --- NEW FIELDS FOR IMAGE FEATURES ---
@@ -88,6 +114,11 @@ class Story(db.Model):
     
     author = db.relationship('User', backref='stories')
 
+    @property
+    def view_count(self):
+        # Stored views + the ones this worker hasn't flushed yet
+        return (self.views or 0) + view_counter.pending(self.id)
+
     # Helper to calculate "2 hours ago" etc.
     def time_ago(self):
         now = datetime.utcnow()
@@ -127,6 +158,7 @@ class Event(db.Model):
     location = db.Column(db.String(200))
     capacity = db.Column(db.Integer)
     image_url = db.Column(db.String(500)) # Removed default for cleaner logic
+    image_status = db.Column(db.String(20), nullable=True) # See Story.image_status
     
     # --- NEW FIELD FOR DRAFTS ---
     status = db.Column(db.String(20), default='Draft') # 'Draft' or 'Published'
@@ -134,6 +166,10 @@ class Event(db.Model):
     rsvps = db.relationship('EventRSVP', backref='event', lazy=True, cascade="all, delete-orphan")
 class EventRSVP(db.Model):
     __tablename__ = 'event_rsvps'
+    __table_args__ = (
+        # "Already registered?" checks: WHERE event_id=? AND user_id=?
+        db.Index('ix_event_rsvps_event_user', 'event_id', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
@@ -155,6 +191,18 @@ class EventRSVP(db.Model):
     how_heard = db.Column(db.String(100))
     
     rsvp_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Seats taken, as a correlated COUNT loaded with the event (uses
+# ix_event_rsvps_event_user) - templates use this instead of event.rsvps|length,
+# which loaded every RSVP row of every event on the page
+Event.rsvp_count = db.column_property(
+    db.select(db.func.count(EventRSVP.id))
+    .where(EventRSVP.event_id == Event.id)
+    .correlate_except(EventRSVP)
+    .scalar_subquery()
+)
+
 # --- 6. VOLUNTEERING & MENTORSHIP ---
 class VolunteerApplication(db.Model):
     """
@@ -162,6 +210,10 @@ class VolunteerApplication(db.Model):
     Only Admins see this.
     """
     __tablename__ = 'volunteer_applications'
+    __table_args__ = (
+        # Approvals page: pending applications, keyset pages on (created_at, id)
+        db.Index('ix_volunteer_applications_status_created_at', 'status', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     
@@ -240,6 +292,10 @@ class MentorshipApplication(db.Model):
 
 class PartnerApplication(db.Model):
     __tablename__ = 'partner_applications'
+    __table_args__ = (
+        # Approvals page: pending/approved partners newest first, keyset pages on (created_at, id)
+        db.Index('ix_partner_applications_status_created_at', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     # The user submitting this (The Representative)
@@ -267,6 +323,12 @@ class PartnerApplication(db.Model):
 
 class Donation(db.Model):
     __tablename__ = 'donations'
+    __table_args__ = (
+        # Fundraising dashboard / CSV export: WHERE status='Success' ORDER BY created_at DESC
+        db.Index('ix_donations_status_created_at', 'status', 'created_at'),
+        # donate page: the user's active monthly plan
+        db.Index('ix_donations_user_frequency_status', 'user_id', 'frequency', 'status'),
+    )
      
     id = db.Column(db.Integer, primary_key=True)
     
@@ -304,6 +366,32 @@ class Donation(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    def mark_success(self):
+        """
+        Flips the donation to 'Success' and adds it to the campaign totals
+        (and to daily_stats if its day is already rolled up, see stats.py).
+        Safe to call twice: the status UPDATE is conditional, so only the
+        first caller bumps the counters. Caller must commit.
+        """
+        flipped = Donation.query.filter(
+            Donation.id == self.id,
+            Donation.status != 'Success'
+        ).update({Donation.status: 'Success'}, synchronize_session=False)
+
+        self.status = 'Success'
+
+        if flipped and self.campaign_id:
+            Campaign.query.filter_by(id=self.campaign_id).update({
+                Campaign.raised_amount: Campaign.raised_amount + self.amount,
+                Campaign.donor_count: Campaign.donor_count + 1
+            }, synchronize_session=False)
+
+        if flipped:
+            from . import stats
+            stats.count_late_success(self)
+
+        return bool(flipped)
+
 
 # models.py
 
@@ -316,17 +404,20 @@ class Campaign(db.Model):
     goal_amount = db.Column(db.Float, default=0.0) # e.g. 50000.00
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # --- MATERIALIZED TOTALS ---
+    # Updated by Donation.mark_success(); rebuilt by 'flask campaigns reconcile'
+    raised_amount = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    donor_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Relationship: One Campaign has Many Donations
     # cascade="all, delete-orphan" isn't used here because we don't want to 
     # delete money records if a campaign is deleted. We just set their campaign_id to NULL.
     donations = db.relationship('Donation', backref='campaign_rel', lazy=True)
 
-    # Helper to calculate total raised dynamically
+    # Total raised (read from the stored column, no donation rows loaded)
     def total_raised(self):
-        # Sum all successful donations linked to this campaign
-        total = sum(d.amount for d in self.donations if d.status == 'Success')
-        return total
+        return self.raised_amount or 0.0
 
     # --- REPLACE THE OLD progress_percent WITH THIS ---
     def progress_percent(self):
@@ -351,4 +442,143 @@ class NewsletterSubscriber(db.Model):
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
-        return f'<Subscriber {self.email}>'
\ No newline at end of file
+        return f'<Subscriber {self.email}>'
+
+
+class NewsletterSend(db.Model):
+    """
+    One newsletter blast. Progress is checkpointed here so
+    'flask newsletter send' can resume after a crash without re-sending.
+    """
+    __tablename__ = 'newsletter_sends'
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    body_html = db.Column(db.Text, nullable=False) # '{email}' is replaced per recipient
+
+    # Status: Pending -> Running -> Done
+    status = db.Column(db.String(20), default='Pending', nullable=False)
+
+    # Checkpoint: subscribers are sent in id order, so everything <= this is done
+    last_subscriber_id = db.Column(db.Integer, default=0, nullable=False)
+    sent_count = db.Column(db.Integer, default=0, nullable=False)
+    failed_count = db.Column(db.Integer, default=0, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # Updated on every checkpoint
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<NewsletterSend {self.id} {self.status}>'
+
+
+# --- 9. EMAIL OUTBOX ---
+class EmailOutbox(db.Model):
+    """
+    Outgoing emails waiting for the 'flask email-worker' process.
+    Routes only insert rows here; the worker does the actual SMTP work.
+    """
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(120))
+    recipients = db.Column(db.Text, nullable=False) # JSON list
+    bcc = db.Column(db.Text)                        # JSON list
+    reply_to = db.Column(db.String(120))
+    html = db.Column(db.Text)
+    body = db.Column(db.Text)
+
+    # Status: Pending -> Sending -> Sent (or Dead after too many failures)
+    status = db.Column(db.String(20), default='Pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)   # When a worker claimed it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.id} {self.status}>'
+
+# --- 10. STRIPE WEBHOOK EVENTS ---
+class StripeEvent(db.Model):
+    """
+    Every Stripe webhook event we have applied. Stripe retries and can
+    deliver the same event twice, so the event id is the primary key.
+    """
+    __tablename__ = 'stripe_events'
+
+    id = db.Column(db.String(255), primary_key=True) # e.g. 'evt_1Mg7...'
+    type = db.Column(db.String(100), nullable=False)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# --- 11. BACKGROUND IMAGE UPLOADS ---
+class ImageUpload(db.Model):
+    """
+    An image saved to local disk, waiting for 'flask upload-worker' to push it
+    to Cloudinary and fill in the Story/Event image_url.
+    """
+    __tablename__ = 'image_uploads'
+
+    id = db.Column(db.Integer, primary_key=True)
+    target_type = db.Column(db.String(20), nullable=False) # 'story' or 'event'
+    target_id = db.Column(db.Integer, nullable=False)
+    spool_path = db.Column(db.String(500), nullable=False)
+
+    # Status: Pending -> Uploading -> Done (or Failed)
+    status = db.Column(db.String(20), default='Pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# --- 12. SCHEDULED JOBS ---
+class ScheduledJob(db.Model):
+    """
+    Work that must happen at a given time (e.g. publishing a scheduled story).
+    Run by 'flask scheduler'; rows are claimed with SKIP LOCKED so several
+    nodes can run the scheduler without double-running a job.
+    """
+    __tablename__ = 'scheduled_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)           # Handler, e.g. 'publish_story'
+    key = db.Column(db.String(100), index=True)               # e.g. 'publish_story:42' (reschedule/cancel by key)
+    payload = db.Column(db.Text)                              # JSON kwargs for the handler
+    run_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    # Status: Pending -> Running -> Done (or Failed / Cancelled)
+    status = db.Column(db.String(20), default='Pending', nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text)
+
+    locked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+
+# --- 13. DAILY STATS ROLLUP ---
+class DailyStat(db.Model):
+    """
+    Per-day totals for the admin dashboards, filled by the 'rollup_daily_stats'
+    scheduler job (see stats.py). One row per (day, metric, currency):
+      new_users          count               currency ''
+      donations          count, amount       successful donations, per currency
+      donations_monthly  count, amount       the monthly ones among them
+    Every rolled-up day has a new_users row (0 if nobody signed up), so
+    MAX(day) of that metric is how far the rollup has got.
+    """
+    __tablename__ = 'daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    metric = db.Column(db.String(30), primary_key=True)
+    currency = db.Column(db.String(3), primary_key=True, default='')
+    count = db.Column(db.Integer, default=0, nullable=False)
+    amount = db.Column(db.Float, default=0.0, nullable=False)
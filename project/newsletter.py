@@ -0,0 +1,174 @@
+# project/newsletter.py
+import re
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_mail import Message
+from markupsafe import escape
+from urllib.parse import quote
+
+from .extension import db, mail
+from .model import NewsletterSubscriber, NewsletterSend
+
+
+newsletter_cli = AppGroup('newsletter', help='Bulk newsletter delivery.')
+
+
+# --- 1. CREATE A SEND ---
+def create_send(subject, body_html):
+    """Records a newsletter blast. Deliver it with 'flask newsletter send <id>'."""
+    send = NewsletterSend(subject=subject, body_html=body_html)
+    db.session.add(send)
+    db.session.commit()
+    return send
+
+
+# --- 2. DELIVERY ENGINE ---
+class RateLimiter:
+    """Spaces calls out to at most `rate` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+
+
+# href="..." / src="..." attribute values, where '{email}' must be URL-quoted
+URL_ATTRIBUTE = re.compile(r"""((?:href|src)\s*=\s*)("[^"]*"|'[^']*')""", re.IGNORECASE)
+
+
+def personalize(body_html, email):
+    """Fills '{email}': URL-quoted inside links (unsubscribe?email=...), HTML-escaped everywhere else."""
+    quoted = quote(email, safe='@')
+    body_html = URL_ATTRIBUTE.sub(lambda m: m.group(1) + m.group(2).replace('{email}', quoted), body_html)
+    return body_html.replace('{email}', str(escape(email)))
+
+
+def _personalized_message(send, email):
+    msg = Message(
+        subject=send.subject,
+        sender=current_app.config.get('NEWSLETTER_SENDER') or current_app.config.get('MAIL_DEFAULT_SENDER'),
+        recipients=[email]   # One recipient per message, no BCC
+    )
+    msg.html = personalize(send.body_html, email)
+    return msg
+
+
+def run_send(send_id, rate=None, batch_size=None, force=False):
+    """
+    Streams active subscribers in id order (keyset batches, never the whole
+    table) and sends one message each at `rate` messages/sec.
+
+    The checkpoint is committed BEFORE each message goes out, so a crash
+    can at worst skip the one recipient in flight - it never sends twice.
+    """
+    config = current_app.config
+    rate = rate or config.get('NEWSLETTER_RATE', 5)
+    batch_size = batch_size or config.get('NEWSLETTER_BATCH_SIZE', 200)
+
+    # 1. Claim the send (row lock so two runners can't both start it)
+    send = NewsletterSend.query.filter_by(id=send_id).with_for_update().first()
+    if not send:
+        raise click.ClickException(f'Newsletter send #{send_id} not found.')
+    if send.status == 'Done':
+        click.echo(f'Newsletter send #{send_id} is already done.')
+        db.session.rollback()
+        return send
+
+    stale = datetime.utcnow() - timedelta(seconds=config.get('NEWSLETTER_STALE_SECONDS', 120))
+    if send.status == 'Running' and send.heartbeat_at and send.heartbeat_at > stale and not force:
+        db.session.rollback()
+        raise click.ClickException(f'Newsletter send #{send_id} is running elsewhere (use --force if that runner is dead).')
+
+    if send.status == 'Pending':
+        send.started_at = datetime.utcnow()
+    else:
+        click.echo(f'Resuming after subscriber #{send.last_subscriber_id}.')
+    send.status = 'Running'
+    send.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+
+    limiter = RateLimiter(rate)
+    started = time.monotonic()
+    processed = 0
+    last_id = send.last_subscriber_id
+
+    # 2. Keyset batches: WHERE id > last_id ORDER BY id LIMIT n
+    while True:
+        # Plain (id, email) tuples: nothing to expire when we commit
+        batch = db.session.query(NewsletterSubscriber.id, NewsletterSubscriber.email).filter(
+            NewsletterSubscriber.is_active == True,
+            NewsletterSubscriber.id > last_id
+        ).order_by(NewsletterSubscriber.id).limit(batch_size).all()
+
+        if not batch:
+            break
+
+        for subscriber_id, email in batch:
+            # Checkpoint first (at-most-once delivery)
+            last_id = subscriber_id
+            send.last_subscriber_id = last_id
+            send.heartbeat_at = datetime.utcnow()
+            db.session.commit()
+
+            limiter.wait()
+            try:
+                mail.send(_personalized_message(send, email))
+                send.sent_count += 1
+            except Exception as e:
+                # One bad address doesn't stop the blast
+                send.failed_count += 1
+                print(f"Newsletter #{send.id}: failed for {email}: {e}")
+            processed += 1
+
+        # 3. Throughput report
+        elapsed = time.monotonic() - started
+        click.echo(
+            f'Newsletter #{send.id}: {send.sent_count} sent, {send.failed_count} failed, '
+            f'{processed / elapsed if elapsed else 0:.1f} msg/s'
+        )
+
+    send.status = 'Done'
+    send.finished_at = datetime.utcnow()
+    db.session.commit()
+    return send
+
+
+# --- 3. CLI ---
+@newsletter_cli.command('send')
+@click.argument('send_id', type=int)
+@click.option('--rate', type=float, default=None, help='Messages per second (default: NEWSLETTER_RATE).')
+@click.option('--batch-size', type=int, default=None, help='Subscribers loaded per query.')
+@click.option('--force', is_flag=True, help='Take over a send whose runner looks alive.')
+def send_command(send_id, rate, batch_size, force):
+    """Deliver (or resume) a newsletter send."""
+    send = run_send(send_id, rate=rate, batch_size=batch_size, force=force)
+    click.echo(f'Newsletter #{send.id}: {send.status} ({send.sent_count} sent, {send.failed_count} failed).')
+
+
+@newsletter_cli.command('resume')
+@click.option('--rate', type=float, default=None)
+def resume_command(rate):
+    """Resume every unfinished newsletter send."""
+    pending = NewsletterSend.query.filter(NewsletterSend.status != 'Done').order_by(NewsletterSend.id).all()
+    for send in pending:
+        try:
+            run_send(send.id, rate=rate)
+        except click.ClickException as e:
+            click.echo(e.message)
+
+
+@newsletter_cli.command('status')
+def status_command():
+    """List newsletter sends and their progress."""
+    for send in NewsletterSend.query.order_by(NewsletterSend.id.desc()).limit(20).all():
+        click.echo(f'#{send.id} [{send.status}] {send.subject!r}: {send.sent_count} sent, '
+                   f'{send.failed_count} failed, checkpoint={send.last_subscriber_id}')
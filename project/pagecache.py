@@ -0,0 +1,369 @@
+# project/pagecache.py
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, g, request, session, make_response
+from flask_login import current_user
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy import event
+
+
+# --- RESPONSE CACHE FOR PUBLIC PAGES ---
+# Anonymous visitors all see the same index/stories/events/... pages, so the
+# rendered response is stored and replayed:
+#
+#   @main_routes.route('/stories')
+#   @page_cache.cached('story', args=('category',))
+#   def stories(): ...
+#
+# Key = endpoint + the query args the route lists in args= + auth state. A
+# request with any other arg (?junk=1, utm_source...) skips the cache, so
+# nobody can fill it with made-up URLs. Only anonymous GETs are served
+# from / stored in the cache (logged-in pages show per-user bits).
+#
+# Invalidation is by tag: committing a change to a Story/Event/Campaign (admin
+# routes, webhooks, CLI...) drops every entry carrying that tag. See
+# TAGGED_MODELS at the bottom.
+#
+# The invalidation runs in the process that commits. The default 'sqlite'
+# backend is one file shared by every gunicorn worker, the scheduler, the
+# email worker and the CLI on this host, so all of them see it. 'lru' only
+# drops the committing process's own entries - use it for a single process
+# (tests, 'flask run'). Web nodes on different hosts each have their own
+# file: there a change made on another host shows up after PAGE_CACHE_TTL.
+#
+# CSRF tokens are punched out of the stored HTML and re-filled per visitor,
+# so cached forms still post correctly.
+
+CSRF_PLACEHOLDER = b'__PAGE_CACHE_CSRF__'
+
+
+# --- 1. BACKENDS ---
+class LRUBackend:
+    """In-process cache, evicts least recently used entries above max_bytes."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (expires, tags, value, size)
+        self._tags = {}                # tag -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[2]
+
+    def set(self, key, value, ttl, tags=()):
+        # Captured pages by their body; fragments (status counts, ...) by their pickled size
+        captured = isinstance(value, dict) and 'body' in value
+        size = len(value['body']) if captured else len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.time() + ttl, tuple(tags), value, size)
+            self.size += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.pop(tag, ())):
+                    self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self.size = 0
+
+    def _drop(self, key):
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        self.size -= item[3]
+        for tag in item[1]:
+            keys = self._tags.get(tag)
+            if keys:
+                keys.discard(key)
+
+
+class SQLiteBackend:
+    """
+    Shared by every worker on the machine via one SQLite file. Every
+    prune_every writes, expired entries go and the oldest are evicted down to max_bytes.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires REAL, value BLOB)',
+        'CREATE TABLE IF NOT EXISTS tags (tag TEXT, key TEXT)',
+        'CREATE INDEX IF NOT EXISTS ix_tags_tag ON tags (tag)',
+    )
+
+    def __init__(self, path, max_bytes=32 * 1024 * 1024, prune_every=200):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        # One connection per thread (and per process after a fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value FROM entries WHERE key = ? AND expires > ?', (key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl, tags=()):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', (key, time.time() + ttl, data))
+            conn.execute('DELETE FROM tags WHERE key = ?', (key,))
+            conn.executemany('INSERT INTO tags VALUES (?, ?)', [(tag, key) for tag in tags])
+
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        """Drops expired entries, then the oldest written ones until the rest fit in max_bytes."""
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM entries WHERE expires <= ?', (time.time(),))
+            # REPLACE gives a rewritten entry a new rowid, so rowid order is write order
+            total = 0
+            for rowid, size in conn.execute('SELECT rowid, length(value) FROM entries ORDER BY rowid DESC'):
+                total += size
+                if total > self.max_bytes:
+                    conn.execute('DELETE FROM entries WHERE rowid <= ?', (rowid,))
+                    break
+            conn.execute('DELETE FROM tags WHERE key NOT IN (SELECT key FROM entries)')
+
+    def invalidate(self, tags):
+        tags = list(tags)
+        if not tags:
+            return
+        marks = ','.join('?' * len(tags))
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(f'DELETE FROM entries WHERE key IN (SELECT key FROM tags WHERE tag IN ({marks}))', tags)
+            conn.execute(f'DELETE FROM tags WHERE tag IN ({marks})', tags)
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM entries')
+            conn.execute('DELETE FROM tags')
+
+
+# --- 2. EXTENSION ---
+class PageCache:
+    def __init__(self, app=None):
+        self.app = app
+        self.stats = {}  # endpoint -> {'hit': n, 'miss': n, 'bypass': n} (per worker)
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        kind = config.get('PAGE_CACHE_BACKEND', 'sqlite')
+        max_bytes = config.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+        if kind == 'lru':
+            self.backend = LRUBackend(max_bytes)
+        else:
+            path = config.get('PAGE_CACHE_PATH') or os.path.join(app.instance_path, 'page_cache.sqlite3')
+            self.backend = SQLiteBackend(path, max_bytes)
+        self.enabled = config.get('PAGE_CACHE_ENABLED', True)
+        self.default_ttl = config.get('PAGE_CACHE_TTL', 300)
+        app.extensions['page_cache'] = self
+
+        from .extension import db
+        register_invalidation(db.session)
+
+    # --- Counters ---
+    def _count(self, endpoint, outcome):
+        with self._stats_lock:
+            counters = self.stats.setdefault(endpoint, {'hit': 0, 'miss': 0, 'bypass': 0})
+            counters[outcome] += 1
+
+    def cache_stats(self):
+        """Per-endpoint counters with a hit rate, for the admin settings page."""
+        with self._stats_lock:
+            rows = {}
+            for endpoint, counters in sorted(self.stats.items()):
+                lookups = counters['hit'] + counters['miss']
+                rows[endpoint] = dict(counters, hit_rate=round(100 * counters['hit'] / lookups, 1) if lookups else 0.0)
+            return rows
+
+    # --- Keys ---
+    def _page_key(self):
+        args = urlencode(sorted(request.args.items(multi=True)))
+        auth = 'user' if current_user.is_authenticated else 'anon'
+        return f'page:{request.endpoint}?{args}|{auth}'
+
+    def _cacheable_request(self, allowed_args):
+        return (
+            self.enabled
+            and request.method in ('GET', 'HEAD')
+            and not current_user.is_authenticated
+            and not session.get('_flashes')  # A pending flash message is personal
+            and all(name in allowed_args for name in request.args)
+        )
+
+    # --- Full pages ---
+    def cached(self, *tags, ttl=None, args=()):
+        """Route decorator: serve anonymous GETs from the cache. `args`: the query args the page reads."""
+        allowed_args = frozenset(args)
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*view_args, **kwargs):
+                endpoint = request.endpoint
+                if not self._cacheable_request(allowed_args):
+                    self._count(endpoint, 'bypass')
+                    return view(*view_args, **kwargs)
+
+                key = self._page_key()
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self._count(endpoint, 'hit')
+                    return self._replay(entry)
+
+                self._count(endpoint, 'miss')
+                response = make_response(view(*view_args, **kwargs))
+                entry = self._capture(response)
+                if entry is not None:
+                    self.backend.set(key, entry, ttl or self.default_ttl, tags)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def _capture(self, response):
+        if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+            return None
+
+        body = response.get_data()
+        token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if token:
+            body = body.replace(token.encode(), CSRF_PLACEHOLDER)
+        return {'body': body, 'mimetype': response.mimetype}
+
+    def _replay(self, entry):
+        body = entry['body']
+        if CSRF_PLACEHOLDER in body:
+            body = body.replace(CSRF_PLACEHOLDER, generate_csrf().encode())
+        response = current_app.response_class(body, mimetype=entry['mimetype'])
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    # --- Fragments (any picklable value) ---
+    def fragment(self, key, builder, tags=(), ttl=None):
+        """Returns the cached value for `key`, calling builder() on a miss."""
+        if not self.enabled:
+            return builder()
+        key = f'fragment:{key}'
+        value = self.backend.get(key)
+        if value is None:
+            value = builder()
+            self.backend.set(key, value, ttl or self.default_ttl, tags)
+        return value
+
+    # --- Invalidation ---
+    def invalidate(self, *tags):
+        self.backend.invalidate(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+
+# --- 3. AUTOMATIC INVALIDATION ---
+# Model name -> cache tags. A commit touching any of these (ORM objects or
+# bulk UPDATE/DELETE like Donation.mark_success) invalidates those tags.
+TAGGED_MODELS = {
+    'Story': ('story',),
+    'Event': ('event',),
+    'EventRSVP': ('event',),
+    'Campaign': ('campaign',),
+    # Admin status counters only (statuscounts.py), no public page uses these
+    'PartnerApplication': ('partner',),
+    'VolunteerApplication': ('volunteer',),
+    'MentorshipApplication': ('mentorship',),
+}
+
+
+def _pending_tags(session):
+    return session.info.setdefault('page_cache_tags', set())
+
+
+def _collect_from_flush(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        _pending_tags(session).update(TAGGED_MODELS.get(type(obj).__name__, ()))
+
+
+def _collect_from_bulk(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        for mapper in orm_execute_state.all_mappers:
+            _pending_tags(orm_execute_state.session).update(TAGGED_MODELS.get(mapper.class_.__name__, ()))
+
+
+def _invalidate_after_commit(session):
+    tags = session.info.pop('page_cache_tags', None)
+    if tags:
+        cache = current_app.extensions.get('page_cache')
+        if cache is not None:
+            cache.invalidate(*tags)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop('page_cache_tags', None)
+
+
+LISTENERS = (
+    ('before_flush', _collect_from_flush),
+    ('do_orm_execute', _collect_from_bulk),
+    ('after_commit', _invalidate_after_commit),
+    ('after_soft_rollback', _discard_after_rollback),
+)
+
+
+def register_invalidation(session):
+    for name, listener in LISTENERS:
+        if not event.contains(session, name, listener):
+            event.listen(session, name, listener)
@@ -0,0 +1,165 @@
+# project/payment_gateway.py
+import os
+import threading
+import time
+import uuid
+
+import requests
+import stripe
+from requests.adapters import HTTPAdapter
+
+from .metrics import track_call
+
+
+# --- PAYMENT GATEWAY (thin wrapper around Stripe) ---
+# Routes call this instead of the global `stripe` module so that every call
+# gets:
+#   - a pooled HTTP connection (one requests.Session per worker process)
+#   - its own connect/read timeout (instead of Stripe's 80s default)
+#   - a bounded number of network retries, each with an idempotency key
+#   - a circuit breaker: after several failures in a row we stop calling
+#     Stripe for a while and fail fast instead of tying up every worker
+
+
+class PaymentGatewayUnavailable(Exception):
+    """Raised instead of calling Stripe while the circuit is open."""
+
+
+# Errors that mean "Stripe is unhealthy" (as opposed to "our request was bad")
+TRANSIENT_ERRORS = (stripe.APIConnectionError, stripe.APIError, stripe.RateLimitError)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False  # Half-open: a trial request is in flight
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        # Open -> fail fast. Half-open -> let ONE trial request through; the
+        # others keep failing fast until it has succeeded or failed.
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.probing:
+                raise PaymentGatewayUnavailable('Stripe is temporarily unavailable')
+            self.probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def release(self):
+        # The call ended without telling us anything about Stripe's health
+        with self._lock:
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.probing = False
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                # (Re)open: also covers a failed half-open trial
+                self.opened_at = time.monotonic()
+
+
+class PaymentGateway:
+    def __init__(self, app=None):
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.api_key = config.get('STRIPE_SECRET_KEY') or stripe.api_key
+        self.api_base = config.get('STRIPE_API_BASE')  # e.g. a local fake Stripe server
+        self.connect_timeout = config.get('STRIPE_CONNECT_TIMEOUT', 3)
+        self.timeouts = config.get('STRIPE_TIMEOUTS', {})
+        self.default_timeout = config.get('STRIPE_READ_TIMEOUT', 10)
+        self.max_retries = config.get('STRIPE_MAX_RETRIES', 2)
+        self.pool_size = config.get('STRIPE_POOL_SIZE', 10)
+        self.breaker = CircuitBreaker(
+            failure_threshold=config.get('STRIPE_BREAKER_THRESHOLD', 5),
+            reset_timeout=config.get('STRIPE_BREAKER_RESET', 30)
+        )
+
+        self._clients = {}
+        self._pid = None
+        self._lock = threading.Lock()
+        app.extensions['payment_gateway'] = self
+
+    # --- 1. CLIENTS ---
+    def _client(self, operation):
+        read_timeout = self.timeouts.get(operation, self.default_timeout)
+
+        with self._lock:
+            # New process (gunicorn fork) -> don't share the parent's sockets
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
+                self._clients = {}
+
+            # One StripeClient per timeout value, all sharing the same pool
+            client = self._clients.get(read_timeout)
+            if client is None:
+                http_client = stripe.RequestsClient(
+                    timeout=(self.connect_timeout, read_timeout),
+                    session=self._session
+                )
+                client = stripe.StripeClient(
+                    self.api_key,
+                    http_client=http_client,
+                    max_network_retries=self.max_retries,
+                    base_addresses={'api': self.api_base} if self.api_base else None
+                )
+                self._clients[read_timeout] = client
+            return client
+
+    def _call(self, operation, fn):
+        self.breaker.before_call()
+        try:
+            with track_call('stripe', operation):
+                result = fn(self._client(operation))
+        except TRANSIENT_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.release()  # e.g. a bad request: the next call may probe
+            raise
+        self.breaker.record_success()
+        return result
+
+    # --- 2. OPERATIONS ---
+    def create_checkout_session(self, params):
+        # Same key on every retry of this call, so Stripe never creates two sessions
+        options = {'idempotency_key': f'checkout-{uuid.uuid4()}'}
+        return self._call(
+            'create_checkout_session',
+            lambda client: client.v1.checkout.sessions.create(params=params, options=options)
+        )
+
+    def cancel_subscription(self, subscription_id):
+        options = {'idempotency_key': f'cancel-{subscription_id}'}
+        return self._call(
+            'cancel_subscription',
+            lambda client: client.v1.subscriptions.update(
+                subscription_id, params={'cancel_at_period_end': True}, options=options
+            )
+        )
@@ -0,0 +1,118 @@
+# project/payments.py
+from sqlalchemy.exc import IntegrityError
+
+from .extension import db
+from .model import Donation, StripeEvent
+
+
+# --- STRIPE WEBHOOK PROCESSING ---
+# Stripe tells us about payments here, so a donation is confirmed even if the
+# donor closes the tab before reaching /donation/success.
+
+
+def _subscription_id(invoice):
+    # Older API versions put it on the invoice, newer ones under 'parent'
+    sub_id = invoice.get('subscription')
+    if not sub_id:
+        parent = invoice.get('parent') or {}
+        sub_id = (parent.get('subscription_details') or {}).get('subscription')
+    return sub_id
+
+
+def handle_checkout_completed(session):
+    donation = Donation.query.filter_by(reference=session['id']).first()
+    if not donation:
+        print(f"Stripe webhook: no donation for session {session['id']}")
+        return
+
+    sub_id = session.get('subscription')
+    if sub_id:
+        # CASE 1: Recurring Subscription
+        donation.status = 'Active'
+        donation.stripe_subscription_id = sub_id
+        donation.stripe_customer_id = session.get('customer')
+        donation.frequency = 'monthly'
+    elif session.get('payment_status') in ('paid', 'no_payment_required'):
+        # CASE 2: One-Time Donation (also updates campaign totals, once)
+        donation.mark_success()
+
+
+def handle_invoice_paid(invoice):
+    sub_id = _subscription_id(invoice)
+    if not sub_id:
+        return
+
+    # The first invoice is the checkout itself (handled above)
+    if invoice.get('billing_reason') == 'subscription_create':
+        return
+
+    parent = Donation.query.filter_by(stripe_subscription_id=sub_id)\
+        .order_by(Donation.created_at).first()
+    if not parent:
+        print(f"Stripe webhook: no subscription donation for {sub_id}")
+        return
+
+    # Each renewal becomes its own donation row (reference = invoice id)
+    if Donation.query.filter_by(reference=invoice['id']).first():
+        return
+
+    renewal = Donation(
+        user_id=parent.user_id,
+        guest_email=parent.guest_email,
+        guest_name=parent.guest_name,
+        amount=(invoice.get('amount_paid') or 0) / 100,
+        currency=(invoice.get('currency') or parent.currency or 'cad').upper(),
+        frequency='monthly',
+        stripe_subscription_id=sub_id,
+        stripe_customer_id=invoice.get('customer') or parent.stripe_customer_id,
+        reference=invoice['id'],
+        status='Pending',
+        campaign_id=parent.campaign_id
+    )
+    db.session.add(renewal)
+    db.session.flush()
+    renewal.mark_success()
+
+
+def handle_subscription_deleted(subscription):
+    Donation.query.filter_by(
+        stripe_subscription_id=subscription['id'],
+        status='Active'
+    ).update({Donation.status: 'Cancelled'}, synchronize_session=False)
+
+
+HANDLERS = {
+    'checkout.session.completed': handle_checkout_completed,
+    'checkout.session.async_payment_succeeded': handle_checkout_completed,
+    'invoice.paid': handle_invoice_paid,
+    'customer.subscription.deleted': handle_subscription_deleted,
+}
+
+
+def process_event(event):
+    """
+    Applies a verified Stripe event exactly once.
+    Returns False if we've already seen it. Raises on handler errors so the
+    route answers 500 and Stripe retries later.
+    """
+    if db.session.get(StripeEvent, event['id']):
+        return False
+
+    # Recording the id in the same transaction as the changes means a
+    # crash can't leave an event half-applied or applied twice.
+    db.session.add(StripeEvent(id=event['id'], type=event['type']))
+
+    handler = HANDLERS.get(event['type'])
+    try:
+        if handler:
+            handler(event['data']['object'])
+        db.session.commit()
+    except IntegrityError:
+        # Another worker applied the same event at the same moment
+        db.session.rollback()
+        return False
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return True
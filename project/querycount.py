@@ -0,0 +1,152 @@
+# project/querycount.py
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# --- QUERY COUNTER / N+1 DETECTOR ---
+# Counts the SQL statements each request runs (every engine, via the
+# before_cursor_execute event).
+#
+#   - Debug mode: adds an X-Query-Count header and logs a warning when the
+#     same statement shape runs QUERY_N_PLUS_ONE_THRESHOLD+ times in one
+#     request - usually a lazy load per row in a template (story.author,
+#     donation.user, event.rsvps|length...).
+#
+#   - Budgets: routes declare how many statements they may run,
+#
+#       @admin_route.route('/manage-stories')
+#       @query_counter.budget(12)
+#       @login_required
+#       def manage_stories(): ...
+#
+#     Going over is logged (or raises QueryBudgetExceeded with
+#     QUERY_BUDGET_STRICT, e.g. in tests). 'python scripts/check_query_budgets.py'
+#     runs every budgeted page against a seeded database for CI.
+#
+#   - Tests / scripts: `with query_counter.capture() as queries: ...` records
+#     the statements run inside the block, in or out of a request.
+#
+# The budget is checked when the request context is torn down. A streamed
+# response (CSV exports) runs its queries after that, so it calls
+# defer_check() in the view and end_deferred() when the stream ends; the
+# check then happens at the teardown that follows the last chunk.
+
+_PLACEHOLDER = r'(?:\?|%s|%\(\w+\)s|:\w+)'
+_IN_LIST = re.compile(r'\(\s*' + _PLACEHOLDER + r'(?:\s*,\s*' + _PLACEHOLDER + r')+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_shape(statement):
+    """The statement with IN (?, ?, ?...) lists folded, so per-row repeats compare equal."""
+    return _SPACES.sub(' ', _IN_LIST.sub('(?)', statement)).strip()
+
+
+class QueryCounter:
+    def __init__(self, app=None):
+        self.app = app
+        self._captures = threading.local()  # Active capture() lists for this thread
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('QUERY_N_PLUS_ONE_THRESHOLD', 5)
+        app.config.setdefault('QUERY_BUDGET_STRICT', False)
+        app.extensions['query_counter'] = self
+
+        if not event.contains(Engine, 'before_cursor_execute', self._record):
+            event.listen(Engine, 'before_cursor_execute', self._record)
+        app.after_request(self._add_header)
+        app.teardown_request(self._check_request)
+
+    # --- 1. RECORDING ---
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        for queries in getattr(self._captures, 'stack', ()):
+            queries.append(statement)
+        if has_request_context():
+            g.setdefault('_queries', []).append(statement)
+
+    @contextmanager
+    def capture(self):
+        """with query_counter.capture() as queries: ... -> list of SQL strings"""
+        stack = self._captures.__dict__.setdefault('stack', [])
+        queries = []
+        stack.append(queries)
+        try:
+            yield queries
+        finally:
+            stack.remove(queries)
+
+    @contextmanager
+    def assert_max(self, limit, label='block'):
+        """Fails with QueryBudgetExceeded if the block runs more than `limit` statements."""
+        with self.capture() as queries:
+            yield queries
+        if len(queries) > limit:
+            raise QueryBudgetExceeded(self.describe(label, queries, limit))
+
+    # --- 2. BUDGETS ---
+    def budget(self, limit):
+        """Route decorator: the most statements this endpoint should ever run."""
+        def decorator(view):
+            view.query_budget = limit
+            return view
+        return decorator
+
+    def budget_for(self, endpoint):
+        view = current_app.view_functions.get(endpoint)
+        return getattr(view, 'query_budget', None)
+
+    def defer_check(self):
+        """Streamed response: keep counting past the first teardown, until end_deferred()."""
+        g._query_check_deferred = True
+
+    def end_deferred(self):
+        g.pop('_query_check_deferred', None)
+
+    # --- 3. REPORTING ---
+    def repeated_shapes(self, queries, threshold=None):
+        """[(count, shape)] for statements that ran `threshold`+ times, most first."""
+        threshold = threshold or current_app.config['QUERY_N_PLUS_ONE_THRESHOLD']
+        counts = Counter(statement_shape(q) for q in queries)
+        return [(n, shape) for shape, n in counts.most_common() if n >= threshold]
+
+    def describe(self, label, queries, limit=None):
+        lines = [f'{label} ran {len(queries)} queries' + (f' (budget {limit})' if limit is not None else '')]
+        for n, shape in self.repeated_shapes(queries):
+            lines.append(f'  {n}x {shape[:300]}')
+        return '\n'.join(lines)
+
+    def _add_header(self, response):
+        if current_app.debug:
+            # Streamed responses may run more queries after this point
+            response.headers['X-Query-Count'] = str(len(g.get('_queries', ())))
+        return response
+
+    def _check_request(self, exc):
+        if g.get('_query_check_deferred'):
+            return  # Still streaming
+        queries = g.pop('_queries', None)
+        if not queries or request.endpoint is None:
+            return
+
+        label = f'{request.method} {request.path} ({request.endpoint})'
+        limit = self.budget_for(request.endpoint)
+        if limit is not None and len(queries) > limit:
+            message = self.describe(label, queries, limit)
+            if current_app.config['QUERY_BUDGET_STRICT']:
+                raise QueryBudgetExceeded(message)
+            current_app.logger.warning('Query budget exceeded: %s', message)
+
+        elif current_app.debug and self.repeated_shapes(queries):
+            current_app.logger.warning('Possible N+1: %s', self.describe(label, queries))
@@ -0,0 +1,216 @@
+# project/scheduler.py
+import json
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import or_, and_, func
+
+from . import stats
+from .extension import db
+from .model import ScheduledJob, Story
+
+
+# --- JOB SCHEDULER ---
+# Routes call schedule() to record "run <handler> at <time>" in the
+# scheduled_jobs table. The 'flask scheduler' process sleeps until the next
+# job is due, claims it (SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+# nodes can run the scheduler) and calls the handler.
+#
+# Handlers commit through the normal session, so the page cache tags of
+# whatever they change are invalidated automatically (see pagecache.py).
+# The default 'sqlite' page cache backend is shared with the web workers on
+# the same host, so a published story shows up there at once.
+
+HANDLERS = {}
+RECURRING = {}  # name -> next_run(): when to queue the job again after it finishes
+
+
+def job(name, next_run=None):
+    """
+    Registers a handler: @job('publish_story') def publish_story(story_id): ...
+    With next_run, the job is queued again (key=name) once it ends, Done or Failed.
+    """
+    def decorator(fn):
+        HANDLERS[name] = fn
+        if next_run:
+            RECURRING[name] = next_run
+        return fn
+    return decorator
+
+
+# --- 1. SCHEDULING (called from routes). Caller commits. ---
+def schedule(name, run_at, key=None, **payload):
+    """Adds a job, or moves the pending job with the same key to the new time."""
+    existing = None
+    if key:
+        existing = ScheduledJob.query.filter_by(key=key, status='Pending').first()
+
+    if existing:
+        existing.run_at = run_at
+        existing.payload = json.dumps(payload)
+        return existing
+
+    scheduled = ScheduledJob(name=name, key=key, run_at=run_at, payload=json.dumps(payload))
+    db.session.add(scheduled)
+    return scheduled
+
+
+def cancel(key):
+    ScheduledJob.query.filter_by(key=key, status='Pending').update({'status': 'Cancelled'})
+
+
+# --- 2. HANDLERS ---
+@job('publish_story')
+def publish_story(story_id):
+    story = Story.query.filter_by(id=story_id).with_for_update().first()
+
+    # The admin may have unscheduled, published or moved it since
+    if not story or story.status != 'Scheduled' or not story.scheduled_for:
+        return
+    if story.scheduled_for > datetime.utcnow():
+        schedule('publish_story', story.scheduled_for, key=f'publish_story:{story.id}', story_id=story.id)
+        return
+
+    story.status = 'Published'
+    print(f"Published scheduled story #{story.id} ({story.title})")
+
+
+def schedule_story(story):
+    """Keeps the publish job in sync with a story's status. Story needs an id."""
+    key = f'publish_story:{story.id}'
+    if story.status == 'Scheduled' and story.scheduled_for:
+        schedule('publish_story', story.scheduled_for, key=key, story_id=story.id)
+    else:
+        cancel(key)
+
+
+def backfill_story_jobs():
+    """Creates jobs for Scheduled stories that have none (e.g. saved before the scheduler existed)."""
+    has_job = db.session.query(ScheduledJob.key).filter(ScheduledJob.status == 'Pending')
+    keys = {key for (key,) in has_job}
+
+    added = 0
+    for story in Story.query.filter(Story.status == 'Scheduled', Story.scheduled_for.isnot(None)):
+        if f'publish_story:{story.id}' not in keys:
+            schedule_story(story)
+            added += 1
+    db.session.commit()
+    return added
+
+
+def after_midnight():
+    # Daily, a few minutes after midnight UTC
+    tomorrow = datetime.utcnow().date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()) + timedelta(minutes=5)
+
+
+@job('rollup_daily_stats', next_run=after_midnight)
+def rollup_daily_stats():
+    # A failed night is caught up by the next run (rollup() starts after the last rolled-up day)
+    days = stats.rollup()
+    print(f"Rolled up daily stats ({days} day(s))")
+
+
+def ensure_rollup_job():
+    """Starts the daily rollup chain (right away) if it isn't queued."""
+    queued = ScheduledJob.query.filter(ScheduledJob.key == 'rollup_daily_stats',
+                                       ScheduledJob.status.in_(['Pending', 'Running'])).first()
+    if not queued:
+        schedule('rollup_daily_stats', datetime.utcnow(), key='rollup_daily_stats')
+        db.session.commit()
+
+
+# --- 3. RUNNER ---
+def claim_due(limit=20):
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config.get('SCHEDULER_CLAIM_TIMEOUT', 300))
+
+    jobs = ScheduledJob.query.filter(or_(
+        and_(ScheduledJob.status == 'Pending', ScheduledJob.run_at <= now),
+        and_(ScheduledJob.status == 'Running', ScheduledJob.locked_at < stale)
+    )).order_by(ScheduledJob.run_at, ScheduledJob.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    for claimed in jobs:
+        claimed.status = 'Running'
+        claimed.locked_at = now
+    db.session.commit()
+
+    return [claimed.id for claimed in jobs]
+
+
+def _requeue(scheduled):
+    next_run = RECURRING.get(scheduled.name)
+    if next_run:
+        schedule(scheduled.name, next_run(), key=scheduled.name)
+
+
+def run_job(job_id):
+    scheduled = db.session.get(ScheduledJob, job_id)
+    if not scheduled or scheduled.status != 'Running':
+        return
+
+    try:
+        handler = HANDLERS[scheduled.name]
+        handler(**json.loads(scheduled.payload or '{}'))
+        scheduled.status = 'Done'
+        scheduled.finished_at = datetime.utcnow()
+        scheduled.last_error = None
+        _requeue(scheduled)
+        db.session.commit()
+        return
+
+    except Exception as e:
+        db.session.rollback()
+        scheduled = db.session.get(ScheduledJob, job_id)
+        scheduled.attempts += 1
+        scheduled.last_error = str(e)[:1000]
+        if scheduled.attempts >= current_app.config.get('SCHEDULER_MAX_ATTEMPTS', 5):
+            scheduled.status = 'Failed'
+            _requeue(scheduled)
+            print(f"❌ Job #{scheduled.id} ({scheduled.name}) failed for good: {e}")
+        else:
+            scheduled.status = 'Pending'
+            scheduled.run_at = datetime.utcnow() + timedelta(seconds=30 * (2 ** (scheduled.attempts - 1)))
+            print(f"Job #{scheduled.id} ({scheduled.name}) failed (attempt {scheduled.attempts}), retrying later: {e}")
+
+    scheduled.locked_at = None
+    db.session.commit()
+
+
+def seconds_until_next(max_sleep):
+    next_run = db.session.query(func.min(ScheduledJob.run_at)).filter(ScheduledJob.status == 'Pending').scalar()
+    db.session.rollback()  # Don't hold a snapshot open while sleeping
+    if next_run is None:
+        return max_sleep
+    return max(0.0, min(max_sleep, (next_run - datetime.utcnow()).total_seconds()))
+
+
+@click.command('scheduler')
+@click.option('--max-sleep', type=float, default=None, help='Longest nap between checks (default: SCHEDULER_MAX_SLEEP).')
+@click.option('--once', is_flag=True, help='Run what is due right now, then exit.')
+@with_appcontext
+def scheduler_command(max_sleep, once):
+    """Run scheduled jobs (story publishing, daily stats rollup, ...) when they are due."""
+    max_sleep = max_sleep or current_app.config.get('SCHEDULER_MAX_SLEEP', 5)
+
+    added = backfill_story_jobs()
+    if added:
+        click.echo(f'Scheduled {added} story(ies) that had no publish job.')
+    ensure_rollup_job()
+    click.echo('Scheduler started.')
+
+    while True:
+        ids = claim_due()
+        for job_id in ids:
+            run_job(job_id)
+        if ids:
+            click.echo(f'Ran {len(ids)} job(s).')
+            continue
+
+        if once:
+            break
+        # Wake up exactly when the next job is due (new jobs are noticed within max_sleep)
+        time.sleep(seconds_until_next(max_sleep))
@@ -0,0 +1,181 @@
+# project/siteconfig.py
+import json
+import time
+import threading
+
+from flask import current_app, g
+from sqlalchemy.exc import IntegrityError
+
+from .extension import db
+from .model import SiteConfig
+
+
+# --- SITE CONFIGURATION SERVICE ---
+# All SiteConfig rows are loaded in ONE query into a typed snapshot that each
+# worker keeps in memory. A special '_version' row is bumped on every write,
+# so a worker only reloads when that number changes.
+#
+# Cost per request:
+#   - inside SITE_CONFIG_TTL  -> no query at all
+#   - after the TTL expires   -> one cheap SELECT of the version row
+#   - version changed         -> one SELECT of all rows
+# and never more than one version check per request (memoised on flask.g).
+#
+# NOTE: Always write through set_value(). Editing rows by hand won't bump the
+# version, so workers won't notice until something else changes.
+
+VERSION_KEY = '_version'
+
+# key -> (type, default). Types: bool, int, str, 'json'
+SETTINGS = {
+    'maintenance_mode': (bool, False),
+    'support_email': (str, 'info@ourstoryourvoice.org'),
+}
+
+_lock = threading.Lock()
+_state = {'snapshot': None, 'version': None, 'checked_until': 0.0}
+
+# Counters (per worker process)
+stats = {'hits': 0, 'version_checks': 0, 'reloads': 0}
+
+
+# --- 1. TYPE COERCION ---
+def _coerce(kind, raw, default):
+    if raw is None:
+        return default
+    try:
+        if kind is bool:
+            return raw.strip().lower() in ('true', '1', 'yes', 'on')
+        if kind is int:
+            return int(raw)
+        if kind == 'json':
+            return json.loads(raw)
+        return raw
+    except (ValueError, TypeError):
+        current_app.logger.warning('SiteConfig: bad value %r, using default %r', raw, default)
+        return default
+
+
+def _serialize(kind, value):
+    if kind is bool:
+        return 'true' if value else 'false'
+    if kind == 'json':
+        return json.dumps(value)
+    return str(value)
+
+
+# --- 2. LOADING ---
+def _read_version():
+    value = db.session.query(SiteConfig.value).filter_by(key=VERSION_KEY).scalar()
+    return int(value) if value else 0
+
+
+def _load_snapshot():
+    # One query for every key
+    raw = {row.key: row.value for row in SiteConfig.query.all()}
+    version = int(raw.get(VERSION_KEY) or 0)
+
+    snapshot = {}
+    for key, (kind, default) in SETTINGS.items():
+        snapshot[key] = _coerce(kind, raw.get(key), default)
+    return version, snapshot
+
+
+def _ttl():
+    return current_app.config.get('SITE_CONFIG_TTL', 5)
+
+
+def _current():
+    # Already validated during this request
+    if getattr(g, '_site_config', None) is not None:
+        return g._site_config
+
+    now = time.monotonic()
+    with _lock:
+        snapshot = _state['snapshot']
+        fresh = snapshot is not None and now < _state['checked_until']
+        if fresh:
+            stats['hits'] += 1
+
+    if not fresh:
+        with _lock:
+            stats['version_checks'] += 1
+        version = _read_version()
+
+        if snapshot is None or version != _state['version']:
+            version, snapshot = _load_snapshot()
+            with _lock:
+                stats['reloads'] += 1
+
+        with _lock:
+            _state['snapshot'] = snapshot
+            _state['version'] = version
+            _state['checked_until'] = time.monotonic() + _ttl()
+
+    g._site_config = snapshot
+    return snapshot
+
+
+# --- 3. PUBLIC API ---
+def get(key):
+    return _current()[key]
+
+
+def get_all():
+    return dict(_current())
+
+
+def is_maintenance_mode():
+    return get('maintenance_mode')
+
+
+def _write(key, value):
+    kind, _default = SETTINGS[key]
+
+    config = SiteConfig.query.filter_by(key=key).first()
+    if not config:
+        config = SiteConfig(key=key)
+        db.session.add(config)
+    config.value = _serialize(kind, value)
+
+    # Bump the version row (locked so two admins can't write the same number)
+    version_row = SiteConfig.query.filter_by(key=VERSION_KEY).with_for_update().first()
+    if not version_row:
+        version_row = SiteConfig(key=VERSION_KEY, value='0')
+        db.session.add(version_row)
+    version_row.value = str(int(version_row.value or 0) + 1)
+
+
+def set_value(key, value, attempts=3):
+    # The first write of a key (or of the version row itself) locks nothing:
+    # two concurrent ones both INSERT and the loser hits the unique key. The
+    # row exists by then, so the retry takes the normal locked UPDATE path.
+    for attempt in range(attempts):
+        try:
+            _write(key, value)
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == attempts - 1:
+                raise
+    invalidate()
+
+
+def invalidate():
+    # Force this worker to re-check the version on the next request
+    with _lock:
+        _state['checked_until'] = 0.0
+    g.pop('_site_config', None)
+
+
+def cache_stats():
+    with _lock:
+        total = stats['hits'] + stats['version_checks']
+        hit_rate = (stats['hits'] / total * 100) if total else 0.0
+        return {
+            'hits': stats['hits'],
+            'version_checks': stats['version_checks'],
+            'reloads': stats['reloads'],
+            'hit_rate': round(hit_rate, 1),
+        }
@@ -0,0 +1,196 @@
+# project/smtp_pool.py
+import os
+import queue
+import smtplib
+import threading
+import time
+
+from flask import current_app
+from flask_mail import Mail, Connection
+
+from .metrics import track_call
+
+
+# --- POOLED SMTP TRANSPORT ---
+# Flask-Mail normally opens a new SMTP connection (TLS handshake + LOGIN) for
+# every mail.send(). PooledMail keeps a few authenticated connections per
+# worker process and hands them out again. Idle connections are checked with
+# NOOP before reuse, and a send that hits a dropped connection is retried
+# once on a fresh one.
+#
+# Everything that calls mail.send() goes through here automatically.
+
+# Errors that mean "this connection is dead", not "the message is bad".
+# (Careful: SMTPException subclasses OSError, so OSError itself is too broad.)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPPool:
+    def __init__(self, state, size=3, noop_after=30, timeout=10, wait=30):
+        self.state = state            # Flask-Mail settings (server, port, ...)
+        self.size = size
+        self.noop_after = noop_after  # Seconds idle before we NOOP-check it
+        self.timeout = timeout
+        self.wait = wait              # Seconds to wait when all are busy
+
+        self._idle = queue.LifoQueue()
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        state = self.state
+        if state.use_ssl:
+            host = smtplib.SMTP_SSL(state.server, state.port, timeout=self.timeout)
+        else:
+            host = smtplib.SMTP(state.server, state.port, timeout=self.timeout)
+
+        host.set_debuglevel(int(state.debug))
+
+        if state.use_tls:
+            host.starttls()
+        if state.username and state.password:
+            host.login(state.username, state.password)
+        return host
+
+    def _healthy(self, host, last_used):
+        if time.monotonic() - last_used < self.noop_after:
+            return True
+        try:
+            return host.noop()[0] == 250
+        except OSError:
+            return False
+
+    def _new(self):
+        try:
+            return self.connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def acquire(self):
+        # 1. Reuse an idle connection if one is alive
+        while True:
+            try:
+                host, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._healthy(host, last_used):
+                return host
+            self.discard(host)
+
+        # 2. Open a new one if we are under the limit
+        with self._lock:
+            can_open = self._open < self.size
+            if can_open:
+                self._open += 1
+        if can_open:
+            return self._new()
+
+        # 3. Otherwise wait for another thread to give one back
+        try:
+            host, last_used = self._idle.get(timeout=self.wait)
+        except queue.Empty:
+            raise smtplib.SMTPException('No SMTP connection available in pool')
+        if self._healthy(host, last_used):
+            return host
+        self.discard(host)
+        with self._lock:
+            self._open += 1
+        return self._new()
+
+    def release(self, host):
+        self._idle.put((host, time.monotonic()))
+
+    def discard(self, host):
+        with self._lock:
+            self._open -= 1
+        try:
+            host.quit()
+        except Exception:
+            try:
+                host.close()
+            except Exception:
+                pass
+
+    def reconnect(self, host):
+        # Swap a broken connection for a fresh one (keeps the open count).
+        # If connect() fails the caller still holds `host` and discards it.
+        try:
+            host.close()
+        except Exception:
+            pass
+        return self.connect()
+
+    def close_all(self):
+        while True:
+            try:
+                host, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(host)
+
+
+# One pool per (process, server account). The pid is part of the key so a
+# gunicorn fork never reuses a socket that belongs to its parent.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(state):
+    key = (os.getpid(), state.server, state.port, state.username)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            config = current_app.config
+            pool = SMTPPool(
+                state,
+                size=config.get('MAIL_POOL_SIZE', 3),
+                noop_after=config.get('MAIL_POOL_NOOP_AFTER', 30),
+                timeout=config.get('MAIL_TIMEOUT', 10)
+            )
+            _pools[key] = pool
+        return pool
+
+
+class PooledConnection(Connection):
+    """A Flask-Mail Connection that borrows its socket from the pool."""
+
+    def __enter__(self):
+        self.num_emails = 0
+        if self.mail.suppress:
+            self.host = None
+        else:
+            self.pool = get_pool(self.mail)
+            self.host = self.pool.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.host is None:
+            return
+        if exc_type is None:
+            self.pool.release(self.host)
+        else:
+            self.pool.discard(self.host)
+
+    def configure_host(self):
+        # Used by Flask-Mail when MAIL_MAX_EMAILS rolls the connection over
+        return self.pool.connect()
+
+    def send(self, message, envelope_from=None):
+        try:
+            with track_call('smtp', 'send'):
+                super().send(message, envelope_from)
+        except CONNECTION_ERRORS:
+            if self.host is None:
+                raise
+            # Server dropped us (timeout, restart...) -> one retry on a new socket
+            self.host = self.pool.reconnect(self.host)
+            with track_call('smtp', 'send_retry'):
+                super().send(message, envelope_from)
+
+
+class PooledMail(Mail):
+    def connect(self):
+        app = current_app._get_current_object()
+        return PooledConnection(app.extensions['mail'])
@@ -0,0 +1,171 @@
+# project/sqltiming.py
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .querycount import statement_shape
+
+
+# --- SQL TIMING & SLOW QUERY LOG ---
+# Times every statement (before/after_cursor_execute on all engines):
+#
+#   - Each response gets a Server-Timing header with the time spent in the
+#     database and the statement count, next to the total request time:
+#         Server-Timing: db;dur=12.4;desc="7 queries", app;dur=31.0
+#     (browser devtools show it under Network -> Timing). Queries run
+#     while a response streams come after the header and aren't in it.
+#
+#   - Statements slower than SLOW_QUERY_MS go to the 'project.slow_sql'
+#     logger (and to SLOW_QUERY_LOG if set). Parameter VALUES are never
+#     logged, only their types - they hold emails, names, tokens...
+#
+#   - With SLOW_QUERY_EXPLAIN, a slow SELECT also gets its EXPLAIN plan
+#     logged (at most once per statement shape per SLOW_QUERY_EXPLAIN_INTERVAL).
+#     In a request it runs once the response has been sent to the client
+#     (response.call_on_close - the worker is still busy, the visitor isn't
+#     kept waiting), on a separate connection.
+#
+# The per-statement cost is two perf_counter() calls and a list push/pop,
+# so it stays on in production.
+
+# [db seconds, statements] of the current request (a ContextVar: cheaper than g per statement)
+_request_stats = ContextVar('sql_request_stats', default=None)
+
+EXPLAIN_PREFIX = {'sqlite': 'EXPLAIN QUERY PLAN ', 'mysql': 'EXPLAIN ', 'postgresql': 'EXPLAIN '}
+
+
+def redact(parameters, executemany=False):
+    """Parameter types only: (<str>, <int>) / {'email': <str>}."""
+    if executemany:
+        return f'<{len(parameters)} rows>'
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{k!r}: <{type(v).__name__}>' for k, v in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(f'<{type(v).__name__}>' for v in parameters) + ')'
+    return '<none>' if parameters is None else f'<{type(parameters).__name__}>'
+
+
+class SQLTimer:
+    def __init__(self, app=None):
+        self.app = app
+        self.logger = logging.getLogger('project.slow_sql')
+        self._explained = {}                # statement shape -> last EXPLAIN time (per worker)
+        self._local = threading.local()     # Guard: our own EXPLAINs aren't explained again
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        self.enabled = config.get('SQL_TIMING_ENABLED', True)
+        self.slow_seconds = config.get('SLOW_QUERY_MS', 200) / 1000.0
+        self.explain = config.get('SLOW_QUERY_EXPLAIN', False)
+        self.explain_interval = config.get('SLOW_QUERY_EXPLAIN_INTERVAL', 300)
+        app.extensions['sql_timer'] = self
+        if not self.enabled:
+            return
+
+        path = config.get('SLOW_QUERY_LOG')
+        if path and not any(getattr(h, 'baseFilename', None) == path for h in self.logger.handlers):
+            handler = RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(process)d %(message)s'))
+            self.logger.addHandler(handler)
+        self.logger.setLevel(logging.INFO)
+        app.logger  # Creates the 'project' logger's stderr handler this one propagates to
+
+        for name, listener in (('before_cursor_execute', self._before),
+                               ('after_cursor_execute', self._after),
+                               ('handle_error', self._error)):
+            if not event.contains(Engine, name, listener):
+                event.listen(Engine, name, listener)
+
+        app.before_request(self._start_request)
+        app.after_request(self._add_header)
+        app.teardown_request(self._end_request)
+
+    # --- 1. TIMING ---
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats[0] += elapsed
+            stats[1] += 1
+
+        if elapsed >= self.slow_seconds and not getattr(self._local, 'explaining', False):
+            self._slow(conn, statement, parameters, executemany, elapsed)
+
+    def _error(self, exception_context):
+        # after_cursor_execute doesn't run for a failed statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_start'):
+            conn.info['query_start'].pop()
+
+    # --- 2. SERVER-TIMING HEADER ---
+    def _start_request(self):
+        g._request_start = time.perf_counter()
+        _request_stats.set([0.0, 0])
+
+    def _add_header(self, response):
+        db_time, count = _request_stats.get() or (0.0, 0)
+        timing = f'db;dur={db_time * 1000:.1f};desc="{count} queries"'
+        if '_request_start' in g:
+            timing += f', app;dur={(time.perf_counter() - g._request_start) * 1000:.1f}'
+        response.headers.add('Server-Timing', timing)
+
+        # The same list keeps collecting while a streamed response runs its queries
+        jobs = g.setdefault('_slow_explain', [])
+        response.call_on_close(lambda: self._explain_all(jobs))
+        return response
+
+    def _end_request(self, exc):
+        _request_stats.set(None)
+
+    # --- 3. SLOW QUERY LOG ---
+    def _slow(self, conn, statement, parameters, executemany, elapsed):
+        where = f'{request.method} {request.path} ({request.endpoint})' if has_request_context() else 'no request'
+        self.logger.warning('Slow query %.1f ms [%s]: %s | params: %s',
+                            elapsed * 1000, where, ' '.join(statement.split())[:2000],
+                            redact(parameters, executemany))
+
+        if not self.explain or executemany or not statement.lstrip().upper().startswith('SELECT'):
+            return
+        shape = statement_shape(statement)
+        now = time.monotonic()
+        if now - self._explained.get(shape, -self.explain_interval) < self.explain_interval:
+            return
+        self._explained[shape] = now
+
+        job = (conn.engine, statement, parameters)
+        if has_request_context():
+            g.setdefault('_slow_explain', []).append(job)  # Once the response is sent
+        else:
+            self._run_explain(*job)
+
+    def _explain_all(self, jobs):
+        while jobs:
+            self._run_explain(*jobs.pop(0))
+
+    def _run_explain(self, engine, statement, parameters):
+        prefix = EXPLAIN_PREFIX.get(engine.dialect.name)
+        if prefix is None:
+            return
+        self._local.explaining = True
+        try:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+            plan = '\n'.join('    ' + ' | '.join(str(col) for col in row) for row in rows)
+            self.logger.warning('EXPLAIN for slow query %s:\n%s', ' '.join(statement.split())[:200], plan)
+        except Exception as e:
+            self.logger.warning('EXPLAIN failed for slow query: %s', e)
+        finally:
+            self._local.explaining = False
@@ -0,0 +1,50 @@
+// Signed direct uploads (IMAGE_UPLOAD_MODE = 'direct').
+// When an image is picked, upload it straight to Cloudinary and put the
+// resulting URL in #existing_image_url, so the form never carries the file.
+(function () {
+    const script = document.currentScript;
+    const signatureUrl = script.dataset.signatureUrl;
+
+    document.addEventListener('DOMContentLoaded', function () {
+        const fileInput = document.getElementById('form_image_file');
+        const urlInput = document.getElementById('existing_image_url');
+        if (!fileInput || !urlInput) return;
+
+        const form = fileInput.form;
+        const buttons = form.querySelectorAll('button');
+
+        fileInput.addEventListener('change', async function () {
+            const file = fileInput.files[0];
+            if (!file) return;
+
+            buttons.forEach(b => b.disabled = true);
+            try {
+                // 1. Ask our server for a signature
+                const csrf = form.querySelector('input[name="csrf_token"]').value;
+                const sigResp = await fetch(signatureUrl, { method: 'POST', headers: { 'X-CSRFToken': csrf } });
+                const sig = await sigResp.json();
+
+                // 2. Upload to Cloudinary
+                const data = new FormData();
+                data.append('file', file);
+                data.append('api_key', sig.api_key);
+                data.append('timestamp', sig.timestamp);
+                data.append('folder', sig.folder);
+                data.append('signature', sig.signature);
+
+                const upResp = await fetch(`https://api.cloudinary.com/v1_1/${sig.cloud_name}/image/upload`, { method: 'POST', body: data });
+                const result = await upResp.json();
+                if (!result.secure_url) throw new Error(result.error ? result.error.message : 'Upload failed');
+
+                // 3. Submit only the URL
+                urlInput.value = result.secure_url;
+                fileInput.value = '';
+            } catch (err) {
+                alert('Image upload failed: ' + err.message);
+                fileInput.value = '';
+            } finally {
+                buttons.forEach(b => b.disabled = false);
+            }
+        });
+    });
+})();
@@ -0,0 +1,174 @@
+# project/stats.py
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+
+from .extension import db
+from .model import DailyStat, Donation, User
+
+
+# --- DAILY STATS ROLLUP ---
+# The dashboard and fundraising pages used to COUNT/SUM the whole users and
+# donations tables on every load. Now:
+#
+#   - rollup() (the scheduler's 'rollup_daily_stats' job, shortly after
+#     midnight UTC) writes one daily_stats row per day/metric/currency for
+#     the days that are over. Each run also re-rolls the last
+#     STATS_ROLLUP_RECOMPUTE_DAYS days, as a safety net.
+#
+#   - A donation can turn 'Success' days after it was created (webhooks,
+#     delayed bank payments) and is counted on its created_at day. When that
+#     day is already rolled up, Donation.mark_success() adds it to the day's
+#     rows in the same transaction (count_late_success), however old it is.
+#
+#   - totals() adds up daily_stats (one small row per day) plus the live
+#     rows created since the last rolled-up day - an index range read on
+#     users.created_at / donations (status, created_at), normally today only.
+#
+# Days are UTC. If the job has never run, totals() reads everything live.
+
+NEW_USERS, DONATIONS, MONTHLY = 'new_users', 'donations', 'donations_monthly'
+
+
+def _as_date(value):
+    # func.date() is a date on MySQL, a 'YYYY-MM-DD' string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+# --- 1. READING THE LIVE TABLES ---
+def collect(start=None, end=None):
+    """{(day, metric, currency): [count, amount]} for rows created in [start, end)."""
+    def created(column, query):
+        if start is not None:
+            query = query.filter(column >= start)
+        if end is not None:
+            query = query.filter(column < end)
+        return query
+
+    out = {}
+    day = func.date(User.created_at)
+    users = created(User.created_at, db.session.query(day, func.count())).group_by(day)
+    for d, n in users:
+        if d is not None:
+            out[(_as_date(d), NEW_USERS, '')] = [n, 0.0]
+
+    day = func.date(Donation.created_at)
+    donations = created(Donation.created_at, db.session.query(
+        day, Donation.currency, Donation.frequency, func.count(), func.sum(Donation.amount)
+    ).filter(Donation.status == 'Success')).group_by(day, Donation.currency, Donation.frequency)
+    for d, currency, frequency, n, amount in donations:
+        if d is None:
+            continue
+        currency = (currency or current_app.config.get('STATS_DEFAULT_CURRENCY', 'CAD')).upper()
+        for metric in (DONATIONS, MONTHLY) if frequency == 'monthly' else (DONATIONS,):
+            entry = out.setdefault((_as_date(d), metric, currency), [0, 0.0])
+            entry[0] += n
+            entry[1] += amount or 0.0
+    return out
+
+
+# --- 2. ROLLUP (scheduler job) ---
+def rolled_until():
+    """Last day in daily_stats, or None before the first rollup."""
+    return db.session.query(func.max(DailyStat.day)).filter(DailyStat.metric == NEW_USERS).scalar()
+
+
+def rollup(today=None):
+    """Writes daily_stats for every finished day not rolled up yet (plus the recompute window). Commits."""
+    today = today or datetime.utcnow().date()
+    last = rolled_until()
+
+    if last is None:
+        first = min(filter(None, (db.session.query(func.min(User.created_at)).scalar(),
+                                  db.session.query(func.min(Donation.created_at)).scalar())), default=None)
+        start = first.date() if first else today
+    else:
+        recompute = current_app.config.get('STATS_ROLLUP_RECOMPUTE_DAYS', 7)
+        start = min(last + timedelta(days=1), today - timedelta(days=recompute))
+
+    if start >= today:
+        return 0
+
+    rows = collect(datetime.combine(start, time.min), datetime.combine(today, time.min))
+    day = start
+    while day < today:
+        rows.setdefault((day, NEW_USERS, ''), [0, 0.0])  # Marks the day as rolled up
+        day += timedelta(days=1)
+
+    DailyStat.query.filter(DailyStat.day >= start, DailyStat.day < today).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(DailyStat, [
+        dict(day=d, metric=metric, currency=currency, count=n, amount=amount)
+        for (d, metric, currency), (n, amount) in rows.items()
+    ])
+    db.session.commit()
+    return (today - start).days
+
+
+# --- 3. LATE SUCCESSES (Donation.mark_success) ---
+def _add(day, metric, currency, amount):
+    key = dict(day=day, metric=metric, currency=currency)
+    bump = {DailyStat.count: DailyStat.count + 1, DailyStat.amount: DailyStat.amount + amount}
+    if DailyStat.query.filter_by(**key).update(bump, synchronize_session=False):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(DailyStat(count=1, amount=amount, **key))
+    except IntegrityError:
+        # The rollup (or another webhook) inserted the row in the meantime
+        DailyStat.query.filter_by(**key).update(bump, synchronize_session=False)
+
+
+def count_late_success(donation):
+    """Adds a donation that just turned 'Success' to its day's rows, if that day is rolled up. Caller commits."""
+    if donation.created_at is None:
+        return
+    day = donation.created_at.date()
+    rolled = db.session.query(DailyStat.day).filter_by(day=day, metric=NEW_USERS, currency='').first()
+    if rolled is None:
+        return  # totals() still reads this day live (and the next rollup() counts it)
+
+    currency = (donation.currency or current_app.config.get('STATS_DEFAULT_CURRENCY', 'CAD')).upper()
+    for metric in (DONATIONS, MONTHLY) if donation.frequency == 'monthly' else (DONATIONS,):
+        _add(day, metric, currency, donation.amount or 0.0)
+
+
+# --- 4. TOTALS FOR THE ADMIN PAGES ---
+def totals():
+    """
+    {'users': n,
+     'raised': {currency: amount}, 'monthly': {currency: amount},
+     'avg_30d': {currency: average successful donation over the last 30 days}}
+    """
+    month_ago = datetime.utcnow().date() - timedelta(days=30)
+    recent = DailyStat.day >= month_ago
+    rolled = db.session.query(
+        DailyStat.metric, DailyStat.currency, func.max(DailyStat.day),
+        func.sum(DailyStat.count), func.sum(DailyStat.amount),
+        func.sum(case((recent, DailyStat.count), else_=0)), func.sum(case((recent, DailyStat.amount), else_=0.0)),
+    ).group_by(DailyStat.metric, DailyStat.currency).all()
+
+    # {(metric, currency): [count, amount, count 30d, amount 30d]}
+    sums, last = {}, None
+    for metric, currency, last_day, n, amount, n_30d, amount_30d in rolled:
+        sums[(metric, currency)] = [n or 0, amount or 0.0, n_30d or 0, amount_30d or 0.0]
+        if metric == NEW_USERS:
+            last = last_day
+
+    # Everything after the last rolled-up day comes from the live tables
+    live_from = datetime.combine(last + timedelta(days=1), time.min) if last else None
+    for (d, metric, currency), (n, amount) in collect(start=live_from).items():
+        entry = sums.setdefault((metric, currency), [0, 0.0, 0, 0.0])
+        entry[0] += n
+        entry[1] += amount
+        if d >= month_ago:
+            entry[2] += n
+            entry[3] += amount
+
+    return {
+        'users': sums.get((NEW_USERS, ''), [0])[0],
+        'raised': {c: s[1] for (m, c), s in sums.items() if m == DONATIONS},
+        'monthly': {c: s[1] for (m, c), s in sums.items() if m == MONTHLY},
+        'avg_30d': {c: s[3] / s[2] for (m, c), s in sums.items() if m == DONATIONS and s[2]},
+    }
@@ -0,0 +1,50 @@
+# project/statuscounts.py
+from flask import current_app
+from sqlalchemy import func
+
+from .extension import db, page_cache
+from .model import Story, PartnerApplication, VolunteerApplication, MentorshipApplication
+
+
+# --- STATUS COUNTS FOR ADMIN TABS & STAT CARDS ---
+# One `SELECT status, COUNT(*) ... GROUP BY status` per table instead of a
+# COUNT per status:
+#
+#   counts = status_counts('partners')
+#   counts['Approved'], counts.total    # A status with no rows is 0
+#
+# Kept in the page cache backend for STATUS_COUNTS_TTL seconds under the
+# table's tag, so any commit that touches the table (process_partner,
+# process_volunteer, end_partner_contract, publish_story, delete_story, new
+# applications...) drops it - see TAGGED_MODELS in pagecache.py. Commits
+# from other hosts (not sharing the page cache file) show up after the TTL.
+
+TABLES = {
+    # name: (model, page cache tag)
+    'stories': (Story, 'story'),
+    'partners': (PartnerApplication, 'partner'),
+    'volunteers': (VolunteerApplication, 'volunteer'),
+    'mentorships': (MentorshipApplication, 'mentorship'),
+}
+
+
+class StatusCounts(dict):
+    """{status: count}; statuses are stored values (e.g. 'Pending', ApplicationStatus.APPROVED)."""
+
+    def __missing__(self, status):
+        return 0
+
+    @property
+    def total(self):
+        return sum(self.values())
+
+
+def _count(model):
+    rows = db.session.query(model.status, func.count()).group_by(model.status)
+    return StatusCounts((status, n) for status, n in rows)
+
+
+def status_counts(table):
+    model, tag = TABLES[table]
+    return page_cache.fragment(f'status_counts:{table}', lambda: _count(model), tags=(tag,),
+                               ttl=current_app.config.get('STATUS_COUNTS_TTL', 60))
@@ -1,9 +1,12 @@
 // tailwind.config.js
+// Build with `flask assets css` (or `npm run build:css`) -> static/build/tailwind.css
 module.exports = {
-    content: ["./templates/**/*.html", "./static/**/*.js"], // (Make sure your paths match your flask setup)
+    content: {
+      relative: true, // Paths below are relative to this file, not the cwd
+      files: ["./templates/**/*.html", "./static/*.js"],
+    },
     theme: {
       extend: {
-        // --- PASTE THIS PART START ---
         keyframes: {
           'slide-down': {
             '0%': { transform: 'translateY(-100%)', opacity: '0' },
@@ -13,8 +16,7 @@ module.exports = {
         animation: {
           'slide-down': 'slide-down 0.8s cubic-bezier(0.16, 1, 0.3, 1)',
         }
-        // --- PASTE THIS PART END ---
       }
     },
     plugins: [],
-  }
\ No newline at end of file
+  }
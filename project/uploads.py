@@ -0,0 +1,177 @@
+# project/uploads.py
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import or_, and_
+from werkzeug.utils import secure_filename
+
+from .extension import db
+from .model import ImageUpload, Story, Event
+from .metrics import track_call
+
+
+# --- BACKGROUND IMAGE UPLOADS ---
+# Admin routes save the file to a local spool directory and return right away.
+# 'flask upload-worker' pushes spooled files to Cloudinary and fills in the
+# Story/Event image_url. While that runs the row has image_status='Pending'
+# and keeps its previous image (if any).
+#
+# Alternative mode (IMAGE_UPLOAD_MODE='direct'): the browser uploads straight
+# to Cloudinary with a signature from signed_upload_params() and the form
+# only submits the resulting URL.
+
+TARGETS = {'story': Story, 'event': Event}
+
+
+def _spool_dir():
+    path = current_app.config.get('UPLOAD_SPOOL_DIR') or os.path.join(current_app.instance_path, 'upload_spool')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# --- 1. SPOOL (called from routes) ---
+def spool_image(file, target_type, target):
+    """
+    Saves an uploaded file to disk and queues it for upload.
+    `target` must already have an id (flush first). Caller commits.
+    """
+    ext = os.path.splitext(secure_filename(file.filename))[1].lower()
+    path = os.path.join(_spool_dir(), f"{uuid.uuid4().hex}{ext}")
+    file.save(path)
+
+    target.image_status = 'Pending'
+    job = ImageUpload(target_type=target_type, target_id=target.id, spool_path=path)
+    db.session.add(job)
+    return job
+
+
+# --- 2. SIGNED DIRECT UPLOADS ---
+def signed_upload_params():
+    """Parameters the browser needs to upload straight to Cloudinary."""
+    cfg = cloudinary.config()
+    params = {
+        'timestamp': int(time.time()),
+        'folder': current_app.config.get('CLOUDINARY_FOLDER', 'osov'),
+    }
+    params['signature'] = cloudinary.utils.api_sign_request(params, cfg.api_secret)
+    params['api_key'] = cfg.api_key
+    params['cloud_name'] = cfg.cloud_name
+    return params
+
+
+# --- 3. WORKER ---
+def _uploader():
+    # Tests can set IMAGE_UPLOADER to a stub with the same signature
+    return current_app.config.get('IMAGE_UPLOADER') or cloudinary.uploader.upload
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def process_upload(job_id):
+    job = db.session.get(ImageUpload, job_id)
+    if not job or job.status != 'Uploading':
+        return
+
+    model = TARGETS.get(job.target_type)
+    target = db.session.get(model, job.target_id) if model else None
+
+    # A newer upload for the same row wins (admin replaced the image again)
+    newer = ImageUpload.query.filter(
+        ImageUpload.target_type == job.target_type,
+        ImageUpload.target_id == job.target_id,
+        ImageUpload.id > job.id
+    ).first()
+
+    if target is None or newer:
+        job.status = 'Done'
+        job.locked_at = None
+        db.session.commit()
+        _remove(job.spool_path)
+        return
+
+    try:
+        folder = current_app.config.get('CLOUDINARY_FOLDER', 'osov')
+        with track_call('cloudinary', 'upload'):
+            result = _uploader()(job.spool_path, folder=folder)
+        target.image_url = result['secure_url']
+        target.image_status = 'Ready'
+        job.status = 'Done'
+        job.last_error = None
+
+    except Exception as e:
+        job.attempts += 1
+        job.last_error = str(e)[:1000]
+        if job.attempts >= current_app.config.get('UPLOAD_MAX_ATTEMPTS', 5):
+            job.status = 'Failed'
+            target.image_status = 'Failed'
+            print(f"❌ Image upload #{job.id} failed for good: {e}")
+        else:
+            job.status = 'Pending'
+            job.next_attempt_at = datetime.utcnow() + timedelta(seconds=30 * (2 ** (job.attempts - 1)))
+            print(f"Image upload #{job.id} failed (attempt {job.attempts}), retrying later: {e}")
+
+    job.locked_at = None
+    db.session.commit()
+
+    if job.status == 'Done':
+        _remove(job.spool_path)
+
+
+def claim_uploads(limit):
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config.get('UPLOAD_CLAIM_TIMEOUT', 600))
+
+    jobs = ImageUpload.query.filter(or_(
+        and_(ImageUpload.status == 'Pending', ImageUpload.next_attempt_at <= now),
+        and_(ImageUpload.status == 'Uploading', ImageUpload.locked_at < stale)
+    )).order_by(ImageUpload.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    for job in jobs:
+        job.status = 'Uploading'
+        job.locked_at = now
+    db.session.commit()
+
+    return [job.id for job in jobs]
+
+
+@click.command('upload-worker')
+@click.option('--concurrency', type=int, default=2, help='Parallel uploads.')
+@click.option('--poll-interval', type=float, default=2.0)
+@click.option('--once', is_flag=True, help='Process what is due right now, then exit.')
+@with_appcontext
+def upload_worker_command(concurrency, poll_interval, once):
+    """Push spooled story/event images to Cloudinary."""
+    app = current_app._get_current_object()
+
+    def upload_one(job_id):
+        with app.app_context():
+            process_upload(job_id)
+
+    click.echo(f'Upload worker started (concurrency={concurrency}).')
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            ids = claim_uploads(concurrency * 2)
+
+            if ids:
+                list(pool.map(upload_one, ids))
+                click.echo(f'Processed {len(ids)} upload(s).')
+                continue
+
+            if once:
+                break
+            time.sleep(poll_interval)
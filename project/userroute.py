@@ -2,10 +2,7 @@ import os
 from dotenv import load_dotenv # Import this
 import urllib.parse
 # Load variables from .env file
-import smtplib
 import uuid
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 import re
 import stripe 
@@ -13,14 +10,17 @@ from flask_login import login_user, login_required,current_user,logout_user
 
 from datetime import date, datetime
 from sqlalchemy import desc,distinct
+from sqlalchemy.orm import joinedload, contains_eager
 from flask_mail import Message
  
 from itsdangerous import URLSafeTimedSerializer
 
 from flask import render_template,Blueprint,url_for,redirect,session,request,flash,current_app,abort
 from werkzeug.security import generate_password_hash , check_password_hash
-from .model import User,VolunteerApplication,MentorshipApplication,PartnerApplication,Event,EventRSVP,Story,Donation,NewsletterSubscriber,Campaign
-from .extension import db,mail
+from .model import listing_options,User,VolunteerApplication,MentorshipApplication,PartnerApplication,Event,EventRSVP,Story,Donation,NewsletterSubscriber,Campaign
+from .extension import db,mail,csrf,payment_gateway,page_cache,view_counter,query_counter
+from . import payments
+from .mailer import queue_email
 
 
 from . import oauth  # <--- IMPORT OAUTH FROM YOUR __INIT__ FILE
@@ -114,14 +114,18 @@ def google_callback():
 
 
 @main_routes.route('/',methods = ['GET','POST'])
+@query_counter.budget(6)
+@page_cache.cached('story', 'event')
 def index():
     # Debug line: Remove the filter to prove you have 3 events
-    upcoming_events = Event.query.order_by(Event.date_time.desc()).limit(3).all()
-    # explicit join condition
-    stories = Story.query.join(User).order_by(Story.created_at.desc()).limit(10).all()
+    upcoming_events = Event.query.options(*listing_options()).order_by(Event.date_time.desc()).limit(3).all()
+    # explicit join condition (also fills story.author from the same row)
+    stories = Story.query.join(User).options(*listing_options(contains_eager(Story.author)))\
+        .order_by(Story.created_at.desc()).limit(10).all()
     return render_template('user/index.html',stories=stories,events=upcoming_events)
 
 @main_routes.route('/about', methods = ['POST','GET'])
+@page_cache.cached()
 def about():
     return render_template('user/about.html')
 
@@ -130,12 +134,15 @@ def about():
 #     return render_template('user/viewstory.html')
 
 @main_routes.route('/stories')
+@query_counter.budget(5)
+@page_cache.cached('story', args=('category',))
 def stories():
     # 1. Check if a category is selected in the URL (e.g. /stories?category=Youth)
     selected_category = request.args.get('category')
     
     # 2. Start the query
     query = Story.query.filter_by(status='Published') # Only show published ones
+    query = query.options(*listing_options(joinedload(Story.author))) # Author comes with each row
     
     # 3. Apply Filter if selected
     if selected_category and selected_category != 'All Stories':
@@ -146,9 +153,12 @@ def stories():
 
     # 5. Fetch ALL unique categories from the DB (for the buttons)
     # This creates a list like ['General', 'Youth Success', 'Immigrant Journeys']
-    categories_query = db.session.query(distinct(Story.category)).filter(Story.status == 'Published').all()
-    # Clean up the list (remove tuples)
-    categories = [c[0] for c in categories_query if c[0]]
+    # (Cached: logged-in visitors skip the page cache but still share this list)
+    def load_categories():
+        categories_query = db.session.query(distinct(Story.category)).filter(Story.status == 'Published').all()
+        # Clean up the list (remove tuples)
+        return [c[0] for c in categories_query if c[0]]
+    categories = page_cache.fragment('story_categories', load_categories, tags=('story',))
 
     return render_template(
         'user/stories.html', 
@@ -173,12 +183,11 @@ def story_detail(slug):
 
     # Check if this user has already viewed this story in this session
     if view_key not in session:
-        current_story.views += 1
-        db.session.commit()
+        view_counter.record(current_story.id)  # Buffered, written in the background
         session[view_key] = True  # Mark as viewed
 
     # 4. Fetch "More Stories" for the recommendation section
-    more_stories = Story.query.filter(
+    more_stories = Story.query.options(*listing_options(joinedload(Story.author))).filter(
         Story.id != current_story.id, 
         Story.status == 'Published'  # Ensure recommendations are also published!
     ).order_by(Story.created_at.desc()).limit(4).all()
@@ -207,14 +216,7 @@ def contact_us():
         system_email = current_app.config['MAIL_USERNAME']
 
         # --- EMAIL 1: TO ADMIN (The HTML Layout) ---
-        admin_msg = Message(
-            subject=f"New Inquiry: {topic}", 
-            sender=system_email, 
-            recipients=['info@ourstoryourvoice.org', 'oponeboboola@gmail.com'], # Sends to Info AND You
-            reply_to=user_email
-        )
-
-        admin_msg.html = f"""
+        admin_html = f"""
         <!DOCTYPE html>
         <html>
         <head>
@@ -256,13 +258,7 @@ def contact_us():
         """
 
         # --- EMAIL 2: TO USER (Confirmation) ---
-        user_msg = Message(
-            subject=f"We received your message - Our Story Our Voice",
-            sender=system_email,
-            recipients=[user_email] # Send to the user
-        )
-        
-        user_msg.body = f"""
+        user_body = f"""
         Hi {f_name},
 
         Thank you for contacting Our Story Our Voice. 
@@ -274,15 +270,27 @@ def contact_us():
         www.ourstoryourvoice.org
         """
 
-        # 4. Attempt to Send Both
+        # 4. Queue Both (the email worker sends them in the background)
         try:
-            mail.send(admin_msg) # Send to you
-            mail.send(user_msg)  # Send to them
+            queue_email(
+                subject=f"New Inquiry: {topic}",
+                sender=system_email,
+                recipients=['info@ourstoryourvoice.org', 'oponeboboola@gmail.com'], # Sends to Info AND You
+                reply_to=user_email,
+                html=admin_html
+            )
+            queue_email(
+                subject=f"We received your message - Our Story Our Voice",
+                sender=system_email,
+                recipients=[user_email], # Send to the user
+                body=user_body
+            )
             
             flash('Message sent successfully! Check your inbox for a confirmation.', 'success')
             return redirect(url_for('main.contact_us'))
             
         except Exception as e:
+            db.session.rollback()
             print(f"❌ EMAIL FAILED: {str(e)}")
             flash('There was an issue sending your message. Please try again later.', 'error')
             return redirect(url_for('main.contact_us'))
@@ -292,6 +300,8 @@ def contact_us():
 stripe.api_key = os.environ.get('STRIPE_SECRET_KEY')
 
 @main_routes.route('/campaigns')
+@query_counter.budget(3)
+@page_cache.cached('campaign')
 def campaign_list():
     # Fetch all active campaigns from the DB
     campaigns = Campaign.query.filter_by(is_active=True).order_by(Campaign.created_at.desc()).all()
@@ -354,22 +364,22 @@ def donate(campaign_id=None):
             else:
                 checkout_mode = 'payment'
 
-            # Create Session
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{'price_data': price_data, 'quantity': 1}],
-                mode=checkout_mode,
-                customer_email=email,
-                metadata={
-                    'user_id': user_id,
+            # Create Session (timeouts, retries & circuit breaker in payment_gateway.py)
+            checkout_session = payment_gateway.create_checkout_session({
+                'payment_method_types': ['card'],
+                'line_items': [{'price_data': price_data, 'quantity': 1}],
+                'mode': checkout_mode,
+                'customer_email': email,
+                'metadata': {
+                    'user_id': user_id if user_id else '',
                     'guest_name': name,
                     'is_donation': 'true',
                     'frequency': frequency,
                     'campaign_id': campaign_id if campaign_id else '' 
                 },
-                success_url=url_for('main.donation_success', _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
-                cancel_url=url_for('main.donate', campaign_id=campaign_id, _external=True),
-            )
+                'success_url': url_for('main.donation_success', _external=True) + '?session_id={CHECKOUT_SESSION_ID}',
+                'cancel_url': url_for('main.donate', campaign_id=campaign_id, _external=True),
+            })
 
             # Save "Pending" Donation to DB
             new_donation = Donation(
@@ -413,10 +423,7 @@ def cancel_subscription(donation_id):
     try:
         # Cancel at Stripe
         if donation.stripe_subscription_id:
-            stripe.Subscription.modify(
-                donation.stripe_subscription_id,
-                cancel_at_period_end=True
-            )
+            payment_gateway.cancel_subscription(donation.stripe_subscription_id)
         
         # Update DB
         donation.status = 'Cancelled'
@@ -437,41 +444,44 @@ def donation_success():
     if not session_id:
         return redirect(url_for('main.donate'))
 
-    try:
-        # Retrieve the session from Stripe
-        session = stripe.checkout.Session.retrieve(session_id)
-        
-        # Update the database
-        donation = Donation.query.filter_by(reference=session_id).first()
-        
-        if donation:
-            # --- START OF UPDATED LOGIC ---
-            
-            # Check if Stripe created a subscription ID
-            sub_id = session.get('subscription')
-
-            if sub_id:
-                # CASE 1: It is a Recurring Subscription
-                donation.status = 'Active'  # Use 'Active' for subscriptions
-                donation.stripe_subscription_id = sub_id
-                donation.stripe_customer_id = session.get('customer')
-                donation.frequency = 'monthly' # Ensure consistency
-            else:
-                # CASE 2: It is a One-Time Donation
-                donation.status = 'Success'
+    # Rendered from our own DB. The Stripe webhook (below) is what actually
+    # confirms the payment, so there is no Stripe call on this page.
+    donation = Donation.query.filter_by(reference=session_id).first()
+    
+    if donation:
+        return render_template('user/donation_success.html', amount=donation.amount)
 
-            # --- END OF UPDATED LOGIC ---
+    return redirect(url_for('main.index'))
 
-            db.session.commit()
-            
-            return render_template('user/donation_success.html', amount=donation.amount)
-            
+@main_routes.route('/stripe/webhook', methods=['POST'])
+@csrf.exempt
+def stripe_webhook():
+    payload = request.get_data()
+    signature = request.headers.get('Stripe-Signature')
+
+    # 0. Our side: without the secret nothing can be verified (500 so Stripe retries once it's set)
+    secret = current_app.config.get('STRIPE_WEBHOOK_SECRET')
+    if not secret:
+        current_app.logger.error("Stripe webhook received but STRIPE_WEBHOOK_SECRET is not set")
+        return 'Webhook secret not configured', 500
+
+    # 1. Verify it really came from Stripe
+    if not signature:
+        return 'Missing Stripe-Signature header', 400
+    try:
+        event = stripe.Webhook.construct_event(payload, signature, secret)
+    except (ValueError, stripe.SignatureVerificationError) as e:
+        current_app.logger.warning(f"Stripe webhook rejected: {e}")
+        return 'Invalid signature', 400
+
+    # 2. Apply it (duplicates are ignored)
+    try:
+        payments.process_event(event)
     except Exception as e:
-        print(f"Error verifying donation: {e}")
-        flash('Error verifying donation.', 'error')
-        return redirect(url_for('main.donate'))
+        current_app.logger.exception(f"Stripe webhook error ({event['type']}): {e}")
+        return 'Error', 500 # Stripe will retry
 
-    return redirect(url_for('main.index'))
+    return '', 200
 
 @main_routes.route('/history')
 @login_required
@@ -648,14 +658,17 @@ def forgot_password():
             # Create the Link
             link = url_for('main.reset_password', token=token, _external=True)
             
-            # SEND EMAIL (Or print to console for testing)
-            msg = Message('Password Reset Request', sender='info@ourstoryourvoice.org', recipients=[email])
-            msg.body = f'Click the link to reset your password: {link}'
-            
+            # QUEUE EMAIL (Or print to console for testing)
             try:
-                mail.send(msg)
+                queue_email(
+                    'Password Reset Request',
+                    sender='info@ourstoryourvoice.org',
+                    recipients=[email],
+                    body=f'Click the link to reset your password: {link}'
+                )
                 flash('Check your email for a password reset link.', 'info')
             except Exception as e:
+                db.session.rollback()
                 print(e)
                 flash('Error sending email. Check console.', 'error')
                 # FOR TESTING ONLY: Print link to console so you can click it
@@ -859,9 +872,11 @@ def volunteer():
     return render_template('user/volunteer.html')
 
 @main_routes.route('/events/',methods= ['GET','POST'])
+@query_counter.budget(4)
+@page_cache.cached('event')
 def events():
     # 1. Fetch Upcoming Events (Sorted by soonest first)
-    upcoming_events = Event.query.all()
+    upcoming_events = Event.query.options(*listing_options()).all() # Seats taken come as event.rsvp_count
     # 2. OPTIMIZATION: Get list of IDs the user has already RSVP'd to.
     # This prevents us from running a database query inside the HTML loop (N+1 problem)
     my_rsvp_ids = []
@@ -941,16 +956,10 @@ def rsvp_event(event_id):
         db.session.add(new_rsvp)
         db.session.commit()
 
-        # --- 7. SEND EMAIL (Hostinger Logic) ---
+        # --- 7. QUEUE EMAIL (sent by the email worker) ---
         try:
-            msg = Message(
-                subject=f"Your Ticket: {event.title}",
-                recipients=[email],
-                sender=current_app.config.get('MAIL_DEFAULT_SENDER') # Uses config
-            )
-            
             # HTML Email Body (Your nice design)
-            msg.html = f"""
+            ticket_html = f"""
             <div style="font-family: sans-serif; padding: 20px; border: 1px solid #eee; max-width: 600px; margin: 0 auto;">
                 <h2 style="color: #333;">You're Confirmed!</h2>
                 <p>Hi {first_name}, your spot for <strong>{event.title}</strong> is reserved.</p>
@@ -967,12 +976,17 @@ def rsvp_event(event_id):
             </div>
             """
             
-            mail.send(msg)
-            print(f"Email sent successfully to {email}")
+            queue_email(
+                subject=f"Your Ticket: {event.title}",
+                recipients=[email],
+                sender=current_app.config.get('MAIL_DEFAULT_SENDER'), # Uses config
+                html=ticket_html
+            )
 
         except Exception as e:
             # We catch email errors so the user still gets their ticket on screen
-            print(f"Email failed to send: {e}")
+            db.session.rollback()
+            print(f"Email failed to queue: {e}")
         # ---------------------------------------
 
         return redirect(url_for('main.event_detail', event_id=event_id, rsvp_success='true', ticket_id=ticket_code))
@@ -1002,13 +1016,7 @@ def unrsvp_event(event_id):
             db.session.commit()
             
             # 4. Prepare Email
-            msg = Message(
-                subject=f"Cancellation Confirmed: {event.title}",
-                sender=current_app.config['MAIL_USERNAME'],
-                recipients=[recipient_email]
-            )
-            
-            msg.html = f"""
+            cancel_html = f"""
             <div style="font-family: Arial, sans-serif; padding: 20px; border: 1px solid #eee; border-radius: 8px;">
                 <h2 style="color: #d32f2f;">Registration Cancelled</h2>
                 <p>Hi {current_user.first_name},</p>
@@ -1024,9 +1032,13 @@ def unrsvp_event(event_id):
             </div>
             """
             
-            # 5. Send
-            mail.send(msg)
-            print(f"✅ Un-RSVP Email sent to {recipient_email}")
+            # 5. Queue (sent by the email worker)
+            queue_email(
+                subject=f"Cancellation Confirmed: {event.title}",
+                sender=current_app.config['MAIL_USERNAME'],
+                recipients=[recipient_email],
+                html=cancel_html
+            )
             flash('Registration cancelled successfully.', 'info')
 
         except Exception as e:
@@ -1045,35 +1057,19 @@ def unrsvp_event(event_id):
 # --- Helper Function to send emails ---
 def send_email_to_user(subject, recipient_email, html_body):
     """
-    Sends an email using Hostinger SMTP settings stored in Environment Variables.
+    Sends an email right away using the shared (pooled) SMTP transport.
     """
     try:
-        # 1. Load credentials from Environment Variables (Best Practice)
-        # NEVER hardcode passwords in a function!
-        smtp_server = os.environ.get('MAIL_SERVER', 'smtp.hostinger.com')
-        smtp_port = int(os.environ.get('MAIL_PORT', 587))
-        email_user = os.environ.get('MAIL_USERNAME')
-        email_password = os.environ.get('MAIL_PASSWORD')
-        
-        # 2. Setup the MIME
-        msg = MIMEMultipart()
-        msg['From'] = email_user
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        
-        # Attach the body
-        msg.attach(MIMEText(html_body, 'html', 'utf-8'))
+        # Server, port and credentials come from the MAIL_* config
+        msg = Message(
+            subject=subject,
+            sender=current_app.config.get('MAIL_DEFAULT_SENDER'),
+            recipients=[recipient_email]
+        )
+        msg.html = html_body
 
-        # 3. Connect and Send
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls() 
-        server.login(email_user, email_password)
-        
-        # Send the email
-        server.sendmail(email_user, recipient_email, msg.as_string())
-        
-        # Close connection
-        server.quit()
+        # Reuses a pooled SMTP connection instead of a new login per email
+        mail.send(msg)
         
         print(f"✅ Email sent successfully to {recipient_email}")
         return True
@@ -1084,6 +1080,7 @@ def send_email_to_user(subject, recipient_email, html_body):
         return False
 
 @main_routes.route('/founder')
+@page_cache.cached()
 def founder():
     return render_template('user/founder.html')
 
@@ -0,0 +1,118 @@
+# project/viewcounter.py
+import atexit
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import update, func
+
+
+# --- WRITE-BEHIND STORY VIEW COUNTER ---
+# story_detail used to commit `views += 1` on the read path, so a popular
+# story became a row-lock hotspot. Now each worker just bumps an in-memory
+# counter, and a background thread writes them out as ONE
+# `UPDATE stories SET views = views + n` per story:
+#   - every VIEW_FLUSH_INTERVAL seconds
+#   - sooner, once VIEW_FLUSH_MAX_PENDING views are waiting
+#   - at interpreter shutdown (atexit)
+#
+# A hard kill (SIGKILL, OOM) loses at most VIEW_FLUSH_MAX_PENDING views or
+# one interval's worth, whichever is smaller. Story.view_count adds this
+# worker's unflushed views to the stored number.
+
+
+class ViewCounter:
+    def __init__(self, app=None):
+        self.app = app
+        self._pending = Counter()   # story_id -> views not yet written
+        self._flushing = Counter()  # Being written right now (still counted by pending())
+        self._total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_FLUSH_INTERVAL', 10)
+        self.max_pending = app.config.get('VIEW_FLUSH_MAX_PENDING', 500)
+        app.extensions['view_counter'] = self
+
+    # --- 1. RECORDING (request path: no DB access) ---
+    def record(self, story_id, n=1):
+        self._ensure_flusher()
+        with self._lock:
+            self._pending[story_id] += n
+            self._total += n
+            full = self._total >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def pending(self, story_id):
+        with self._lock:
+            return self._pending.get(story_id, 0) + self._flushing.get(story_id, 0)
+
+    # --- 2. FLUSHING ---
+    def flush(self):
+        """Writes buffered views to the DB. Needs an app context. Returns views written."""
+        from .extension import db
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending, self._total = self._pending, Counter(), 0
+                self._flushing = batch
+            if not batch:
+                return 0
+
+            stories = db.metadata.tables['stories']
+            try:
+                # Core UPDATEs on their own connection: no ORM session involved,
+                # so this doesn't expire request objects or invalidate page caches
+                with db.engine.begin() as conn:
+                    for story_id, n in sorted(batch.items()):  # Same lock order in every worker
+                        conn.execute(
+                            update(stories)
+                            .where(stories.c.id == story_id)
+                            # Keep updated_at: a view isn't an edit (skips the onupdate)
+                            .values(views=func.coalesce(stories.c.views, 0) + n,
+                                    updated_at=stories.c.updated_at)
+                        )
+            except Exception as e:
+                # Keep them for the next attempt
+                with self._lock:
+                    self._pending.update(batch)
+                    self._total += sum(batch.values())
+                print(f"View counter flush failed, will retry: {e}")
+                return 0
+            finally:
+                with self._lock:
+                    self._flushing = Counter()
+
+            return sum(batch.values())
+
+    def _flush_in_app(self):
+        with self.app.app_context():
+            self.flush()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._flush_in_app()
+
+    def _ensure_flusher(self):
+        # One flusher thread per process (gunicorn forks after import)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent still owns (and flushes) what it counted
+                self._pending, self._flushing, self._total = Counter(), Counter(), 0
+            self._pid = os.getpid()
+
+        threading.Thread(target=self._run, name='view-counter', daemon=True).start()
+        atexit.register(self._flush_in_app)
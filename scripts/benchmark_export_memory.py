@@ -0,0 +1,120 @@
+# scripts/benchmark_export_memory.py
+"""
+Peak memory (RSS) of the admin CSV exports on a big scratch table.
+
+    python scripts/benchmark_export_memory.py                   # 500k partner applications, temp SQLite file
+    python scripts/benchmark_export_memory.py --rows 100000 --db mysql+pymysql://u:p@localhost/osov_bench
+
+Each export runs in a fresh child process, which first makes a warm-up
+request (the small donations export). Reported: the child's peak RSS,
+and how much of it the export added on top of the warm-up.
+The --db database must be EMPTY; it gets the fake rows.
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from scratch_db import scratch_app, seed
+
+
+EXPORTS = [
+    # (label, url)
+    ('partners csv', '/admin/export/partners'),
+    ('partners csv.gz', '/admin/export/partners?gzip=1'),
+    ('partners, Approved, 2026 only', '/admin/export/partners?status=Approved&from=2026-01-01&to=2026-12-31'),
+]
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+# --- 1. CHILD: one export, measured ---
+def measure(db_uri, url):
+    os.environ['SQLALCHEMY_DATABASE_URI'] = db_uri
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ['SQL_TIMING_ENABLED'] = 'false'  # No slow-query noise on the big read
+    from project import create_app
+    from project.extension import query_counter
+
+    app = create_app()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'  # Seeded admin
+        session['_fresh'] = True
+
+    def download(path):
+        with app.app_context(), query_counter.capture() as queries:
+            response = client.get(path)
+            size = sum(len(chunk) for chunk in response.response)
+            response.close()
+        return response.status_code, size, len(queries)
+
+    download('/admin/fundraising/export_csv')  # Small table: imports, connection pool, first request...
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    status, size, queries = download(url)
+    elapsed = time.perf_counter() - start
+    print(f'{status} {size} {queries} {elapsed:.2f} {peak_rss_mb():.1f} {peak_rss_mb() - baseline:.1f}')
+
+
+# --- 2. PARENT: seed, then one child per export ---
+def fill(rows):
+    from sqlalchemy import insert
+    from project.extension import db
+    from project.model import PartnerApplication
+    from datetime import datetime, timedelta
+
+    counts = seed(0.05)
+    now = datetime(2026, 10, 1)
+    batch = 50000
+    for offset in range(0, rows, batch):
+        db.session.execute(insert(PartnerApplication), [dict(
+            user_id=1 + i % counts['users'], org_name=f'Organization {i}', org_type='NGO',
+            website=f'https://org{i}.example.org', partnership_type='Sponsorship',
+            proposal_details='We can offer...', status=('Pending', 'Approved', 'Rejected')[i % 3],
+            created_at=now - timedelta(minutes=i),
+        ) for i in range(offset, min(rows, offset + batch))])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='SQLAlchemy URI of an EMPTY scratch database (default: a temp SQLite file).')
+    parser.add_argument('--rows', type=int, default=500000, help='Partner applications to export.')
+    parser.add_argument('--child', nargs=2, metavar=('DB', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return measure(*args.child)
+
+    tmpdir = None
+    db_uri = args.db
+    if not db_uri:
+        tmpdir = tempfile.mkdtemp(prefix='osov-bench-')
+        db_uri = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+    try:
+        with scratch_app(db_uri, SQL_TIMING_ENABLED='false'):
+            print(f'Seeding {args.rows} partner applications ...')
+            fill(args.rows)
+
+        print(f"\n{'export':32} {'status':>6} {'size':>10} {'queries':>8} {'seconds':>8} {'peak RSS':>10} {'added':>10}")
+        for label, url in EXPORTS:
+            out = subprocess.run([sys.executable, __file__, '--child', db_uri, url],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            status, size, queries, seconds, peak, added = out[-6:]
+            print(f'{label:32} {status:>6} {int(size) / 1e6:>8.1f}MB {queries:>8} {seconds:>8} '
+                  f'{float(peak):>8.1f}MB {float(added):>8.1f}MB')
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
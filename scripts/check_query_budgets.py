@@ -0,0 +1,75 @@
+# scripts/check_query_budgets.py
+"""
+Requests every page that declares @query_counter.budget(n) against a seeded
+scratch database (logged in as an admin) and fails if any of them runs more
+SQL statements than its budget. Meant for CI:
+
+    python scripts/check_query_budgets.py               # temp SQLite file
+    python scripts/check_query_budgets.py --scale 5     # 5x the default rows
+
+A page whose count grows with the seeded rows (try two --scale values) has
+an N+1: a relationship lazy-loaded once per row.
+"""
+import argparse
+import logging
+import sys
+
+from scratch_db import scratch_app, seed
+
+
+def budgeted_pages(app):
+    """[(endpoint, url, budget)] for budgeted GET routes without URL arguments."""
+    pages = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if 'GET' not in rule.methods or rule.arguments or rule.endpoint == 'static':
+            continue
+        budget = getattr(app.view_functions[rule.endpoint], 'query_budget', None)
+        if budget is not None:
+            pages.append((rule.endpoint, rule.rule, budget))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='SQLAlchemy URI of an EMPTY scratch database (default: a temp SQLite file).')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the seeded row counts.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show repeated statements for every page.')
+    args = parser.parse_args()
+
+    # Cached pages would replay with 0 queries; budgets are checked here, not logged;
+    # a lazy load on a list page's rows raises (500) instead of adding queries
+    with scratch_app(args.db, PAGE_CACHE_ENABLED='false', QUERY_BUDGET_STRICT='false', QUERY_RAISELOAD='true') as app:
+        from project.extension import query_counter
+        app.logger.setLevel(logging.ERROR)  # The per-request warnings would repeat the report below
+
+        counts = seed(args.scale)
+        print('Seeded ' + ', '.join(f'{n} {table}' for table, n in counts.items()))
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = '1'  # Seeded admin
+            session['_fresh'] = True
+
+        failures = 0
+        for endpoint, url, budget in budgeted_pages(app):
+            # Fresh app context: own session and g, like a real request (no identity map carry-over)
+            with app.app_context(), query_counter.capture() as queries:
+                response = client.get(url)
+                response.get_data()  # Streamed responses run their queries here
+                response.close()
+
+            over = len(queries) > budget or response.status_code >= 500
+            failures += over
+            print(f"{'FAIL' if over else 'ok  '} {url:38} {response.status_code}  {len(queries):5} queries (budget {budget})")
+            if over or args.verbose:
+                for n, shape in query_counter.repeated_shapes(queries, threshold=2):
+                    print(f'       {n}x {shape[:160]}')
+
+    if failures:
+        print(f'\n{failures} page(s) over their query budget.')
+        sys.exit(1)
+    print('\nAll pages within their query budgets.')
+
+
+if __name__ == '__main__':
+    main()
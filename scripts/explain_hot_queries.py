@@ -0,0 +1,133 @@
+# scripts/explain_hot_queries.py
+"""
+EXPLAINs the site's hot queries against a seeded scratch database and
+fails if any of them doesn't use one of its indexes.
+
+    python scripts/explain_hot_queries.py                      # temp SQLite file
+    python scripts/explain_hot_queries.py --db mysql+pymysql://u:p@localhost/osov_explain
+
+The database is built with the real migrations ('flask db upgrade'), so this
+also checks that the migrations create the indexes. It must be EMPTY: the
+script inserts thousands of fake rows. Never point it at production.
+"""
+import argparse
+import re
+import sys
+from datetime import datetime
+
+from scratch_db import scratch_app, seed
+
+
+# --- 1. THE HOT QUERIES (same shape as the routes that run them) ---
+def hot_queries(db):
+    from sqlalchemy import distinct
+    from project.model import User, Story, EventRSVP, Donation, PartnerApplication
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # (label, statement, table that must be read through an index, acceptable indexes)
+    return [
+        ('stories: latest published',
+         Story.query.filter_by(status='Published').order_by(Story.created_at.desc()).limit(9),
+         'stories', {'ix_stories_status_created_at'}),
+        ('stories: latest published in a category',
+         Story.query.filter_by(status='Published').filter(Story.category == 'Youth Success')
+         .order_by(Story.created_at.desc()).limit(9),
+         'stories', {'ix_stories_status_created_at', 'ix_stories_category'}),
+        ('stories: category buttons',
+         db.session.query(distinct(Story.category)).filter(Story.status == 'Published'),
+         'stories', {'ix_stories_status_created_at', 'ix_stories_category'}),
+        ('story_detail: more stories',
+         Story.query.filter(Story.id != 1, Story.status == 'Published').order_by(Story.created_at.desc()).limit(4),
+         'stories', {'ix_stories_status_created_at'}),
+        ('manage_stories: counts by status',
+         db.session.query(Story.status, db.func.count()).group_by(Story.status),
+         'stories', {'ix_stories_status_created_at'}),
+        ('approvals: partner counts by status',
+         db.session.query(PartnerApplication.status, db.func.count()).group_by(PartnerApplication.status),
+         'partner_applications', {'ix_partner_applications_status_created_at'}),
+        ('fundraising: recent donations',
+         Donation.query.filter_by(status='Success').order_by(Donation.created_at.desc()).limit(3),
+         'donations', {'ix_donations_status_created_at'}),
+        ('export: successful donations',
+         Donation.query.filter_by(status='Success').order_by(Donation.created_at.desc()),
+         'donations', {'ix_donations_status_created_at'}),
+        ('donate: active monthly plan',
+         Donation.query.filter_by(user_id=7, frequency='monthly', status='Active').limit(1),
+         'donations', {'ix_donations_user_frequency_status'}),
+        ('events: existing RSVP',
+         EventRSVP.query.filter_by(user_id=7, event_id=3).limit(1),
+         'event_rsvps', {'ix_event_rsvps_event_user'}),
+        ('dashboard: user list (keyset page)',
+         User.query.order_by(User.created_at.desc(), User.id.desc()).limit(5),
+         'users', {'ix_users_created_at'}),
+        ('manage_stories: all stories (keyset page)',
+         Story.query.order_by(Story.created_at.desc(), Story.id.desc()).limit(10),
+         'stories', {'ix_stories_created_at'}),
+        ('approvals: pending partners (keyset page)',
+         PartnerApplication.query.filter_by(status='Pending')
+         .order_by(PartnerApplication.created_at.desc(), PartnerApplication.id.desc()).limit(6),
+         'partner_applications', {'ix_partner_applications_status_created_at'}),
+        ('dashboard: users active today',
+         User.query.filter(User.last_login >= today_start).with_entities(db.func.count()),
+         'users', {'ix_users_last_login'}),
+    ]
+
+
+# --- 2. EXPLAIN ---
+def explain(db, query):
+    """Returns [(table, index or None, detail)] for each table the plan reads."""
+    engine = db.engine
+    statement = getattr(query, 'statement', query)
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            steps = []
+            for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql):
+                detail = row[-1]  # e.g. "SEARCH stories USING INDEX ix_stories_category (category=?)"
+                match = re.match(r'(?:SCAN|SEARCH) (\w+)(?:.*USING (?:COVERING )?INDEX (\w+))?', detail)
+                if match:
+                    steps.append((match.group(1), match.group(2), detail))
+            return steps
+
+        if engine.dialect.name == 'mysql':
+            rows = conn.exec_driver_sql('EXPLAIN ' + sql).mappings().all()
+            return [(r['table'], r['key'], f"type={r['type']} key={r['key']} rows={r['rows']} {r['Extra'] or ''}")
+                    for r in rows]
+
+    raise SystemExit(f'EXPLAIN is not supported for {engine.dialect.name}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', help='SQLAlchemy URI of an EMPTY scratch database (default: a temp SQLite file).')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print the full plan of every query.')
+    args = parser.parse_args()
+
+    with scratch_app(args.db):
+        from project.extension import db
+        print(f'Seeding {db.engine.url.render_as_string(hide_password=True)} ...')
+        seed()
+
+        failures = 0
+        for label, query, table, indexes in hot_queries(db):
+            steps = explain(db, query)
+            used = [index for step_table, index, _ in steps if step_table == table]
+            ok = bool(used) and all(index in indexes for index in used)
+            failures += not ok
+
+            print(f"{'ok  ' if ok else 'FAIL'} {label:42} {table}: {', '.join(str(i) for i in used) or 'no index'}")
+            if args.verbose or not ok:
+                for _, _, detail in steps:
+                    print(f'       {detail}')
+                if not ok:
+                    print(f"       expected one of: {', '.join(sorted(indexes))}")
+
+    if failures:
+        print(f'\n{failures} hot query(ies) not using an index.')
+        sys.exit(1)
+    print('\nAll hot queries use an index.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# scripts/scratch_db.py
+"""
+Shared by the scripts in this folder: a migrated, EMPTY scratch database
+filled with fake rows. Never point these scripts at production.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Rows per table at scale=1
+SEED_COUNTS = {
+    'users': 2000, 'stories': 3000, 'events': 100, 'rsvps': 4000, 'donations': 20000, 'campaigns': 10,
+    'volunteers': 500, 'partners': 300, 'mentorships': 500,
+}
+CATEGORIES = ['General', 'Youth Success', 'Immigrant Journeys', 'Community', 'Education']
+
+
+@contextmanager
+def scratch_app(db_uri=None, **config):
+    """
+    Yields the app (inside an app context) on a database brought up to date
+    with the real migrations. Without db_uri a temp SQLite file is used.
+    Extra keyword arguments become environment variables before the app
+    is imported (project/config.py reads them at import time).
+    """
+    tmpdir = None
+    if not db_uri:
+        tmpdir = tempfile.mkdtemp(prefix='osov-scratch-')
+        db_uri = 'sqlite:///' + os.path.join(tmpdir, 'scratch.db')
+    os.environ['SQLALCHEMY_DATABASE_URI'] = db_uri
+    os.environ.setdefault('SECRET_KEY', 'scratch-db')
+    os.environ.setdefault('PAGE_CACHE_BACKEND', 'lru')  # Not the real instance/page_cache.sqlite3
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '')  # Metrics in memory, not in the real shared directory
+    os.environ.update({key: str(value) for key, value in config.items()})
+
+    from flask_migrate import upgrade
+    from project import create_app
+    from project.model import User
+
+    app = create_app()
+    try:
+        with app.app_context():
+            upgrade()
+            if User.query.first() is not None:
+                raise SystemExit(f'{db_uri} already has users in it - use an empty scratch database.')
+            yield app
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def seed(scale=1.0):
+    """Bulk-inserts fake rows (SEED_COUNTS x scale). Returns the counts used. Needs an app context."""
+    from sqlalchemy import insert
+    from project.extension import db
+    from project.model import (User, UserRole, Story, Event, EventRSVP, Donation, Campaign,
+                               VolunteerApplication, ApplicationStatus, PartnerApplication, MentorshipApplication)
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    ago = lambda days: now - timedelta(days=rng.random() * days)
+    n = {table: max(1, int(count * scale)) for table, count in SEED_COUNTS.items()}
+    user = lambda: rng.randint(1, n['users'])
+
+    def rows(model, count, make):
+        db.session.execute(insert(model), [make(i) for i in range(count)])
+
+    rows(User, n['users'], lambda i: dict(
+        first_name='User', last_name=str(i), email=f'user{i}@example.com',
+        role=UserRole.ADMIN if i == 0 else UserRole.USER, created_at=ago(700), last_login=ago(365)))
+    rows(Story, n['stories'], lambda i: dict(
+        title=f'Story {i}', slug=f'story-{i}', summary='...', content='...',
+        author_id=rng.randint(1, 20), category=rng.choice(CATEGORIES),
+        status=rng.choices(['Published', 'Draft', 'Scheduled'], [6, 3, 1])[0],
+        views=0, created_at=ago(1000), updated_at=ago(1000)))
+    rows(Event, n['events'], lambda i: dict(
+        title=f'Event {i}', date_time=ago(-200), capacity=100, status='Published'))
+    rows(EventRSVP, n['rsvps'], lambda i: dict(
+        event_id=rng.randint(1, n['events']), user_id=user(), first_name='Guest', last_name=str(i),
+        email=f'guest{i}@example.com', ticket_id=f'T{i:07d}'))
+    rows(Campaign, n['campaigns'], lambda i: dict(
+        title=f'Campaign {i}', goal_amount=50000, is_active=True, created_at=ago(300)))
+    rows(Donation, n['donations'], lambda i: dict(
+        user_id=rng.choice([None, user()]), guest_name='Guest', guest_email=f'guest{i}@example.com',
+        amount=rng.choice([10, 25, 50, 100]), frequency=rng.choices(['onetime', 'monthly'], [4, 1])[0],
+        status=rng.choices(['Success', 'Pending', 'Failed', 'Active', 'Cancelled'], [12, 3, 2, 2, 1])[0],
+        campaign_id=rng.choice([None, rng.randint(1, n['campaigns'])]), reference=f'ref_{i}', created_at=ago(1000)))
+    rows(VolunteerApplication, n['volunteers'], lambda i: dict(
+        user_id=user(), country='Canada', dob=date(1990, 1, 1), motivation='...',
+        status=rng.choice(list(ApplicationStatus)), created_at=ago(300)))
+    rows(PartnerApplication, n['partners'], lambda i: dict(
+        user_id=user(), org_name=f'Org {i}', partnership_type='Sponsorship', proposal_details='...',
+        status=rng.choice(['Pending', 'Approved', 'Rejected']), created_at=ago(300)))
+    rows(MentorshipApplication, n['mentorships'], lambda i: dict(
+        user_id=user(), program_track='Youth', child_first_name='Kid', child_last_name=str(i),
+        status='Pending', created_at=ago(300)))
+    db.session.commit()
+
+    # Give the planner real statistics, like a production database has
+    with db.engine.begin() as conn:
+        if db.engine.dialect.name == 'sqlite':
+            conn.exec_driver_sql('ANALYZE')
+        elif db.engine.dialect.name == 'mysql':
+            conn.exec_driver_sql('ANALYZE TABLE users, stories, event_rsvps, donations')
+    return n
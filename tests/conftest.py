@@ -0,0 +1,47 @@
+# tests/conftest.py
+import os
+import socket
+import tempfile
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# project/config.py reads the environment at import time (and project/__init__.py
+# builds an app on import), so everything is set before the first import below
+os.environ.update({
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='osov-tests-'), 'import.db'),
+    'SECRET_KEY': 'tests',
+    'PAGE_CACHE_BACKEND': 'lru',         # Not the real instance/page_cache.sqlite3
+    'PROMETHEUS_MULTIPROC_DIR': '',      # Metrics in memory
+    'MAIL_SERVER': '127.0.0.1',          # aiosmtpd, see test_email_worker.py
+    'MAIL_PORT': str(_free_port()),
+    'MAIL_USE_SSL': 'false',
+    'STRIPE_WEBHOOK_SECRET': 'whsec_test_secret',
+})
+
+import pytest  # noqa: E402
+
+from project import config, create_app  # noqa: E402
+from project.extension import db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """A fresh app on its own SQLite file, inside an app context."""
+    monkeypatch.setattr(config, 'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + str(tmp_path / 'test.db'))
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
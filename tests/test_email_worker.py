@@ -0,0 +1,123 @@
+# tests/test_email_worker.py
+# 'flask email-worker --once' against a local SMTP server (aiosmtpd)
+from datetime import datetime, timedelta
+from email import message_from_bytes
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from project import smtp_pool
+from project.extension import db
+from project.mailer import queue_email
+from project.model import EmailOutbox
+
+
+class RecordingHandler:
+    """Keeps every message it receives; refuses recipients at REFUSED_DOMAIN."""
+    REFUSED_DOMAIN = '@refused.example.org'
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith(self.REFUSED_DOMAIN):
+            return '451 4.3.0 Try again later'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, message_from_bytes(envelope.content)))
+        return '250 Message accepted for delivery'
+
+
+@pytest.fixture(scope='module')
+def smtp_server():
+    from project import config
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname=config.MAIL_SERVER, port=config.MAIL_PORT)
+    controller.start()
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def smtp(smtp_server):
+    smtp_server.messages.clear()
+    yield smtp_server
+    # Pooled connections belong to this test's app
+    for pool in list(smtp_pool._pools.values()):
+        pool.close_all()
+    smtp_pool._pools.clear()
+
+
+def run_worker(app):
+    result = app.test_cli_runner().invoke(args=['email-worker', '--once', '--concurrency', '2'])
+    assert result.exit_code == 0, result.output
+    db.session.expire_all()
+    return result
+
+
+def queue(to, subject='Hello'):
+    return queue_email(subject, [to], html='<p>Hi</p>', body='Hi', sender='noreply@example.org').id
+
+
+def test_delivers_queued_email(app, smtp):
+    ids = [queue(f'reader{i}@example.org', subject=f'Issue {i}') for i in range(3)]
+
+    result = run_worker(app)
+
+    assert 'Processed 3 email(s).' in result.output
+    for outbox_id in ids:
+        row = db.session.get(EmailOutbox, outbox_id)
+        assert row.status == 'Sent'
+        assert row.sent_at is not None
+        assert row.attempts == 0
+    received = sorted((rcpt, message['Subject']) for rcpt, message in smtp.messages)
+    assert received == [([f'reader{i}@example.org'], f'Issue {i}') for i in range(3)]
+
+
+def test_failed_send_is_retried_with_backoff(app, smtp):
+    outbox_id = queue('reader' + RecordingHandler.REFUSED_DOMAIN)
+
+    for attempt, delay in ((1, 30), (2, 60)):
+        before = datetime.utcnow()
+        run_worker(app)
+        row = db.session.get(EmailOutbox, outbox_id)
+        assert row.status == 'Pending'
+        assert row.attempts == attempt
+        assert '451' in row.last_error
+        assert row.locked_at is None
+        # EMAIL_RETRY_BASE_SECONDS x 2^(attempts-1)
+        wait = (row.next_attempt_at - before).total_seconds()
+        assert delay - 1 <= wait <= delay + 5
+
+        # Not due yet: the next run leaves it alone
+        run_worker(app)
+        assert db.session.get(EmailOutbox, outbox_id).attempts == attempt
+
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+    assert smtp.messages == []
+
+
+def test_moves_to_dead_after_max_attempts(app, smtp):
+    app.config['EMAIL_MAX_ATTEMPTS'] = 3
+    dead_id = queue('reader' + RecordingHandler.REFUSED_DOMAIN)
+    ok_id = queue('reader@example.org')
+
+    for _ in range(3):
+        run_worker(app)
+        EmailOutbox.query.filter_by(status='Pending').update({'next_attempt_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+
+    dead = db.session.get(EmailOutbox, dead_id)
+    assert dead.status == 'Dead'
+    assert dead.attempts == 3
+    assert db.session.get(EmailOutbox, ok_id).status == 'Sent'
+
+    # Dead letters are kept but never picked up again
+    result = run_worker(app)
+    assert 'Processed' not in result.output
+    assert db.session.get(EmailOutbox, dead_id).attempts == 3
+    assert len(smtp.messages) == 1
@@ -0,0 +1,91 @@
+# tests/test_payment_gateway.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import stripe
+
+from project.payment_gateway import CircuitBreaker, PaymentGateway, PaymentGatewayUnavailable
+
+
+@pytest.fixture
+def gateway(app):
+    gateway = PaymentGateway()
+    gateway.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    gateway._client = lambda operation: None  # Calls below never reach Stripe
+    return gateway
+
+
+def fail(client):
+    raise stripe.APIConnectionError('Stripe is down')
+
+
+def open_circuit(gateway):
+    for _ in range(2):
+        with pytest.raises(stripe.APIConnectionError):
+            gateway._call('test', fail)
+    with pytest.raises(PaymentGatewayUnavailable):
+        gateway._call('test', fail)
+    time.sleep(0.06)  # -> half-open
+    assert gateway.breaker.state == 'half-open'
+
+
+def concurrent_calls(gateway, trial, count=8):
+    """Starts `count` calls at once while the first one to get through blocks in `trial`."""
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def blocking(client):
+        calls.append(1)
+        entered.set()
+        release.wait(5)
+        return trial(client)
+
+    def call(_):
+        try:
+            return gateway._call('test', blocking)
+        except Exception as e:
+            return type(e)
+
+    with ThreadPoolExecutor(count) as pool:
+        futures = [pool.submit(call, i) for i in range(count)]
+        assert entered.wait(5)
+        time.sleep(0.05)  # Give the others time to pile up behind the trial
+        release.set()
+        results = [f.result() for f in futures]
+    return len(calls), results
+
+
+def test_half_open_lets_one_trial_through(gateway):
+    open_circuit(gateway)
+
+    calls, results = concurrent_calls(gateway, fail)
+
+    assert calls == 1
+    assert results.count(stripe.APIConnectionError) == 1
+    assert results.count(PaymentGatewayUnavailable) == 7
+    assert gateway.breaker.state == 'open'  # Failed trial re-opens
+
+
+def test_successful_trial_closes_the_circuit(gateway):
+    open_circuit(gateway)
+
+    calls, results = concurrent_calls(gateway, lambda client: 'ok')
+
+    assert calls == 1 and results.count('ok') == 1
+    assert gateway.breaker.state == 'closed'
+    assert gateway._call('test', lambda client: 'ok') == 'ok'
+
+
+def test_trial_with_a_bad_request_frees_the_slot(gateway):
+    open_circuit(gateway)
+
+    def bad_request(client):
+        raise stripe.InvalidRequestError('No such subscription', param='id')
+
+    with pytest.raises(stripe.InvalidRequestError):
+        gateway._call('test', bad_request)
+    assert gateway.breaker.state == 'half-open'
+    assert gateway._call('test', lambda client: 'ok') == 'ok'  # Next trial gets through
+    assert gateway.breaker.state == 'closed'
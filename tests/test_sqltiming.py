@@ -0,0 +1,22 @@
+# tests/test_sqltiming.py
+import logging
+
+from werkzeug.test import EnvironBuilder
+
+
+def test_slow_query_explain_runs_after_the_response_is_sent(app, caplog):
+    timer = app.extensions['sql_timer']
+    timer.slow_seconds, timer.explain, timer._explained = 0.0, True, {}  # Every SELECT is "slow"
+
+    environ = EnvironBuilder(path='/campaigns').get_environ()
+    started = []
+    body_iter = app.wsgi_app(environ, lambda status, headers, exc_info=None: started.append(status))
+
+    with caplog.at_level(logging.WARNING, logger='project.slow_sql'):
+        body = b''.join(body_iter)
+        assert started == ['200 OK'] and b'</html>' in body
+        assert 'Slow query' in caplog.text
+        assert 'EXPLAIN' not in caplog.text  # The client has the whole page; nothing explained yet
+
+        body_iter.close()  # What the WSGI server does after writing the body
+        assert 'EXPLAIN for slow query SELECT' in caplog.text
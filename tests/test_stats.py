@@ -0,0 +1,70 @@
+# tests/test_stats.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from project import stats
+from project.extension import db
+from project.model import DailyStat, Donation, User
+
+
+@pytest.fixture
+def history(app):
+    """Donations over the last 30 days, some still 'Pending', rolled up to yesterday."""
+    now = datetime.utcnow()
+    db.session.add(User(first_name='Ada', last_name='Admin', email='ada@example.org', created_at=now - timedelta(days=40)))
+    for days_ago in range(30):
+        for frequency in ('onetime', 'monthly'):
+            db.session.add(Donation(
+                amount=10.0 + days_ago, currency='cad', frequency=frequency,
+                reference=f'cs_{days_ago}_{frequency}', created_at=now - timedelta(days=days_ago, hours=1),
+                status='Pending' if days_ago % 3 == 0 else 'Success'))
+    db.session.commit()
+    stats.rollup()
+
+
+def live_truth():
+    """totals() computed straight from the live tables."""
+    db.session.query(DailyStat).delete()
+    truth = stats.totals()
+    db.session.rollback()
+    return truth
+
+
+def flip(reference):
+    donation = Donation.query.filter_by(reference=reference).one()
+    assert donation.mark_success()
+    db.session.commit()
+
+
+@pytest.mark.parametrize('days_ago', [3, 12, 27])  # Inside and outside STATS_ROLLUP_RECOMPUTE_DAYS
+def test_late_success_is_counted_at_once(history, days_ago):
+    before = stats.totals()
+    flip(f'cs_{days_ago}_monthly')
+
+    after = stats.totals()
+    assert after == live_truth()
+    assert after['raised']['CAD'] == before['raised']['CAD'] + 10.0 + days_ago
+    assert after['monthly']['CAD'] == before['monthly']['CAD'] + 10.0 + days_ago
+
+
+def test_next_rollup_does_not_count_it_twice(history):
+    flip('cs_3_onetime')
+    flip('cs_21_onetime')
+    stats.rollup()  # Re-rolls the recompute window from the live rows
+    assert stats.totals() == live_truth()
+
+
+def test_flip_of_a_day_not_rolled_up_yet(history):
+    flip('cs_0_onetime')  # Today: totals() reads it live
+    assert stats.totals() == live_truth()
+    assert DailyStat.query.filter_by(day=datetime.utcnow().date()).count() == 0
+
+
+def test_second_mark_success_changes_nothing(history):
+    flip('cs_12_onetime')
+    totals = stats.totals()
+    donation = Donation.query.filter_by(reference='cs_12_onetime').one()
+    assert not donation.mark_success()
+    db.session.commit()
+    assert stats.totals() == totals
@@ -0,0 +1,142 @@
+# tests/test_stripe_webhook.py
+# Recorded Stripe events (tests/fixtures/stripe) replayed against /stripe/webhook, no network
+import hashlib
+import hmac
+import json
+import os
+import time
+
+import pytest
+
+from project.extension import db
+from project.model import Campaign, Donation, StripeEvent
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'stripe')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, f'{name}.json'), 'rb') as f:
+        return f.read()
+
+
+def sign(payload, secret, timestamp=None):
+    """The Stripe-Signature header Stripe would send for `payload`."""
+    timestamp = int(timestamp or time.time())
+    digest = hmac.new(secret.encode(), f'{timestamp}.'.encode() + payload, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def post(client, payload, signature):
+    headers = {'Stripe-Signature': signature} if signature else {}
+    return client.post('/stripe/webhook', data=payload, headers=headers, content_type='application/json')
+
+
+@pytest.fixture
+def replay(app, client):
+    def replay(name):
+        payload = fixture(name)
+        response = post(client, payload, sign(payload, app.config['STRIPE_WEBHOOK_SECRET']))
+        db.session.expire_all()
+        return response
+    return replay
+
+
+@pytest.fixture
+def campaign(app):
+    # The donate route creates these 'Pending' rows before redirecting to Checkout
+    campaign = Campaign(title='Schools', goal_amount=1000.0)
+    db.session.add(campaign)
+    db.session.flush()
+    db.session.add_all([
+        Donation(guest_email='donor@example.org', guest_name='Ada Donor', amount=50.0, currency='CAD',
+                 reference='cs_test_onetime0001', status='Pending', campaign_id=campaign.id),
+        Donation(guest_email='bank@example.org', guest_name='Alan Transfer', amount=100.0, currency='CAD',
+                 reference='cs_test_async00001', status='Pending', campaign_id=campaign.id),
+        Donation(guest_email='monthly@example.org', guest_name='Grace Monthly', amount=25.0, currency='CAD',
+                 frequency='monthly', reference='cs_test_monthly0001', status='Pending', campaign_id=campaign.id),
+    ])
+    db.session.commit()
+    return campaign
+
+
+def donation(reference):
+    return Donation.query.filter_by(reference=reference).one()
+
+
+def test_one_time_checkout_completed(replay, campaign):
+    assert replay('checkout.session.completed').status_code == 200
+
+    assert donation('cs_test_onetime0001').status == 'Success'
+    assert (campaign.raised_amount, campaign.donor_count) == (50.0, 1)
+    assert db.session.get(StripeEvent, 'evt_1QaTestOnetime0001').type == 'checkout.session.completed'
+
+
+def test_async_payment_succeeded(replay, campaign):
+    assert replay('checkout.session.async_payment_succeeded').status_code == 200
+
+    assert donation('cs_test_async00001').status == 'Success'
+    assert (campaign.raised_amount, campaign.donor_count) == (100.0, 1)
+
+
+def test_subscription_lifecycle(replay, campaign):
+    assert replay('checkout.session.completed.subscription').status_code == 200
+    parent = donation('cs_test_monthly0001')
+    assert (parent.status, parent.frequency) == ('Active', 'monthly')
+    assert (parent.stripe_subscription_id, parent.stripe_customer_id) == ('sub_test_monthly0001', 'cus_test_monthly0001')
+    assert (campaign.raised_amount, campaign.donor_count) == (0.0, 0)
+
+    # A renewal: its own Success row, counted once in the campaign
+    assert replay('invoice.paid').status_code == 200
+    renewal = donation('in_test_renewal0001')
+    assert (renewal.status, renewal.amount, renewal.currency, renewal.frequency) == ('Success', 25.0, 'CAD', 'monthly')
+    assert (renewal.guest_email, renewal.campaign_id) == ('monthly@example.org', campaign.id)
+    assert (campaign.raised_amount, campaign.donor_count) == (25.0, 1)
+
+    assert replay('customer.subscription.deleted').status_code == 200
+    assert donation('cs_test_monthly0001').status == 'Cancelled'
+    assert donation('in_test_renewal0001').status == 'Success'
+
+
+@pytest.mark.parametrize('name', ['checkout.session.completed', 'checkout.session.async_payment_succeeded'])
+def test_replayed_event_is_a_no_op(replay, campaign, name):
+    assert replay(name).status_code == 200
+    assert replay(name).status_code == 200  # Stripe delivering it again
+
+    assert (campaign.raised_amount, campaign.donor_count) in ((50.0, 1), (100.0, 1))
+    assert StripeEvent.query.count() == 1
+
+
+def test_replayed_invoice_adds_one_renewal(replay, campaign):
+    replay('checkout.session.completed.subscription')
+    replay('invoice.paid')
+    replay('invoice.paid')
+
+    assert Donation.query.filter_by(stripe_subscription_id='sub_test_monthly0001', status='Success').count() == 1
+    assert (campaign.raised_amount, campaign.donor_count) == (25.0, 1)
+
+
+def test_missing_signature_is_rejected(client, campaign):
+    assert post(client, fixture('checkout.session.completed'), None).status_code == 400
+    assert donation('cs_test_onetime0001').status == 'Pending'
+    assert StripeEvent.query.count() == 0
+
+
+@pytest.mark.parametrize('signature', [
+    lambda payload: sign(payload, 'whsec_someone_else'),                   # Wrong secret
+    lambda payload: sign(payload + b' ', 'whsec_test_secret'),            # Body changed after signing
+    lambda payload: sign(payload, 'whsec_test_secret', time.time() - 3600),  # Too old (replay attack)
+    lambda payload: 'garbage',
+])
+def test_bad_signature_is_rejected(client, campaign, signature):
+    payload = fixture('checkout.session.completed')
+    assert post(client, payload, signature(payload)).status_code == 400
+    assert donation('cs_test_onetime0001').status == 'Pending'
+    assert (campaign.raised_amount, campaign.donor_count) == (0.0, 0)
+    assert StripeEvent.query.count() == 0
+
+
+def test_fixtures_are_the_events_the_handlers_expect():
+    # Keeps the fixture set honest if a handler is added or renamed
+    from project.payments import HANDLERS
+    types = {json.loads(fixture(name[:-5]))['type'] for name in os.listdir(FIXTURES)}
+    assert types == set(HANDLERS)